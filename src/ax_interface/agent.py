@@ -1,6 +1,11 @@
 import asyncio
+import json
 
+from . import logger
+from .constants import STATS_REPORT_INTERVAL
+from .frequency import DEFAULT_UPDATE_DUTY_BUDGET
 from .mib import MIBTable, MIBMeta
+from .monitor import LoopMonitor
 from .socket_io import SocketManager
 
 # how long to wait before forcibly killing background task(s) during the shutdown procedure.
@@ -8,7 +13,9 @@ BACKGROUND_WAIT_TIMEOUT = 10  # seconds
 
 
 class Agent:
-    def __init__(self, mib_cls, enable_dynamic_frequency, update_frequency, loop):
+    def __init__(self, mib_cls, enable_dynamic_frequency, update_frequency, loop, enable_context_registration=False,
+                 update_workers=0, process_updaters=False, idle_timeout=0,
+                 update_duty_budget=DEFAULT_UPDATE_DUTY_BUDGET):
         if not type(mib_cls) is MIBMeta:
             raise ValueError("Expected a class with type: {}".format(MIBMeta))
 
@@ -19,12 +26,48 @@ class Agent:
         self.oid_updaters_enabled = asyncio.Event()
         self.stopped = asyncio.Event()
 
+        # measures the event loop lag, and times the updaters and request handling to tell what causes it
+        self.loop_monitor = LoopMonitor()
+
         # Initialize our MIB
-        self.mib_table = MIBTable(mib_cls, enable_dynamic_frequency, update_frequency)
+        self.mib_table = MIBTable(mib_cls, enable_dynamic_frequency, update_frequency, enable_context_registration,
+                                  update_workers, process_updaters, idle_timeout,
+                                  update_duty_budget, self.loop_monitor)
 
         # containers
         self.socket_mgr = SocketManager(self.mib_table, self.run_enabled, self.loop)
 
+        # name -> callable returning the statistics of a component, logged every STATS_REPORT_INTERVAL
+        self.stats_sources = {'loop_monitor': self.loop_monitor.stats}
+        if self.mib_table.access_tracker is not None:
+            self.stats_sources['updater_access'] = self.mib_table.access_tracker.stats
+        if self.mib_table.frequency_controller is not None:
+            self.stats_sources['update_frequency'] = self.mib_table.frequency_controller.stats
+
+    def add_stats_source(self, name, stats):
+        """
+        Report the statistics of another component along with the agent's.
+
+        :param name: name the statistics are logged under
+        :param stats: callable returning the statistics, JSON serializable
+        """
+        self.stats_sources[name] = stats
+
+    def report_stats(self):
+        """
+        Log the statistics of each source, one line each.
+        """
+        for name, stats in self.stats_sources.items():
+            try:
+                logger.info("Stats [{}]: {}".format(name, json.dumps(stats(), sort_keys=True, default=str)))
+            except Exception:
+                logger.exception("Failed to report the stats of [{}]".format(name))
+
+    async def _report_stats_periodically(self, interval=STATS_REPORT_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            self.report_stats()
+
     async def run_in_event_loop(self):
         # starting up, set the enabled signals for the Agent and background tasks
         self.run_enabled.set()
@@ -35,6 +78,8 @@ class Agent:
         while self.run_enabled.is_set():
             # start the MIB updater(s) and remember the future obj.
             background_task = self.mib_table.start_background_tasks(self.oid_updaters_enabled)
+            monitor_task = asyncio.ensure_future(self.loop_monitor.run(self.oid_updaters_enabled))
+            stats_task = asyncio.ensure_future(self._report_stats_periodically())
             # wait for the socket manager to close
             await self.socket_mgr.connection_loop()
 
@@ -45,8 +90,14 @@ class Agent:
 
             # signal background tasks to halt
             self.oid_updaters_enabled.clear()
+            self.mib_table.stop_background_tasks()
+            stats_task.cancel()
             # wait for handlers to come back
-            await asyncio.wait_for(background_task, BACKGROUND_WAIT_TIMEOUT)
+            await asyncio.wait_for(asyncio.gather(background_task, monitor_task), BACKGROUND_WAIT_TIMEOUT)
+            await asyncio.gather(stats_task, return_exceptions=True)
+
+        # release the update worker threads, if any
+        self.mib_table.shutdown_background_tasks()
 
         # signal that we're done!
         self.stopped.set()
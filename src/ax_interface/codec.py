@@ -0,0 +1,118 @@
+"""
+Precompiled struct codecs for the AgentX encodings.
+
+Every multi-byte integer in a PDU is encoded according to the header's NETWORK_BYTE_ORDER bit, so each codec below is
+keyed by endianness ('!' or '<'). Codecs are compiled on first use and shared afterwards; format strings are never
+re-parsed on the encode/decode path.
+"""
+
+import struct
+
+_structs = {}
+_subid_structs = {}
+_oid_structs = {}
+
+
+def _compile(endianness, fmt):
+    key = (endianness, fmt)
+    try:
+        return _structs[key]
+    except KeyError:
+        # struct.error is raised (and nothing is cached) for an invalid endianness.
+        codec = _structs[key] = struct.Struct(endianness + fmt)
+        return codec
+
+
+def header_tags():
+    """
+    h.version, h.type, h.flags, <reserved> -- single bytes, byte order does not apply.
+    """
+    return _compile('!', 'BBBB')
+
+
+def header_ids(endianness):
+    """
+    h.sessionID, h.transactionID, h.packetID, h.payload_length
+    """
+    return _compile(endianness, '4L')
+
+
+def header(endianness):
+    """
+    The complete 20-octet PDU header.
+    """
+    return _compile(endianness, 'BBBB4L')
+
+
+def oid_header(endianness):
+    """
+    n_subid, prefix, include, <reserved>
+    """
+    return _compile(endianness, 'BBBB')
+
+
+def subids(endianness, n_subid):
+    """
+    The sub-identifiers of an Object Identifier (without its 4-byte header).
+    """
+    key = (endianness, n_subid)
+    try:
+        return _subid_structs[key]
+    except KeyError:
+        codec = _subid_structs[key] = struct.Struct('{}{}L'.format(endianness, n_subid))
+        return codec
+
+
+def oid(endianness, n_subid):
+    """
+    A complete Object Identifier: 4-byte header followed by n_subid sub-identifiers.
+    """
+    key = (endianness, n_subid)
+    try:
+        return _oid_structs[key]
+    except KeyError:
+        codec = _oid_structs[key] = struct.Struct('{}BBBB{}L'.format(endianness, n_subid))
+        return codec
+
+
+def varbind_header(endianness):
+    """
+    v.type, <reserved>
+    """
+    return _compile(endianness, 'HH')
+
+
+def open_header(endianness):
+    """
+    o.timeout, <reserved> (also c.reason, <reserved> in the agentx-Close-PDU)
+    """
+    return _compile(endianness, 'B3s')
+
+
+def register_header(endianness):
+    """
+    r.timeout, r.priority, r.range_subid, <reserved>
+    """
+    return _compile(endianness, 'BBBB')
+
+
+def getbulk_header(endianness):
+    """
+    g.non_repeaters, g.max_repetitions
+    """
+    return _compile(endianness, 'HH')
+
+
+def response_header(endianness):
+    """
+    res.sysUpTime, res.error, res.index
+    """
+    return _compile(endianness, 'LHH')
+
+
+def uint32(endianness):
+    return _compile(endianness, 'L')
+
+
+def uint64(endianness):
+    return _compile(endianness, 'Q')
@@ -3,6 +3,9 @@ from enum import Enum, unique
 AGENTX_SOCKET_PATH = '/var/agentx/master'
 SNMPD_CONFIG_FILE = '/etc/snmp/snmpd.conf'
 
+# https://tools.ietf.org/html/rfc2741#section-6.1 -- h.version
+AGENTX_VERSION = 1
+
 # https://tools.ietf.org/html/rfc2741#section-6.1 -- PDU Header definition
 # Headers are fixed at 20 bytes.
 AGENTX_HEADER_LENGTH = 20
@@ -30,6 +33,13 @@ SNMP_SUBAGENT_NAME = "Software for Open Networking in the Cloud (SONiC) -- SNMP
 # How often PDU processing counts are emitted in logs. Debug only.
 REPORTING_FREQUENCY = 1000
 
+# Complete PDUs held while the transport is paused for flow control. Beyond this, the oldest are dropped: the master
+# agent has most likely timed them out already.
+AGENTX_MAX_PENDING_PDUS = 1024
+
+# Number of held PDUs answered (with a single write) at a time when the transport resumes.
+AGENTX_PENDING_PDU_BATCH = 64
+
 
 @unique
 class ValueType(int, Enum):
@@ -95,3 +105,25 @@ DEFAULT_PDU_TIMEOUT = 5
 UPDATE_FREQUENCY_RATE = 10
 # MIBUpdater max update interval
 MAX_UPDATE_INTERVAL = 60
+# Random deviation of MIBUpdater update intervals (in seconds), at most a quarter of the interval.
+UPDATE_JITTER = 2
+
+# Updater cycles the scheduler starts per event loop iteration. Due updaters beyond this wait for the next iteration,
+# leaving room for requests in between.
+MAX_UPDATES_PER_TICK = 2
+# Event loop CPU time (in seconds) one scheduler iteration may spend on update cycles before deferring the rest.
+UPDATE_TICK_CPU_BUDGET = 0.25
+# How late (in seconds) an updater may start before its deadline counts as missed.
+MISSED_DEADLINE_TOLERANCE = 1
+# Update interval (in seconds) of updaters whose subtrees nobody requested for a while, when idle tracking is enabled.
+IDLE_UPDATE_FREQUENCY = 60
+# Interval (in seconds) between two probes of the event loop scheduling lag.
+LOOP_MONITOR_INTERVAL = 0.5
+# Event loop work (or scheduling lag) beyond this many seconds is reported, naming what blocked the loop.
+SLOW_CALLBACK_THRESHOLD = 0.1
+# Minimum interval (in seconds) between two slow callback warnings. Slow callbacks in between are counted.
+SLOW_CALLBACK_WARNING_INTERVAL = 60
+# Interval (in seconds) between two reports of the agent's statistics (loop lag, idle updaters, update intervals...).
+STATS_REPORT_INTERVAL = 300
+# Upper bounds (in seconds) of the latency histogram buckets. A last bucket counts the samples beyond them.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
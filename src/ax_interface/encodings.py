@@ -5,7 +5,7 @@
 import struct
 from collections import namedtuple
 
-from . import constants, util
+from . import codec, constants, util
 
 
 class ObjectIdentifier(
@@ -43,14 +43,25 @@ class ObjectIdentifier(
 
     @property
     def size(self):
-        return 4 + 4 * self.n_subid
+        return 4 + 4 * len(self.subids)
 
     def to_tuple(self):
         return self.prefix + self.subids
 
     def to_bytes(self, endianness):
-        format_string = endianness + 'BBBB' + str(len(self.subids)) + 'L'
-        return struct.pack(format_string, self.n_subid, self.prefix_, self.include, self.reserved, *self.subids)
+        oid_codec = codec.oid(endianness, len(self.subids))
+        return oid_codec.pack(self.n_subid, self.prefix_, self.include, self.reserved, *self.subids)
+
+    def encode_into(self, buf, offset, endianness):
+        """
+        :param buf: writable buffer (e.g. bytearray) with at least self.size bytes available at offset
+        :param offset: index at which to write the OID
+        :param endianness: '!' or '<' (big/little endian)
+        :return: the index following the encoded OID
+        """
+        oid_codec = codec.oid(endianness, len(self.subids))
+        oid_codec.pack_into(buf, offset, self.n_subid, self.prefix_, self.include, self.reserved, *self.subids)
+        return offset + oid_codec.size
 
     def inc(self):
         """
@@ -73,6 +84,15 @@ class ObjectIdentifier(
 
     @classmethod
     def from_bytes(cls, byte_string, endianness):
+        """
+        :param byte_string: string to unpack
+        :param endianness: '!' or '<' (big/little endian)
+        :return: n-oids, does not modify the original buffer
+        """
+        return cls.from_buffer(byte_string, 0, endianness)[0]
+
+    @classmethod
+    def from_buffer(cls, buf, offset, endianness):
         """
         +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
         |  n_subid      |  prefix       |    include    |  <reserved>   |
@@ -84,17 +104,18 @@ class ObjectIdentifier(
         |             subidentifier #n_subid                            |
         +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
 
-        :param byte_string: string to unpack
+        :param buf: bytes-like object to unpack from (bytes, bytearray or memoryview)
+        :param offset: index of the first byte of the OID within buf
         :param endianness: '!' or '<' (big/little endian)
-        :return: n-oids, does not modify the original buffer and the index following the end of the OID
+        :return: n-oids and the index following the end of the OID. Does not copy or modify the buffer.
         """
-        oid_attributes = (n_subid, prefix, _, reserved) = struct.unpack(endianness + 'BBBB', byte_string[:4])
-        start_offset = 4
-        end_offset = start_offset + n_subid * 4
-        subids = struct.unpack(endianness + n_subid * 'L', byte_string[start_offset:end_offset])
+        oid_attributes = codec.oid_header(endianness).unpack_from(buf, offset)
+        n_subid = oid_attributes[0]
+        offset += 4
+        subids = codec.subids(endianness, n_subid).unpack_from(buf, offset)
 
         # oid = (n_subid, prefix, _, reserved, (subid1, subid2, ...))
-        return cls(*oid_attributes, subids)
+        return cls(*oid_attributes, subids), offset + n_subid * 4
 
 
 class SearchRange(namedtuple('_SearchRange', ('start', 'end'))):
@@ -122,14 +143,22 @@ class SearchRange(namedtuple('_SearchRange', ('start', 'end'))):
     def to_bytes(self, endianness):
         return self.start.to_bytes(endianness) + self.end.to_bytes(endianness)
 
+    def encode_into(self, buf, offset, endianness):
+        offset = self.start.encode_into(buf, offset, endianness)
+        return self.end.encode_into(buf, offset, endianness)
+
     @classmethod
     def from_bytes(cls, byte_string, endianness):
+        return cls.from_buffer(byte_string, 0, endianness)[0]
+
+    @classmethod
+    def from_buffer(cls, buf, offset, endianness):
         # unpack the first OID
-        start = ObjectIdentifier.from_bytes(byte_string, endianness)
+        start, offset = ObjectIdentifier.from_buffer(buf, offset, endianness)
         # unpack the second OID (resume at the end of the first)
-        end = ObjectIdentifier.from_bytes(byte_string[start.size:], endianness)
+        end, offset = ObjectIdentifier.from_buffer(buf, offset, endianness)
         # compose our SearchRange tuple
-        return cls(start, end)
+        return cls(start, end), offset
 
 
 class OctetString(namedtuple('_OctetString', ('length', 'string', 'padding'))):
@@ -154,11 +183,29 @@ class OctetString(namedtuple('_OctetString', ('length', 'string', 'padding'))):
         return cls(length, _string, util.pad4bytes(len(_string)))
 
     def to_bytes(self, endianness):
-        fmt = endianness + 'L{}s{}s'.format(self.length, util.pad4(self.length))
-        return struct.pack(fmt, self.length, self.string, self.padding)
+        return codec.uint32(endianness).pack(self.length) + self.string + self.padding
+
+    def encode_into(self, buf, offset, endianness):
+        if len(self.string) != self.length:
+            raise ValueError("Octet String length [{}] does not match its contents".format(self.length))
+        codec.uint32(endianness).pack_into(buf, offset, self.length)
+        offset += 4
+        # slice assignment would silently resize a bytearray; write through a view to keep the length fixed.
+        end_offset = offset + self.length + len(self.padding)
+        memoryview(buf)[offset:end_offset] = self.string + self.padding
+        return end_offset
 
     @classmethod
     def from_bytes(cls, byte_string, endianness):
+        """
+        :param byte_string: string to unpack.
+        :param endianness: '!' or '<' (big/little endian)
+        :return: octet string tuple. does not modify the original buffer.
+        """
+        return cls.from_buffer(byte_string, 0, endianness)[0]
+
+    @classmethod
+    def from_buffer(cls, buf, offset, endianness):
         """
         +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
         |                     Octet String Length (L)                   |
@@ -169,23 +216,25 @@ class OctetString(namedtuple('_OctetString', ('length', 'string', 'padding'))):
         |  Octet L - 1  |  Octet L      |       Padding (as required)   |
         +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
 
-        :param byte_string: string to unpack.
+        :param buf: bytes-like object to unpack from (bytes, bytearray or memoryview)
+        :param offset: index of the length field within buf
         :param endianness: '!' or '<' (big/little endian)
         :return: octet string tuple, new offset. does not modify the original buffer.
         """
-        # read the length string
-        string_length_bytes = byte_string[:4]
         # look ahead to the length value
-        string_length = struct.unpack(endianness + 'L', string_length_bytes)[0]
+        string_length = codec.uint32(endianness).unpack_from(buf, offset)[0]
         # strings are padded to 4 bytes.
         padding_length = util.pad4(string_length)
 
-        # E.g. !L101s3s -> (length[long], string, padding[string])
-        fmt = '{}L{}s{}s'.format(endianness, string_length, padding_length)
-        # calculate offset
-        size = struct.calcsize(fmt)
-        # format the context string
-        return cls(*struct.unpack(fmt, byte_string[:size]))
+        string_offset = offset + 4
+        padding_offset = string_offset + string_length
+        end_offset = padding_offset + padding_length
+        if len(buf) < end_offset:
+            raise struct.error("Octet String requires a buffer of at least {} bytes".format(end_offset - offset))
+
+        string = bytes(buf[string_offset:padding_offset])
+        padding = bytes(buf[padding_offset:end_offset])
+        return cls(string_length, string, padding), end_offset
 
 
 class ValueRepresentation(namedtuple('_ValueRepresentation', ('type_', 'reserved', 'name', 'data'))):
@@ -226,18 +275,7 @@ class ValueRepresentation(namedtuple('_ValueRepresentation', ('type_', 'reserved
 
     @property
     def size(self):
-        size = 4 + self.name.size
-        typed_bind = constants.ValueType(self.type_)
-        if typed_bind in self.FOUR_BYTE_TYPES:
-            size += 4
-        elif typed_bind == constants.ValueType.COUNTER_64:
-            size += 8
-        elif typed_bind == constants.ValueType.OBJECT_IDENTIFIER or typed_bind in self.OCTET_STRINGS:
-            size += self.data.size
-        elif typed_bind in self.EMPTY_TYPES:
-            # _size += 0
-            pass
-        return size
+        return 4 + self.name.size + _data_codec(self.type_).size(self.data)
 
     @classmethod
     def from_typecast(cls, type_, oid_iter_or_obj, data):
@@ -255,7 +293,7 @@ class ValueRepresentation(namedtuple('_ValueRepresentation', ('type_', 'reserved
         return cls(type_, 0, oid, _data)
 
     @classmethod
-    def _unpack_data(cls, type_, byte_string, endianness):
+    def _unpack_data(cls, type_, buf, offset, endianness):
         """
         -  Integer, Counter32, Gauge32, and TimeTicks are encoded as 4
         contiguous bytes, according to the header's
@@ -283,48 +321,39 @@ class ValueRepresentation(namedtuple('_ValueRepresentation', ('type_', 'reserved
         in these cases.
 
         :param type_: type integer
-        :param byte_string:  byte stream
+        :param buf: byte stream
+        :param offset: index of the value data within buf
+        :return: the value data and the index following it
         """
-        typed_bind = constants.ValueType(type_)
-        if typed_bind in cls.FOUR_BYTE_TYPES:
-            data = struct.unpack(endianness + 'L', byte_string[:4])[0]
-            size = 4
-        elif typed_bind == constants.ValueType.COUNTER_64:
-            data = struct.unpack(endianness + 'Q', byte_string[:8])[0]
-            size = 8
-        elif typed_bind == constants.ValueType.OBJECT_IDENTIFIER:
-            data = ObjectIdentifier.from_bytes(byte_string, endianness)
-            size = data.size
-        elif typed_bind in cls.OCTET_STRINGS:
-            data = OctetString.from_bytes(byte_string, endianness)
-            size = data.size
-        elif typed_bind in cls.EMPTY_TYPES:
-            data = None
-            size = 0
-        else:
-            raise ValueError("Unknown bound type.")
-
-        return data, size
+        return _data_codec(type_).unpack(buf, offset, endianness)
 
     def to_bytes(self, endianness):
-        fmt = endianness + 'HH'
-        byte_string = struct.pack(fmt, self.type_, self.reserved)
-        byte_string += self.name.to_bytes(endianness)
-
-        typed_bind = constants.ValueType(self.type_)
-        if typed_bind in self.FOUR_BYTE_TYPES:
-            byte_string += struct.pack(endianness + 'L', self.data & 0x00000000ffffffff)
-        elif typed_bind == constants.ValueType.COUNTER_64:
-            byte_string += struct.pack(endianness + 'Q', self.data & 0xffffffffffffffff)
-        elif typed_bind == constants.ValueType.OBJECT_IDENTIFIER or typed_bind in self.OCTET_STRINGS:
-            byte_string += self.data.to_bytes(endianness)
-        elif typed_bind in self.EMPTY_TYPES:
-            # ret += b''
-            pass
-        return byte_string
+        buf = bytearray(self.size)
+        self.encode_into(buf, 0, endianness)
+        return bytes(buf)
+
+    def encode_into(self, buf, offset, endianness):
+        """
+        :param buf: writable buffer (e.g. bytearray) with at least self.size bytes available at offset
+        :param offset: index at which to write the VarBind
+        :param endianness: big/little endian format specifier.
+        :return: the index following the encoded VarBind
+        """
+        codec.varbind_header(endianness).pack_into(buf, offset, self.type_, self.reserved)
+        offset = self.name.encode_into(buf, offset + 4, endianness)
+        return _data_codec(self.type_).pack_into(buf, offset, self.data, endianness)
 
     @classmethod
     def from_bytes(cls, byte_string, endianness):
+        """
+        :param byte_string: Stream of bytes from which to unpack the VR
+        :param endianness: big/little endian format specifier.
+        :return: an instance of ValueRepresentation.
+        """
+        return cls.from_buffer(byte_string, 0, endianness)[0]
+
+    @classmethod
+    def from_buffer(cls, buf, offset, endianness):
         """
         VarBind
 
@@ -350,13 +379,70 @@ class ValueRepresentation(namedtuple('_ValueRepresentation', ('type_', 'reserved
         |                       data                                    |
         +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
 
-        :param byte_string: Stream of bytes from which to unpack the VR
+        :param buf: bytes-like object from which to unpack the VR
+        :param offset: index of the VarBind within buf
         :param endianness: big/little endian format specifier.
-        :return: an instance of ValueRepresentation.
+        :return: an instance of ValueRepresentation and the index following it.
         """
-        type_, reserved = struct.unpack(endianness + 'HH', byte_string[:4])
-        name = ObjectIdentifier.from_bytes(byte_string[4:], endianness)
-        offset = 4 + name.size
-        data, offset = cls._unpack_data(type_, byte_string[offset:], endianness)
+        type_, reserved = codec.varbind_header(endianness).unpack_from(buf, offset)
+        name, offset = ObjectIdentifier.from_buffer(buf, offset + 4, endianness)
+        data, offset = cls._unpack_data(type_, buf, offset, endianness)
         vr = cls(constants.ValueType(type_), reserved, name, data)
-        return vr
+        return vr, offset
+
+
+class _DataCodec(namedtuple('_DataCodec', ('size', 'pack_into', 'unpack'))):
+    """
+    Encoding of the v.data field for one group of value types. See ValueRepresentation._unpack_data.
+
+    size(data) -> number of bytes
+    pack_into(buf, offset, data, endianness) -> new offset
+    unpack(buf, offset, endianness) -> (data, new offset)
+    """
+    __slots__ = ()
+
+
+def _pack_integer_into(get_codec, mask, width):
+    def pack_into(buf, offset, data, endianness):
+        get_codec(endianness).pack_into(buf, offset, data & mask)
+        return offset + width
+
+    return pack_into
+
+
+def _integer_codec(width, get_codec):
+    mask = (1 << (8 * width)) - 1
+    return _DataCodec(
+        size=lambda data: width,
+        pack_into=_pack_integer_into(get_codec, mask, width),
+        unpack=lambda buf, offset, endianness: (get_codec(endianness).unpack_from(buf, offset)[0], offset + width),
+    )
+
+
+def _encoding_codec(encoding_cls):
+    return _DataCodec(
+        size=lambda data: data.size,
+        pack_into=lambda buf, offset, data, endianness: data.encode_into(buf, offset, endianness),
+        unpack=encoding_cls.from_buffer,
+    )
+
+
+_FOUR_BYTE_CODEC = _integer_codec(4, codec.uint32)
+_EMPTY_CODEC = _DataCodec(
+    size=lambda data: 0,
+    pack_into=lambda buf, offset, data, endianness: offset,
+    unpack=lambda buf, offset, endianness: (None, offset),
+)
+
+_DATA_CODECS = {type_: _FOUR_BYTE_CODEC for type_ in ValueRepresentation.FOUR_BYTE_TYPES}
+_DATA_CODECS.update({type_: _encoding_codec(OctetString) for type_ in ValueRepresentation.OCTET_STRINGS})
+_DATA_CODECS.update({type_: _EMPTY_CODEC for type_ in ValueRepresentation.EMPTY_TYPES})
+_DATA_CODECS[constants.ValueType.COUNTER_64] = _integer_codec(8, codec.uint64)
+_DATA_CODECS[constants.ValueType.OBJECT_IDENTIFIER] = _encoding_codec(ObjectIdentifier)
+
+
+def _data_codec(type_):
+    try:
+        return _DATA_CODECS[type_]
+    except KeyError:
+        raise ValueError("Unknown bound type.")
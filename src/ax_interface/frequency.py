@@ -0,0 +1,161 @@
+"""
+Adaptive update intervals for MIB updaters (enable_dynamic_frequency).
+
+The controller keeps an exponentially weighted moving average (EWMA) of each updater's execution time on the event loop,
+of the event loop lag and of the system CPU load. It sets the update intervals so that the updaters together keep the
+event loop busy for at most a fraction (the duty budget) of the time: cheap updaters keep their configured interval, the
+most expensive ones are slowed down first. The budget shrinks as the loop lags or the CPUs get loaded. An interval only
+changes when its target moves away by more than HYSTERESIS, so that a single slow run does not make it jump back and
+forth.
+"""
+
+import os
+import time
+
+from .constants import MAX_UPDATE_INTERVAL
+
+"""
+Fraction of the time the updaters may keep the event loop busy.
+"""
+DEFAULT_UPDATE_DUTY_BUDGET = 0.1
+
+"""
+Weight of the latest sample in the moving averages.
+"""
+EWMA_ALPHA = 0.3
+
+"""
+Relative change of the target interval needed to change an updater's interval.
+"""
+HYSTERESIS = 0.25
+
+"""
+Event loop lag (in seconds) and CPU load (load average per CPU) beyond which the duty budget shrinks in proportion, at
+most MAX_PRESSURE times.
+"""
+LOOP_LAG_TARGET = 0.05
+CPU_LOAD_TARGET = 0.8
+MAX_PRESSURE = 4
+
+"""
+Minimum interval (in seconds) between two samples of the system load average.
+"""
+CPU_LOAD_SAMPLE_INTERVAL = 5
+
+
+def ewma(average, sample, alpha=EWMA_ALPHA):
+    """
+    >>> ewma(None, 2.0)
+    2.0
+    >>> ewma(1.0, 2.0, 0.5)
+    1.5
+    """
+    if average is None:
+        return sample
+    return alpha * sample + (1 - alpha) * average
+
+
+def duty_cap(duties, budget):
+    """
+    The largest per-updater duty such that capping every duty at it keeps the total within the budget.
+
+    >>> duty_cap([0.01, 0.02], 0.1)
+    inf
+    >>> duty_cap([0.1, 0.5, 1.0], 0.5)
+    0.2
+
+    :param duties: duty of each updater at its configured interval (execution time / interval)
+    :param budget: total duty allowed
+    """
+    remaining = budget
+    duties = sorted(duties)
+    for index, duty in enumerate(duties):
+        left = len(duties) - index
+        if duty * left > remaining:
+            return remaining / left
+        remaining -= duty
+    return float('inf')
+
+
+class FrequencyController:
+    def __init__(self, duty_budget=DEFAULT_UPDATE_DUTY_BUDGET):
+        self.duty_budget = duty_budget
+        # updater -> EWMA of its execution time (in seconds)
+        self.execution_times = {}
+        # updater -> interval currently applied (in seconds)
+        self.intervals = {}
+        self.loop_lag = None
+        self.cpu_load = None
+        self._cpu_load_time = None
+
+    def observe_loop_lag(self, lag):
+        """
+        :param lag: how late (in seconds) the event loop ran a timer callback
+        """
+        self.loop_lag = ewma(self.loop_lag, max(lag, 0))
+
+    def _sample_cpu_load(self):
+        now = time.monotonic()
+        if self._cpu_load_time is not None and now - self._cpu_load_time < CPU_LOAD_SAMPLE_INTERVAL:
+            return
+        self._cpu_load_time = now
+        try:
+            load = os.getloadavg()[0] / (os.cpu_count() or 1)
+        except OSError:
+            return
+        self.cpu_load = ewma(self.cpu_load, load)
+
+    @property
+    def pressure(self):
+        """
+        :return: how many times the duty budget is shrunk, from 1 to MAX_PRESSURE
+        """
+        pressure = 1
+        if self.loop_lag is not None:
+            pressure = max(pressure, self.loop_lag / LOOP_LAG_TARGET)
+        if self.cpu_load is not None:
+            pressure = max(pressure, self.cpu_load / CPU_LOAD_TARGET)
+        return min(pressure, MAX_PRESSURE)
+
+    def next_interval(self, updater, execution_time):
+        """
+        :param updater: MIBUpdater that just ran an update cycle
+        :param execution_time: time the cycle kept the event loop busy (in seconds). Work done in the update
+            executor does not count.
+        :return: the interval before the updater's next cycle (in seconds), never below updater.frequency
+        """
+        self._sample_cpu_load()
+        self.execution_times[updater] = ewma(self.execution_times.get(updater), execution_time)
+
+        cap = duty_cap((average / u.frequency for u, average in self.execution_times.items()),
+                       self.duty_budget / self.pressure)
+        target = updater.frequency
+        if cap > 0:
+            target = max(target, self.execution_times[updater] / cap)
+        else:
+            target = MAX_UPDATE_INTERVAL
+        target = max(min(target, MAX_UPDATE_INTERVAL), updater.frequency)
+
+        interval = self.intervals.get(updater, updater.frequency)
+        if abs(target - interval) > HYSTERESIS * interval or interval < updater.frequency:
+            interval = target
+        self.intervals[updater] = interval
+        return interval
+
+    def stats(self):
+        """
+        :return: {'loop_lag': seconds, 'cpu_load': load average per CPU, 'pressure': budget divisor,
+            'updaters': {updater class name: {'execution_time': seconds, 'interval': seconds}}}
+        """
+        return {
+            'loop_lag': self.loop_lag,
+            'cpu_load': self.cpu_load,
+            'pressure': self.pressure,
+            'updaters': {
+                type(updater).__name__: {
+                    'execution_time': average,
+                    'interval': self.intervals.get(updater),
+                }
+                for updater, average in self.execution_times.items()
+            },
+        }
@@ -1,12 +1,20 @@
 import asyncio
 import bisect
-import random
-from datetime import datetime
+import contextlib
+import copy
+import shutil
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from . import logger, util
 from .constants import ValueType
 from .encodings import ValueRepresentation
-from .util import get_next_update_interval
+from .frequency import DEFAULT_UPDATE_DUTY_BUDGET, FrequencyController
+from .scheduler import AccessTracker, UpdaterScheduler
+from .trie import OidTrie
+from .updater_process import UpdaterProcess, make_snapshot_dir
+from .util import get_jittered_interval, get_next_update_interval
 
 """
 Update interval between update runs (in seconds).
@@ -23,79 +31,252 @@ Disable dynamic frequency by default
 """
 DEFAULT_ENABLE_DYNAMIC_FREQUENCY = False
 
+"""
+Number of GetNext continuations remembered per AgentX session.
+"""
+GETNEXT_CONTINUATIONS_PER_SESSION = 32
+
+
+def get_next_in_sorted(sorted_sub_ids, sub_id, hint=None):
+    """
+    Successor of 'sub_id' within an updater's sorted list of sub-identifiers. Updaters use this to implement
+    get_next_hinted().
+
+    The hint returned along with a sub-identifier records the list and the position it was found at. When it is passed
+    back with that same sub-identifier, the successor is found without searching. A hint for a list that has since been
+    replaced (e.g. rebuilt by update_data) or modified at that position is ignored.
+
+    :param sorted_sub_ids: sub-identifiers in ascending order
+    :param sub_id: the sub-identifier to find the successor of
+    :param hint: the hint returned along with 'sub_id', if any
+    :return: the next sub-identifier (or None) and a hint for it
+    """
+    right = None
+    if hint is not None and hint[0] is sorted_sub_ids and hint[1] < len(sorted_sub_ids) \
+            and sorted_sub_ids[hint[1]] == sub_id:
+        right = hint[1] + 1
+        if right < len(sorted_sub_ids) and sorted_sub_ids[right] == sub_id:
+            # duplicate sub-identifiers, let bisect skip them
+            right = None
+    if right is None:
+        right = bisect.bisect_right(sorted_sub_ids, sub_id)
+    if right >= len(sorted_sub_ids):
+        return None, None
+    return sorted_sub_ids[right], (sorted_sub_ids, right)
+
 
 class MIBUpdater:
     """
     Interface for developing OID handlers that require persistent (or background) execution.
     """
 
+    """
+    Whether update cycles may run in a worker thread (see update_in_executor). Children opt in when reinit_data and
+    update_data only rebind the updater's attributes or modify its top-level containers, never objects shared beyond
+    them.
+    """
+    offload_update = False
+
+    """
+    Whether update cycles may run in a child process (see updater_process). Children opt in when their data attributes
+    are picklable and reinit_data reconnects the database connections it uses.
+    """
+    process_update = False
+
+    """
+    Built-in update interval and reinit interval of the updater (in seconds), overridden by the updater settings (see
+    MIBTable.configure_updaters). With no default interval, the updater refreshes at the agent's update frequency. A
+    default interval never makes the updater refresh more often than the agent's update frequency.
+    """
+    default_frequency = None
+    default_reinit_interval = None
+
     def __init__(self):
         self.run_event = asyncio.Event()
         self.frequency = DEFAULT_UPDATE_FREQUENCY
         self.enable_dynamic_frequency = DEFAULT_ENABLE_DYNAMIC_FREQUENCY
         self.reinit_rate = DEFAULT_REINIT_RATE // DEFAULT_UPDATE_FREQUENCY
         self.update_counter = self.reinit_rate + 1  # reinit_data when init
+        # set by MIBTable when update cycles run in a worker thread pool
+        self.executor = None
+        # reconnect on the next reinit
+        self.redis_exception_happen = False
+        # set by MIBTable with enable_dynamic_frequency
+        self.frequency_controller = None
+        # set by MIBTable from the Agent, times the update work done on the event loop
+        self.loop_monitor = None
+        # set by the UpdaterScheduler, called with the event loop CPU time (in seconds) of each slice of update work
+        self.on_loop_time = None
+        # time (in seconds) the current update cycle kept the event loop busy, see timed()
+        self.cycle_loop_time = 0.0
 
     async def start(self):
         # Run the update while we are allowed
-        redis_exception_happen = False
         while self.run_event.is_set():
-            start = datetime.now()
-            try:
-                # reinit internal structures
-                if self.update_counter > self.reinit_rate:
-                    # reconnect when redis exception happen
-                    if redis_exception_happen:
-                        self.reinit_connection()
-
-                    self.reinit_data()
-                    self.update_counter = 0
-                else:
-                    self.update_counter += 1
+            next_frequency = await self.run_cycle()
 
-                # run the background update task
-                self.update_data()
-                redis_exception_happen = False
-            except RuntimeError:
-                # Any unexpected exception or error, log it and keep running
-                logger.exception("MIBUpdater.start() caught a RuntimeError during update_data(), will reinitialize the connections")
-                # When redis server restart, swsscommon will throw swsscommon.RedisError, redis connection need re-initialize in reinit_data()
-                # TODO: change to swsscommon.RedisError
-                redis_exception_happen = True
-            except Exception:
-                # Any unexpected exception or error, log it and keep running
-                logger.exception("MIBUpdater.start() caught an unexpected exception during update_data()")
-
-            if self.enable_dynamic_frequency:
-                """
-                On SONiC device with huge interfaces
-                  for example RP card on ethernet chassis, including backend ports, 600+ interfaces
-                The update_data function could be very slow, especially when 100% CPU utilization.
-                  for example ciscoSwitchQosMIB.QueueStatUpdater, uses 1-3 seconds on normal state.
-                                                                  uses 3-8 seconds on 100% CPU utilization state.
-                We use Asyncio/Coroutine as the basic framework,
-                  the mib updaters share the same asyncio event loop with the SNMP agent client.
-                  Hence during the updaters executing, the agent client can't receive/respond to new requests,
-
-                The high frequency and the long execution time
-                  causes the SNMP request to be timed out on High CPU utilization.
-                The stable frequency(generally with default value 5s)
-                  doesn't works well on this huge interfaces situation.
-                when the execution time is long,
-                  wait for longer time to give back the control of asyncio event loop to SNMP agent
-                """
-                execution_time = (datetime.now() - start).total_seconds()
+            # wait based on our update frequency before executing again.
+            # randomize to avoid concurrent update storms.
+            await asyncio.sleep(get_jittered_interval(next_frequency))
+
+    async def run_cycle(self):
+        """
+        A single update cycle, as run by start() or by the UpdaterScheduler. Exceptions are logged, not raised.
+
+        :return: the interval before the next cycle (in seconds)
+        """
+        self.cycle_loop_time = 0.0
+        try:
+            # reinit internal structures
+            reinit = self.update_counter > self.reinit_rate
+            if not reinit:
+                self.update_counter += 1
+
+            # run the background update task, reconnecting when redis exception happen
+            if self.executor is None:
+                await self.update_cooperatively(reinit, reinit and self.redis_exception_happen)
+            else:
+                await self.update_in_executor(reinit, reinit and self.redis_exception_happen)
+
+            if reinit:
+                self.update_counter = 0
+            self.redis_exception_happen = False
+        except RuntimeError:
+            # Any unexpected exception or error, log it and keep running
+            logger.exception("MIBUpdater.start() caught a RuntimeError during update_data(), will reinitialize the connections")
+            # When redis server restart, swsscommon will throw swsscommon.RedisError, redis connection need re-initialize in reinit_data()
+            # TODO: change to swsscommon.RedisError
+            self.redis_exception_happen = True
+        except Exception:
+            # Any unexpected exception or error, log it and keep running
+            logger.exception("MIBUpdater.start() caught an unexpected exception during update_data()")
+
+        if self.enable_dynamic_frequency:
+            """
+            On SONiC device with huge interfaces
+              for example RP card on ethernet chassis, including backend ports, 600+ interfaces
+            The update_data function could be very slow, especially when 100% CPU utilization.
+              for example ciscoSwitchQosMIB.QueueStatUpdater, uses 1-3 seconds on normal state.
+                                                              uses 3-8 seconds on 100% CPU utilization state.
+            We use Asyncio/Coroutine as the basic framework,
+              the mib updaters share the same asyncio event loop with the SNMP agent client.
+              Hence during the updaters executing, the agent client can't receive/respond to new requests,
+
+            The high frequency and the long execution time
+              causes the SNMP request to be timed out on High CPU utilization.
+            The stable frequency(generally with default value 5s)
+              doesn't works well on this huge interfaces situation.
+            when the execution time is long,
+              wait for longer time to give back the control of asyncio event loop to SNMP agent
+
+            Only the time the cycle kept the event loop busy counts: the slices of a cooperative cycle, or the publish
+            step of a cycle run in the executor.
+            """
+            execution_time = self.cycle_loop_time
+            if self.frequency_controller is not None:
+                next_frequency = self.frequency_controller.next_interval(self, execution_time)
+            else:
                 next_frequency = get_next_update_interval(execution_time, self.frequency)
 
-                if next_frequency > self.frequency:
-                    logger.debug(f"MIBUpdater type[{type(self)}] slow update detected, "
-                                 f"update execution time[{execution_time}], next_frequency[{next_frequency}]")
+            if next_frequency > self.frequency:
+                logger.debug(f"MIBUpdater type[{type(self)}] slow update detected, "
+                             f"update execution time[{execution_time}], next_frequency[{next_frequency}]")
+        else:
+            next_frequency = self.frequency
+
+        return next_frequency
+
+    def set_intervals(self, frequency, reinit_interval=None):
+        """
+        :param frequency: update interval (in seconds)
+        :param reinit_interval: interval between reinit runs (in seconds), None for the default number of update
+            cycles between them
+        """
+        self.frequency = frequency
+        if reinit_interval is None:
+            self.reinit_rate = DEFAULT_REINIT_RATE // DEFAULT_UPDATE_FREQUENCY
+        else:
+            self.reinit_rate = int(reinit_interval // frequency)
+
+    def update(self, reinit=False, reconnect=False):
+        """
+        A single update cycle.
+
+        :param reinit: reinit internal structures before updating
+        :param reconnect: reinit connections before anything else
+        """
+        if reconnect:
+            self.reinit_connection()
+        if reinit:
+            self.reinit_data()
+        self.update_data()
+
+    async def update_cooperatively(self, reinit=False, reconnect=False):
+        """
+        A single update cycle on the event loop. When the updater implements update_data_chunks, pending requests are
+        served between its slices.
+        """
+        if not self.chunked_update:
+            with self.timed():
+                self.update(reinit, reconnect)
+            return
+        with self.timed():
+            if reconnect:
+                self.reinit_connection()
+            if reinit:
+                self.reinit_data()
+        chunks = iter(self.update_data_chunks())
+        while True:
+            with self.timed():
+                chunk = next(chunks, StopIteration)
+            if chunk is StopIteration:
+                break
+            await asyncio.sleep(0)
+
+    @contextlib.contextmanager
+    def timed(self):
+        """
+        Context manager for a slice of update work running on the event loop: the time spent in it is attributed to
+        this updater by the loop monitor, if any, and charged to the scheduler, if any. It counts towards the loop time
+        of the current update cycle as well.
+        """
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            if self.loop_monitor is None:
+                yield
             else:
-                next_frequency = self.frequency
+                with self.loop_monitor.blocking('updater', type(self).__name__):
+                    yield
+        finally:
+            self.cycle_loop_time += time.perf_counter() - start
+            if self.on_loop_time is not None:
+                self.on_loop_time(time.thread_time() - cpu_start)
+
+    async def update_in_executor(self, reinit=False, reconnect=False):
+        """
+        Run an update cycle in self.executor, off the event loop.
 
-            # wait based on our update frequency before executing again.
-            # randomize to avoid concurrent update storms.
-            await asyncio.sleep(next_frequency + random.randint(-2, 2))
+        The cycle works on a private copy of the updater whose top-level containers are copied as well, so request
+        handlers keep reading the previous state while the next one is built. Once the cycle completes, the attributes
+        it rebound are published back to the updater on the event loop in a single step: handlers never observe a
+        half-updated state. If the cycle fails, nothing is published.
+        """
+        state = dict(self.__dict__)
+        shadow = await asyncio.get_event_loop().run_in_executor(self.executor, self._update_copy, state, reinit,
+                                                                reconnect)
+        # attributes changed on the event loop meanwhile (e.g. the frequency) are left alone.
+        with self.timed():
+            self.__dict__.update((name, value) for name, value in vars(shadow).items()
+                                 if name not in state or state[name] is not value)
+
+    def _update_copy(self, state, reinit, reconnect):
+        shadow = copy.copy(self)
+        for name, value in state.items():
+            if isinstance(value, (dict, list, set)):
+                setattr(shadow, name, copy.copy(value))
+        shadow.update(reinit, reconnect)
+        return shadow
 
     def reinit_data(self):
         """
@@ -111,15 +292,63 @@ class MIBUpdater:
 
     def update_data(self):
         """
-        Background task. Children must override this method.
+        Background task. Children must override this method, or update_data_chunks.
+        """
+        if not self.chunked_update:
+            raise NotImplementedError()
+        for _ in self.update_data_chunks():
+            pass
+
+    def update_data_chunks(self):
+        """
+        Cooperative variant of update_data: a generator doing the update a bounded slice at a time, yielding in between
+        so that the event loop serves pending requests. The new data is to be bound to the updater's attributes only
+        once the full pass is done. Children may override this method instead of update_data.
         """
         raise NotImplementedError()
 
+    @property
+    def chunked_update(self):
+        return type(self).update_data_chunks is not MIBUpdater.update_data_chunks
+
+    def get_contexts(self):
+        """
+        Names of the non-default AgentX contexts this updater instantiates variables in. Children supporting contexts
+        override this method along with get_next_in_context().
+        """
+        return ()
+
+    def get_next_in_context(self, context, sub_id, hint=None):
+        """
+        Same as get_next_hinted(), restricted to the sub-identifiers instantiated within 'context'.
+
+        :return: the next sub-identifier (or None) and a hint for it
+        """
+        raise NotImplementedError()
+
+
+class ContextView:
+    """
+    Iterator over the sub-identifiers an updater instantiates within one non-default context. Takes the place of the
+    updater in the MIB entries of a ContextMIBTable.
+    """
+
+    def __init__(self, updater, context):
+        self.updater = updater
+        self.context = context
+
+    def get_next(self, sub_id):
+        return self.updater.get_next_in_context(self.context, sub_id)[0]
+
+    def get_next_hinted(self, sub_id, hint):
+        return self.updater.get_next_in_context(self.context, sub_id, hint)
+
 
 class MIBMeta(type):
     KEYSTORE = '__subids__'
     PREFIXES = '__subtrees__'
     UPDATERS = '__updaters__'
+    TRIE = '__subtree_trie__'
 
     def __new__(mcs, name, bases, attributes, prefix=None):
         cls = type.__new__(mcs, name, bases, attributes)
@@ -169,6 +398,8 @@ class MIBMeta(type):
         setattr(cls, MIBMeta.KEYSTORE, sub_ids)
         setattr(cls, MIBMeta.PREFIXES, prefixes)
         setattr(cls, MIBMeta.UPDATERS, updaters)
+        # index the subtrees for prefix and ordered lookups
+        setattr(cls, MIBMeta.TRIE, OidTrie(sub_ids.items()))
         # class construction complete.
         return cls
 
@@ -220,9 +451,31 @@ class MIBEntry:
     def get_next(self, sub_id):
         return None
 
+    def get_next_hinted(self, sub_id, hint):
+        """
+        Same as get_next, but may resume from a hint returned by a previous call (see get_next_in_sorted).
+
+        :return: the next sub-identifier (or None) and a hint for it
+        """
+        return self.get_next(sub_id), None
+
+    def for_context(self, context):
+        """
+        :param context: name of a non-default context
+        :return: the entry serving 'context', or None if the entry is only instantiated in the default context
+        """
+        return None
+
     def get_prefix(self):
         return getattr(self, MIBEntry.PREFIX)
 
+    def get_updater(self):
+        """
+        :return: the MIBUpdater whose data the entry serves, or None
+        """
+        updater = getattr(self._callable_, '__self__', None)
+        return updater if isinstance(updater, MIBUpdater) else None
+
 
 class SubtreeMIBEntry(MIBEntry):
     def __init__(self, subtree, iterator, value_type, callable_, *args):
@@ -259,6 +512,32 @@ class SubtreeMIBEntry(MIBEntry):
             logger.exception("SubtreeMIBEntry.get_next() caught an unexpected exception during iterator.get_next()")
             return None
 
+    def get_next_hinted(self, sub_id, hint):
+        if not hasattr(self.iterator, 'get_next_hinted'):
+            return self.get_next(sub_id), None
+        try:
+            return self.iterator.get_next_hinted(sub_id, hint)
+        except Exception:
+            # Any unexpected exception or error, log it and keep running
+            logger.exception("SubtreeMIBEntry.get_next_hinted() caught an unexpected exception during "
+                             "iterator.get_next_hinted()")
+            return None, None
+
+    def for_context(self, context):
+        if not isinstance(self.iterator, MIBUpdater) or context not in self.iterator.get_contexts():
+            return None
+        # values are still read from the updater, only the iteration is restricted to the context.
+        mib_entry = copy.copy(self)
+        mib_entry.iterator = ContextView(self.iterator, context)
+        return mib_entry
+
+    def get_updater(self):
+        if isinstance(self.iterator, MIBUpdater):
+            return self.iterator
+        if isinstance(self.iterator, ContextView):
+            return self.iterator.updater
+        return super().get_updater()
+
 
 # Define MIB entry (subtree) with a callable, which accepts a starndard OID tuple as a paramter
 class OidMIBEntry(MIBEntry):
@@ -305,6 +584,20 @@ class OverlayAdpaterMIBEntry(MIBEntry):
     def get_next(self, sub_id):
         return self.underlay_mibentry.get_next(sub_id)
 
+    def get_next_hinted(self, sub_id, hint):
+        return self.underlay_mibentry.get_next_hinted(sub_id, hint)
+
+    def for_context(self, context):
+        underlay_mibentry = self.underlay_mibentry.for_context(context)
+        if underlay_mibentry is None:
+            return None
+        mib_entry = copy.copy(self)
+        mib_entry.underlay_mibentry = underlay_mibentry
+        return mib_entry
+
+    def get_updater(self):
+        return self.underlay_mibentry.get_updater()
+
 
 class MIBTable(dict):
     """
@@ -313,14 +606,67 @@ class MIBTable(dict):
 
     def __init__(self, mib_cls,
                  enable_dynamic_frequency=DEFAULT_ENABLE_DYNAMIC_FREQUENCY,
-                 update_frequency=DEFAULT_UPDATE_FREQUENCY):
+                 update_frequency=DEFAULT_UPDATE_FREQUENCY,
+                 enable_context_registration=False,
+                 update_workers=0,
+                 process_updaters=False,
+                 idle_timeout=0,
+                 update_duty_budget=DEFAULT_UPDATE_DUTY_BUDGET,
+                 loop_monitor=None):
         if type(mib_cls) is not MIBMeta:
             raise ValueError("Supplied object is not a MIB class instance.")
         super().__init__(getattr(mib_cls, MIBMeta.KEYSTORE))
         self.enable_dynamic_frequency = enable_dynamic_frequency
         self.update_frequency = update_frequency
+        # with dynamic frequency, adapts the update intervals to keep the updaters' share of the event loop in budget.
+        self.frequency_controller = None
+        if enable_dynamic_frequency:
+            self.frequency_controller = FrequencyController(update_duty_budget)
+        # LoopMonitor timing the updaters and request handling, if any
+        self.loop_monitor = loop_monitor
         self.updater_instances = getattr(mib_cls, MIBMeta.UPDATERS)
         self.prefixes = getattr(mib_cls, MIBMeta.PREFIXES)
+        self.trie = getattr(mib_cls, MIBMeta.TRIE)
+        # session_id -> {OID returned by GetNext: where to resume a GetNext starting from it}
+        self._continuations = {}
+        # updaters supporting it run their update cycles in a pool of this many threads, 0 keeps them on the event loop.
+        self.update_workers = update_workers
+        self.update_executor = None
+        # updaters supporting it run their update cycles in a child process each, publishing snapshots of their data.
+        self.process_updaters = process_updaters
+        # updater -> UpdaterProcess
+        self.updater_processes = {}
+        # private directory of the updater processes' snapshots, created along with the first of them
+        self.snapshot_dir = None
+        # runs the update cycles of the updaters not running in a child process
+        self.scheduler = None
+        # updater class name -> {'interval': seconds, 'reinit_interval': seconds}, see configure_updaters
+        self.updater_settings = {}
+        # with an idle timeout, updaters whose subtrees nobody requests for that long refresh at a slow rate.
+        self.access_tracker = None
+        if idle_timeout:
+            self.access_tracker = AccessTracker(idle_timeout)
+            self._track_entries()
+
+        # context name -> ContextMIBTable. Each context's subtrees are registered in addition to the default context's.
+        self.contexts = {}
+        if enable_context_registration:
+            contexts = set()
+            for updater in self.updater_instances:
+                contexts.update(updater.get_contexts())
+            for context in sorted(contexts):
+                self.contexts[context] = ContextMIBTable(self, context)
+
+    def _track_entries(self):
+        for mib_entry in self.values():
+            self.access_tracker.register(mib_entry, mib_entry.get_updater())
+
+    def get_context(self, context):
+        """
+        :param context: OctetString naming a non-default context, as received in a PDU
+        :return: the MIBTable serving the context, or None if the context is not supported
+        """
+        return self.contexts.get(str(context))
 
     @staticmethod
     def _done_background_task_callback(fut):
@@ -332,26 +678,80 @@ class MIBTable(dict):
             logger.error(exstr)
 
     def start_background_tasks(self, event):
+        if self.update_workers and self.update_executor is None:
+            self.update_executor = ThreadPoolExecutor(max_workers=self.update_workers,
+                                                      thread_name_prefix='mib_updater')
         tasks = []
+        scheduled = []
+        self.configure_updaters(self.updater_settings)
         for updater in self.updater_instances:
-            updater.frequency = self.update_frequency
             updater.enable_dynamic_frequency = self.enable_dynamic_frequency
+            updater.frequency_controller = self.frequency_controller
+            updater.loop_monitor = self.loop_monitor
             updater.run_event = event
-            fut = asyncio.ensure_future(updater.start())
+            if updater.offload_update:
+                updater.executor = self.update_executor
+            if self.process_updaters and updater.process_update:
+                if self.snapshot_dir is None:
+                    self.snapshot_dir = make_snapshot_dir()
+                process = self.updater_processes.get(updater)
+                if process is None:
+                    process = self.updater_processes[updater] = UpdaterProcess(updater, self.snapshot_dir)
+                tasks.append(asyncio.ensure_future(process.run()))
+            else:
+                scheduled.append(updater)
+
+        self.scheduler = UpdaterScheduler(scheduled, event, access_tracker=self.access_tracker,
+                                          frequency_controller=self.frequency_controller)
+        tasks.append(asyncio.ensure_future(self.scheduler.run()))
+        for fut in tasks:
             fut.add_done_callback(MIBTable._done_background_task_callback)
-            tasks.append(fut)
         return asyncio.gather(*tasks)
 
-    def _find_parent_prefix(self, item):
-        oids = sorted(self.prefixes)
-        left_insert_index = bisect.bisect(oids, item)
-        preceding_oids = oids[:left_insert_index]
-        if not preceding_oids:
-            return None
-        if preceding_oids[-1] == item[: len(preceding_oids[-1])]:
-            return preceding_oids[-1]
-        else:
-            return None
+    def add_updater(self, updater):
+        """
+        Run 'updater' along with the updaters of the MIB, e.g. one serving no MIB entry. To be added before the
+        background tasks start.
+        """
+        self.updater_instances = self.updater_instances | {updater}
+
+    def configure_updaters(self, settings):
+        """
+        Set the update and reinit intervals of the updaters. Takes effect from their next update cycle.
+
+        :param settings: updater class name -> {'interval': seconds, 'reinit_interval': seconds}, both optional.
+            Updaters without settings fall back to their default intervals.
+        """
+        self.updater_settings = settings
+        for updater in self.updater_instances:
+            updater_settings = settings.get(type(updater).__name__, {})
+            frequency = updater_settings.get('interval')
+            if frequency is None:
+                frequency = max(updater.default_frequency or 0, self.update_frequency)
+            reinit_interval = updater_settings.get('reinit_interval', updater.default_reinit_interval)
+            updater.set_intervals(frequency, reinit_interval)
+            process = self.updater_processes.get(updater)
+            if process is not None:
+                process.set_intervals(frequency, updater.reinit_rate)
+
+    def stop_background_tasks(self):
+        """
+        Have the background tasks return, once their run event is cleared.
+        """
+        if self.scheduler is not None:
+            self.scheduler.stop()
+
+    def shutdown_background_tasks(self):
+        """
+        Release the update worker threads and the snapshot directory, once the background tasks have returned.
+        """
+        if self.update_executor is not None:
+            self.update_executor.shutdown(wait=False)
+            self.update_executor = None
+        if self.snapshot_dir is not None:
+            shutil.rmtree(self.snapshot_dir, ignore_errors=True)
+            self.snapshot_dir = None
+            self.updater_processes = {}
 
     def _get_value(self, mib_entry, oid_key):
         sub_id = mib_entry.get_sub_id(oid_key)
@@ -362,26 +762,15 @@ class MIBTable(dict):
         vr = ValueRepresentation.from_typecast(mib_entry.value_type, oid_key, oid_value)
         return vr
 
-    def _get_nextvalue(self, mib_entry, oid_key):
-        sub_id = mib_entry.get_sub_id(oid_key)
-        key1 = mib_entry.get_next(sub_id)
-        if key1 is None:
-            return None
-        val1 = mib_entry(key1)
-        if val1 is None:
-            return None
-        oid1 = mib_entry.replace_sub_id(oid_key, key1)
-        # OID found, call the OIDEntry
-        vr = ValueRepresentation.from_typecast(mib_entry.value_type, oid1, val1)
-        return vr
-
     def get(self, sr, d=None):
         oid_key = sr.start.to_tuple()
 
         # find the best match prefix, either a exact match or a parent prefix
-        prefix = self._find_parent_prefix(oid_key)
-        if prefix is not None:
-            parent_mib_entry = super().get(prefix)
+        match = self.trie.longest_prefix(oid_key)
+        if match is not None:
+            _, parent_mib_entry = match
+            if self.access_tracker is not None:
+                self.access_tracker.touch(parent_mib_entry)
             vr = self._get_value(parent_mib_entry, oid_key)
             if vr is not None:
                 return vr
@@ -399,57 +788,153 @@ class MIBTable(dict):
         )
         return vr
 
-    def get_next(self, sr):
-        start_key = sr.start.to_tuple()
-        end_key = sr.end.to_tuple()
-        oid_list = sorted(self.prefixes)
+    def _walk_entry(self, mib_entry, oid_key, sub_id, hint=None):
+        """
+        Yield the values following 'sub_id' within a single MIB entry. The cursor stays inside the entry: each step is
+        one call to mib_entry.get_next_hinted() (i.e. the updater), not a new search of the MIB.
 
-        # find the best match prefix, either a exact match or a parent prefix
-        prefix = self._find_parent_prefix(start_key)
-        if prefix is not None:
-            parent_mib_entry = super().get(prefix)
+        :return: generator of (ValueRepresentation, continuation) pairs, see _walk()
+        """
+        while True:
+            sub_id, hint = mib_entry.get_next_hinted(sub_id, hint)
+            if sub_id is None:
+                return
+            value = mib_entry(sub_id)
+            if value is None:
+                return
+            oid = mib_entry.replace_sub_id(oid_key, sub_id)
+            vr = ValueRepresentation.from_typecast(mib_entry.value_type, oid, value)
+            yield vr, (oid, mib_entry, sub_id, hint)
+
+    def _walk_entry_from_start(self, mib_entry, oid_key):
+        """
+        Yield the values of a single MIB entry, from its first sub_id on.
+
+        :return: generator of (ValueRepresentation, continuation) pairs, see _walk()
+        """
+        try:
+            key1 = next(iter(mib_entry))  # get the first sub_id from the mib_etnry
+        except StopIteration:
+            # handler returned None, which implies there's no data.
+            return
 
-            if sr.start.include:
+        val1 = mib_entry(key1)
+        if val1 is None:
+            logger.error('MIBTable.walk found an invalid key: {}+{}'.format(mib_entry.subtree, key1))
+            return
+
+        oid1 = mib_entry.replace_sub_id(oid_key, key1)
+
+        # found a concrete OID value--yield it and continue from it.
+        vr = ValueRepresentation.from_typecast(
+            mib_entry.value_type,
+            oid1,
+            val1
+        )
+        yield vr, (oid1, mib_entry, key1, None)
+        yield from self._walk_entry(mib_entry, oid_key, key1)
+
+    def _walk(self, start_key, include, end_key, continuation=None):
+        """
+        Each OID is served by the entry registered for its longest prefix: a nested registration takes over its
+        subtree from the enclosing entry. An entry is therefore walked up to the next registration, where the walk
+        either descends into the nested subtree or, once a nested subtree is exhausted, resumes the enclosing entry
+        after it.
+
+        :param start_key: starting OID (as tuple)
+        :param include: whether the starting OID itself is a candidate
+        :param end_key: ending OID (as tuple), or () for an unbounded walk
+        :param continuation: a continuation previously yielded for the variable named start_key
+        :return: generator of (ValueRepresentation, continuation) pairs. The continuation allows a later walk starting
+            from the variable to resume inside the same MIB entry.
+        """
+        # the registration the current entry is walked up to
+        bound = self.trie.first_after(start_key)
+        # subtree of a nested registration already walked, its OIDs are skipped in the enclosing entry.
+        shadowed = None
+
+        # find the best match prefix, either a exact match or a parent prefix
+        match = self.trie.longest_prefix(start_key)
+        if match is not None:
+            _, parent_mib_entry = match
+            if self.access_tracker is not None:
+                self.access_tracker.touch(parent_mib_entry)
+            sub_id = parent_mib_entry.get_sub_id(start_key)
+
+            if include:
                 vr = self._get_value(parent_mib_entry, start_key)
                 if vr is not None:
-                    return vr
+                    yield vr, (start_key, parent_mib_entry, sub_id, None)
 
-            vr = self._get_nextvalue(parent_mib_entry, start_key)
-            if vr is not None:
-                return vr
+            hint = None
+            if continuation is not None and continuation[1] is parent_mib_entry:
+                hint = continuation[3]
+            values = self._walk_entry(parent_mib_entry, start_key, sub_id, hint)
 
-        # return the index of an insertion point immediately following any duplicate value (thereby excluding it)
-        sorted_start_index = bisect.bisect_right(oid_list, start_key)
+        while True:
+            if match is not None:
+                oid_key, _ = match
+                for vr, next_continuation in values:
+                    oid = next_continuation[0]
+                    if bound is not None and oid >= bound[0]:
+                        # the next registration serves the OIDs from here on.
+                        break
+                    if shadowed is not None and oid[:len(shadowed)] == shadowed:
+                        continue
+                    yield vr, next_continuation
+                else:
+                    if bound is None or bound[0][:len(oid_key)] != oid_key:
+                        # no nested registration left: resume the enclosing entry after this subtree, if any.
+                        enclosing = self.trie.longest_prefix(oid_key[:-1])
+                        if enclosing is not None:
+                            _, mib_entry = enclosing
+                            match, shadowed = enclosing, oid_key
+                            values = self._walk_entry(mib_entry, oid_key, mib_entry.get_sub_id(oid_key))
+                            continue
+
+            # move on to the next registration, in lexicographic order.
+            if bound is None:
+                return
+            oid_key, mib_entry = match = bound
+            if end_key and oid_key >= end_key:
+                # the remaining subtrees fall outside of the search range.
+                return
+            if self.access_tracker is not None:
+                self.access_tracker.touch(mib_entry)
+            bound = self.trie.first_after(oid_key)
+            shadowed = None
+            values = self._walk_entry_from_start(mib_entry, oid_key)
+
+    def walk(self, sr):
+        """
+        Generate the variables following sr.start in lexicographic order, i.e. the results of repeated GetNext
+        operations, each starting from the previous result.
 
-        # slice our MIB by the insertion point.
-        remaining_oids = oid_list[sorted_start_index:]
+        As with GetNext, sr.end bounds the walk when moving from one MIB subtree to the next. A null end OID leaves the
+        walk unbounded.
 
-        while remaining_oids and remaining_oids[0] < end_key:
-            # we found at least one remaining oid and the first entry in the remaining oid list
-            # is less than our end value--it's a match.
-            oid_key = remaining_oids[0]
-            mib_entry = self[oid_key]
-            try:
-                key1 = next(iter(mib_entry))  # get the first sub_id from the mib_etnry
-            except StopIteration:
-                # handler returned None, which implies there's no data, keep walking.
-                remaining_oids = remaining_oids[1:]
-                continue
-
-            val1 = mib_entry(key1)
-            if val1 is None:
-                logger.error('MIBTable.get_next found an invalid key: {}+{}'.format(mib_entry.subtree, key1))
-                remaining_oids = remaining_oids[1:]
-                continue
-
-            oid1 = mib_entry.replace_sub_id(oid_key, key1)
-
-            # found a concrete OID value--return it.
-            vr = ValueRepresentation.from_typecast(
-                mib_entry.value_type,
-                oid1,
-                val1
-            )
+        :param sr: SearchRange to walk
+        :return: generator of ValueRepresentation
+        """
+        for vr, _ in self._walk(sr.start.to_tuple(), sr.start.include, sr.end.to_tuple()):
+            yield vr
+
+    def get_next(self, sr, session_id=None):
+        """
+        :param sr: SearchRange
+        :param session_id: AgentX session of the request. SNMP walks issue each GetNext from the OID returned by the
+            previous one; remembering where each result was found lets the next request of the session resume there.
+        :return: ValueRepresentation
+        """
+        start_key = sr.start.to_tuple()
+        continuations = self._continuations.get(session_id)
+        continuation = None
+        if continuations and not sr.start.include:
+            continuation = continuations.pop(start_key, None)
+
+        for vr, next_continuation in self._walk(start_key, sr.start.include, sr.end.to_tuple(), continuation):
+            if session_id is not None:
+                self._remember_continuation(session_id, next_continuation)
             return vr
 
         # exhausted all remaining OID options--we're at the end of the MIB view.
@@ -460,6 +945,23 @@ class MIBTable(dict):
             None,  # null value
         )
 
+    def _remember_continuation(self, session_id, continuation):
+        continuations = self._continuations.get(session_id)
+        if continuations is None:
+            continuations = self._continuations[session_id] = OrderedDict()
+        continuations[continuation[0]] = continuation
+        if len(continuations) > GETNEXT_CONTINUATIONS_PER_SESSION:
+            # forget the least recently returned OID
+            continuations.popitem(last=False)
+
+    def close_session(self, session_id):
+        """
+        Forget any state kept for an AgentX session.
+        """
+        self._continuations.pop(session_id, None)
+        for context_table in self.contexts.values():
+            context_table.close_session(session_id)
+
     def __setitem__(self, key, value):
         if not hasattr(value, '__iter__'):
             raise ValueError("Invalid key '{}'. All keys must be iterable types.".format(key))
@@ -474,3 +976,38 @@ class MIBTable(dict):
             and self.update_frequency == other.update_frequency
             and self.updater_instances == other.updater_instances
         )
+
+
+class ContextMIBTable(MIBTable):
+    """
+    The variables of a MIBTable instantiated within one non-default context. Entries iterate through the updaters'
+    per-context indices (see MIBUpdater.get_contexts); subtrees with nothing to offer in the context are left out.
+    """
+
+    def __init__(self, mib_table, context):
+        dict.__init__(self)
+        for oid_key, mib_entry in mib_table.items():
+            context_entry = mib_entry.for_context(context)
+            if context_entry is not None:
+                self[oid_key] = context_entry
+        self.context = context
+        self.enable_dynamic_frequency = mib_table.enable_dynamic_frequency
+        self.update_frequency = mib_table.update_frequency
+        self.frequency_controller = mib_table.frequency_controller
+        self.loop_monitor = mib_table.loop_monitor
+        # updaters run once, on behalf of the default context
+        self.updater_instances = set()
+        self.prefixes = [prefix for prefix in mib_table.prefixes if prefix in self]
+        self.trie = OidTrie(self.items())
+        self._continuations = {}
+        self.update_workers = 0
+        self.update_executor = None
+        self.process_updaters = False
+        self.updater_processes = {}
+        self.snapshot_dir = None
+        self.scheduler = None
+        self.updater_settings = {}
+        self.access_tracker = mib_table.access_tracker
+        if self.access_tracker is not None:
+            self._track_entries()
+        self.contexts = {}
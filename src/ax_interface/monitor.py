@@ -0,0 +1,151 @@
+"""
+Event loop lag monitor.
+
+A probe task sleeps for LOOP_MONITOR_INTERVAL at a time and measures how late it wakes up: the scheduling lag of the
+event loop. The work known to run on the event loop (update cycles or slices of them, and request handling) is timed
+through LoopMonitor.blocking() and attributed to the updater class or to the requested OID. Durations and lags go into
+histograms. Work running longer than SLOW_CALLBACK_THRESHOLD is logged with its culprit, at most once per
+SLOW_CALLBACK_WARNING_INTERVAL; so is a lag beyond the threshold that no timed work explains.
+"""
+
+import asyncio
+import bisect
+import contextlib
+import time
+
+from . import logger
+from .constants import LATENCY_BUCKETS, LOOP_MONITOR_INTERVAL, SLOW_CALLBACK_THRESHOLD, SLOW_CALLBACK_WARNING_INTERVAL
+
+"""
+Culprit of the lags no timed work explains: other callbacks, the garbage collector, or the process not being scheduled.
+"""
+UNATTRIBUTED = 'unattributed callbacks'
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        :param buckets: sorted upper bounds of the buckets (in seconds)
+        """
+        self.buckets = buckets
+        # counts[i]: samples up to buckets[i] (and above the previous bound). The last one counts the samples beyond.
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def stats(self):
+        """
+        :return: {'count': samples, 'total': seconds, 'max': seconds, 'buckets': {upper bound: samples}}
+        """
+        return {
+            'count': self.count,
+            'total': self.total,
+            'max': self.max,
+            'buckets': dict(zip(self.buckets + (float('inf'),), self.counts)),
+        }
+
+
+class LoopMonitor:
+    def __init__(self, interval=LOOP_MONITOR_INTERVAL, slow_threshold=SLOW_CALLBACK_THRESHOLD,
+                 warning_interval=SLOW_CALLBACK_WARNING_INTERVAL):
+        """
+        :param interval: seconds between two lag probes
+        :param slow_threshold: seconds of work or lag beyond which the culprit is reported
+        :param warning_interval: minimum seconds between two warnings
+        """
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.warning_interval = warning_interval
+        self.lag = Histogram()
+        # (kind, name) -> Histogram of durations. kind is 'updater' or 'request', name the updater class or PDU type.
+        self.durations = {}
+        # culprit -> number of times it ran beyond slow_threshold
+        self.slow_callbacks = {}
+        # lags beyond slow_threshold that no timed work explains
+        self.unattributed_lags = 0
+        # whether timed work ran beyond slow_threshold since the last probe
+        self._slow_since_probe = False
+        self._last_warning = None
+        self._suppressed_warnings = 0
+
+    @contextlib.contextmanager
+    def blocking(self, kind, name, culprit=None):
+        """
+        Time work running on the event loop.
+
+        :param kind: 'updater' or 'request'
+        :param name: what the duration histogram is kept for, e.g. the updater class or the PDU type name
+        :param culprit: callable returning a more specific name to report if the work is slow (e.g. the requested OID)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, name, time.perf_counter() - start, culprit)
+
+    def record(self, kind, name, duration, culprit=None):
+        histogram = self.durations.get((kind, name))
+        if histogram is None:
+            histogram = self.durations[(kind, name)] = Histogram()
+        histogram.observe(duration)
+        if duration <= self.slow_threshold:
+            return
+
+        culprit = '{} {}'.format(kind, culprit() if culprit is not None else name)
+        self.slow_callbacks[culprit] = self.slow_callbacks.get(culprit, 0) + 1
+        self._slow_since_probe = True
+        self._warn("[{}] blocked the event loop for {:.3f}s".format(culprit, duration))
+
+    def observe_lag(self, lag):
+        """
+        :param lag: how late (in seconds) the probe woke up
+        """
+        lag = max(lag, 0)
+        self.lag.observe(lag)
+        slow_since_probe, self._slow_since_probe = self._slow_since_probe, False
+        if lag <= self.slow_threshold or slow_since_probe:
+            # on time, or already reported with its culprit
+            return
+        self.unattributed_lags += 1
+        self._warn("Event loop lagged {:.3f}s behind, blocked by [{}]".format(lag, UNATTRIBUTED))
+
+    def _warn(self, message):
+        now = time.monotonic()
+        if self._last_warning is not None and now - self._last_warning < self.warning_interval:
+            self._suppressed_warnings += 1
+            return
+        if self._suppressed_warnings:
+            message += " ({} more since the last warning)".format(self._suppressed_warnings)
+        self._last_warning = now
+        self._suppressed_warnings = 0
+        logger.warning(message)
+
+    async def run(self, run_event):
+        """
+        Probe the event loop lag while the event is set.
+        """
+        loop = asyncio.get_event_loop()
+        while run_event.is_set():
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.observe_lag(loop.time() - expected)
+
+    def stats(self):
+        """
+        :return: {'lag': histogram stats, 'durations': {'<kind> <name>': histogram stats},
+            'slow_callbacks': {culprit: count}, 'unattributed_lags': count}
+        """
+        return {
+            'lag': self.lag.stats(),
+            'durations': {'{} {}'.format(kind, name): histogram.stats()
+                          for (kind, name), histogram in self.durations.items()},
+            'slow_callbacks': dict(self.slow_callbacks),
+            'unattributed_lags': self.unattributed_lags,
+        }
@@ -5,7 +5,7 @@ PDU object implementation per https://www.ietf.org/rfc/rfc2741.txt
 import struct
 from collections import namedtuple
 
-from . import constants, logger, exceptions
+from . import codec, constants, logger, exceptions
 from .constants import PduTypes
 from .encodings import OctetString
 
@@ -88,7 +88,11 @@ class PDUHeaderTags(namedtuple('_PDUHeaderTags', ('version', 'type_', 'flags', '
 
     @classmethod
     def from_bytes(cls, byte_string):
-        return cls(*struct.unpack('!BBBB', byte_string[:4]))
+        return cls.from_buffer(byte_string)
+
+    @classmethod
+    def from_buffer(cls, buf, offset=0):
+        return cls(*codec.header_tags().unpack_from(buf, offset))
 
 
 PDUIdentifiers = namedtuple('PDUIdentifiers', ('session_id', 'transaction_id', 'packet_id', 'payload_length'))
@@ -113,29 +117,34 @@ class PDUHeader(namedtuple('_PDUHeader', PDUHeaderTags._fields + PDUIdentifiers.
     __slots__ = ()
 
     def to_bytes(self):
-        ret = struct.pack('!BBBB', self.version, self.type_, self.flags, self.reserved)
-        fmt = self.endianness + 'LLLL'
-        ret += struct.pack(fmt, self.session_id, self.transaction_id, self.packet_id, self.payload_length)
-        return ret
+        return codec.header(self.endianness).pack(*self)
 
     @classmethod
     def from_bytes(cls, byte_string):
-        pdu_info = PDUHeaderTags.from_bytes(byte_string)
+        return cls.from_buffer(byte_string)[0]
+
+    @classmethod
+    def from_buffer(cls, buf, offset=0):
         """
         Four remaining longs makeup the identifiers. Combine the two based on parsed flags.
 
         The NETWORK_BYTE_ORDER bit applies to all multi-byte integer
         values in the entire AgentX packet, including the remaining
         header fields.
+
+        :param buf: bytes-like object to unpack from (bytes, bytearray or memoryview)
+        :param offset: index of the header within buf
+        :return: the header and the index of the first payload byte
         """
         try:
+            pdu_info = PDUHeaderTags.from_buffer(buf, offset)
             header = cls(
                 *pdu_info,
                 *PDUIdentifiers(
-                    *struct.unpack(pdu_info.endianness + '4L', byte_string[4:constants.AGENTX_HEADER_LENGTH])
+                    *codec.header_ids(pdu_info.endianness).unpack_from(buf, offset + 4)
                 )
             )
-            return header
+            return header, offset + constants.AGENTX_HEADER_LENGTH
         except struct.error as e:
             raise exceptions.PDUUnpackError("Failed to unpack PDUHeader", inner_exception=e)
 
@@ -164,11 +173,10 @@ class PDUStream:
         self.data = data
 
     def __iter__(self):
-        _data = self.data
-        while _data:
-            pdu = PDU.decode(_data)
+        offset = 0
+        while offset < len(self.data):
+            pdu, offset = PDU.from_buffer(self.data, offset)
             yield pdu
-            _data = pdu._trailing_bytes
 
 
 class PDU(object, metaclass=RegisteredPDU):
@@ -199,38 +207,100 @@ class PDU(object, metaclass=RegisteredPDU):
 
     @staticmethod
     def decode(byte_string):
-        if len(byte_string) < constants.AGENTX_MINIMUM_PDU_SIZE:
+        return PDU.from_buffer(byte_string)[0]
+
+    @staticmethod
+    def from_buffer(buf, offset=0):
+        """
+        Decode the PDU starting at 'offset'. The payload is handed to the PDU constructor as a memoryview bounded by
+        h.payload_length, so fields are unpacked in place rather than from copies of the remaining stream.
+
+        :param buf: bytes-like object holding one or more PDUs
+        :param offset: index of the PDU header within buf
+        :return: the PDU and the index following its payload
+        """
+        if len(buf) - offset < constants.AGENTX_MINIMUM_PDU_SIZE:
             # if we can't even unpack a header, we can't continue.
             raise exceptions.PDUUnpackError("Minimum PDU size is [{}], received [{}] bytes.".format(
                 constants.AGENTX_MINIMUM_PDU_SIZE,
-                len(byte_string)
+                len(buf) - offset
             ))
 
         # Parse the header to infer the type.
-        header = PDUHeader.from_bytes(byte_string)
+        header, payload_offset = PDUHeader.from_buffer(buf, offset)
 
         # based on the type field, find the appropriate class and instantiate it.
         try:
-            return supported_pdus[header.type_](
-                payload=byte_string[constants.AGENTX_HEADER_LENGTH:],
-                header=header)
+            pdu_cls = supported_pdus[header.type_]
         except KeyError:
             raise exceptions.UnsupportedPDUError("PDU Type [{}] is not supported".format(header.type_))
+
+        end_offset = payload_offset + header.payload_length
+        if len(buf) < end_offset:
+            raise exceptions.PDUUnpackError("PDU payload length is [{}], received [{}] bytes.".format(
+                header.payload_length,
+                len(buf) - payload_offset
+            ))
+
+        try:
+            pdu = pdu_cls(payload=memoryview(buf)[payload_offset:end_offset], header=header)
         except (struct.error, ValueError) as e:
             raise exceptions.PDUUnpackError("Failed to unpack PDU.", inner_exception=e)
 
+        # don't hold on to the caller's buffer
+        pdu._trailing_bytes = bytes(pdu._trailing_bytes)
+        return pdu, end_offset
+
     def encode(self):
+        """
+        Encode the PDU into a single buffer sized up front from the encoded size of each field.
+
+        :return: bytearray holding the header and payload
+        """
+        buf = bytearray(self.size)
         try:
-            return self.header.to_bytes()
+            self.encode_into(buf, 0)
         except (struct.error, ValueError) as e:
             raise exceptions.PDUPackError("Failed to pack PDU.", inner_exception=e)
+        return buf
+
+    def encode_into(self, buf, offset):
+        """
+        Write the header and payload into 'buf'. h.payload_length is patched in place once the payload is written.
+
+        :param buf: writable buffer with at least self.size bytes available at offset
+        :param offset: index at which to write the PDU header
+        :return: the index following the encoded PDU
+        """
+        header_codec = codec.header(self.header.endianness)
+        header_codec.pack_into(buf, offset, *self.header)
+        payload_offset = offset + header_codec.size
+        end_offset = self.encode_payload_into(buf, payload_offset)
+        codec.uint32(self.header.endianness).pack_into(buf, payload_offset - 4, end_offset - payload_offset)
+        return end_offset
+
+    def encode_payload_into(self, buf, offset):
+        """
+        Child PDUs extend this to write their fields following the header.
+
+        :return: the index following the last byte written
+        """
+        return offset
 
     def make_response(self, lut):
         raise NotImplementedError("Child PDUs must create response objects.")
 
     @property
     def payload_length(self):
-        return len(self.encode()) - constants.AGENTX_HEADER_LENGTH
+        """
+        Encoded size of the payload, computed from the fields without encoding them. Child PDUs extend this
+        alongside encode_payload_into.
+        """
+        return 0
+
+    @property
+    def size(self):
+        return constants.AGENTX_HEADER_LENGTH + self.payload_length
 
 
 class ContextOptionalPDU(PDU):
@@ -244,14 +314,36 @@ class ContextOptionalPDU(PDU):
     def __init__(self, header, context=None, payload=None):
         super().__init__(header=header, payload=payload)
         self.context = context
-        if self.header.flag__non_default_context:
+        if payload is None:
+            # the NON_DEFAULT_CONTEXT flag follows the presence of a context
+            flags = self.header.flags & ~PDUHeaderTags.MASK_NON_DEFAULT_CONTEXT
+            if context is not None:
+                flags |= PDUHeaderTags.MASK_NON_DEFAULT_CONTEXT
+            self.header = self.header._replace(flags=flags)
+        elif self.header.flag__non_default_context:
             # Optional context is present, process it.
-            self.context = OctetString.from_bytes(self._trailing_bytes, self.header.endianness)
+            self.context, offset = OctetString.from_buffer(self._trailing_bytes, 0, self.header.endianness)
             # chomp the context block from unprocessed bytes
-            self._trailing_bytes = self._trailing_bytes[self.context.size:]
+            self._trailing_bytes = self._trailing_bytes[offset:]
 
-    def encode(self):
-        ret = super().encode()
+    def get_lut(self, lut):
+        """
+        :param lut: MIBTable of the default context
+        :return: the MIBTable serving this PDU's context, or None if the context is not supported
+        """
+        if self.context is None:
+            return lut
+        return lut.get_context(self.context)
+
+    def encode_payload_into(self, buf, offset):
+        offset = super().encode_payload_into(buf, offset)
+        if self.context is not None:
+            offset = self.context.encode_into(buf, offset, self.header.endianness)
+        return offset
+
+    @property
+    def payload_length(self):
+        length = super().payload_length
         if self.context is not None:
-            ret += self.context.to_bytes(self.header.endianness)
-        return ret
+            length += self.context.size
+        return length
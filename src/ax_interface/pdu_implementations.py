@@ -1,13 +1,12 @@
 """
 PDU Implementation classes.
 """
-import struct
 from enum import Enum, unique
 
-from . import util, constants
-from .constants import PduTypes
+from . import codec, util, constants
+from .constants import PduTypes, ValueType
 from .encodings import ObjectIdentifier, SearchRange, OctetString, ValueRepresentation
-from .pdu import PDU, ContextOptionalPDU
+from .pdu import PDU, PDUHeader, ContextOptionalPDU
 
 
 class OpenPDU(PDU):
@@ -30,25 +29,27 @@ class OpenPDU(PDU):
         self.oid = oid
 
         if payload is not None:
-            self.timeout, self.reserved = struct.unpack(self.header.endianness + 'B3s', self._trailing_bytes[:4])
-            self._trailing_bytes = self._trailing_bytes[4:]
-            self.oid = ObjectIdentifier.from_bytes(self._trailing_bytes, self.header.endianness)
-            self._trailing_bytes = self._trailing_bytes[self.oid.size:]
-            self.descr = OctetString.from_bytes(self._trailing_bytes, self.header.endianness)
-            self._trailing_bytes = self._trailing_bytes[self.descr.size:]
+            endianness = self.header.endianness
+            self.timeout, self.reserved = codec.open_header(endianness).unpack_from(self._trailing_bytes, 0)
+            self.oid, offset = ObjectIdentifier.from_buffer(self._trailing_bytes, 4, endianness)
+            self.descr, offset = OctetString.from_buffer(self._trailing_bytes, offset, endianness)
+            self._trailing_bytes = self._trailing_bytes[offset:]
         else:
             self.descr = OctetString.from_string(descr)
             self.header = self.header._replace(payload_length=self.payload_length)
 
             # end of object stream
 
-    def encode(self):
-        ret = super().encode()
-        fmt = self.header.endianness + 'B3s'
-        ret += struct.pack(fmt, self.timeout, self.reserved)
-        ret += self.oid.to_bytes(self.header.endianness)
-        ret += self.descr.to_bytes(self.header.endianness)
-        return ret
+    def encode_payload_into(self, buf, offset):
+        endianness = self.header.endianness
+        offset = super().encode_payload_into(buf, offset)
+        codec.open_header(endianness).pack_into(buf, offset, self.timeout, self.reserved)
+        offset = self.oid.encode_into(buf, offset + 4, endianness)
+        return self.descr.encode_into(buf, offset, endianness)
+
+    @property
+    def payload_length(self):
+        return super().payload_length + 4 + self.oid.size + self.descr.size
 
 
 class ClosePDU(PDU):
@@ -94,7 +95,8 @@ class ClosePDU(PDU):
         # +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
         # | c.reason |                  < reserved >                      |
         # +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
-        self.reason, self.reason_reserved = struct.unpack(self.header.endianness + 'B3s', self._trailing_bytes[:4])
+        self.reason, self.reason_reserved = \
+            codec.open_header(self.header.endianness).unpack_from(self._trailing_bytes, 0)
         self.header = self.header._replace(payload_length=4)
         # end of object stream
 
@@ -117,33 +119,42 @@ class RegisterPDU(ContextOptionalPDU):
         # | r.timeout | r.priority | r.range_subid |     < reserved >     |
         # +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
         if payload is not None:
+            endianness = self.header.endianness
             self.timeout, self.priority, self.range_subid, self.range_subid_reserved = \
-                struct.unpack(self.header.endianness + 'BBBB', self._trailing_bytes[:4])
-            self._trailing_bytes = self._trailing_bytes[4:]
-            self.subtree = ObjectIdentifier.from_bytes(self._trailing_bytes, self.header.endianness)
-            self._trailing_bytes = self._trailing_bytes[self.subtree.size:]
+                codec.register_header(endianness).unpack_from(self._trailing_bytes, 0)
+            self.subtree, offset = ObjectIdentifier.from_buffer(self._trailing_bytes, 4, endianness)
             # From the RFC:
             # This field is present only if r.range_subid is not 0.
             # r.upper_bound
             self.upper_bound = None
             if self.range_subid:
-                self.upper_bound = struct.unpack(self.header.endianness + 'L', self._trailing_bytes[:4])[0]
-                self._trailing_bytes = self._trailing_bytes[4:]
+                self.upper_bound = codec.uint32(endianness).unpack_from(self._trailing_bytes, offset)[0]
+                offset += 4
                 # end of stream
+            self._trailing_bytes = self._trailing_bytes[offset:]
         else:
             self.timeout, self.priority, self.range_subid, self.range_subid_reserved = \
                 timeout, priority, range_subid, 0
             self.subtree, self.upper_bound = subtree, upper_bound
             self.header = self.header._replace(payload_length=self.payload_length)
 
-    def encode(self):
-        ret = super().encode()
-        ret += struct.pack(self.header.endianness + 'BBBB', self.timeout, self.priority, self.range_subid,
-                           self.range_subid_reserved)
-        ret += self.subtree.to_bytes(self.header.endianness)
+    def encode_payload_into(self, buf, offset):
+        endianness = self.header.endianness
+        offset = super().encode_payload_into(buf, offset)
+        codec.register_header(endianness).pack_into(buf, offset, self.timeout, self.priority, self.range_subid,
+                                                     self.range_subid_reserved)
+        offset = self.subtree.encode_into(buf, offset + 4, endianness)
+        if self.upper_bound is not None:
+            codec.uint32(endianness).pack_into(buf, offset, self.upper_bound)
+            offset += 4
+        return offset
+
+    @property
+    def payload_length(self):
+        length = super().payload_length + 4 + self.subtree.size
         if self.upper_bound is not None:
-            ret += struct.pack(self.header.endianness + 'L', self.upper_bound)
-        return ret
+            length += 4
+        return length
 
 
 # class UnRegisterPDU(OptionalContextPDU):
@@ -166,28 +177,30 @@ class GetPDU(ContextOptionalPDU):
 
         if payload is not None:
             # consume the remaining bytestream
-            bytes_read = 0
-            while self._trailing_bytes and bytes_read < self.header.payload_length:
-                # unpack the OID
-                search_oid = SearchRange.from_bytes(self._trailing_bytes, self.header.endianness)
-                # move the pointer
-                self._trailing_bytes = self._trailing_bytes[search_oid.size:]
-                bytes_read += search_oid.size
+            offset = 0
+            while offset < len(self._trailing_bytes):
+                # unpack the OID and move the pointer
+                search_oid, offset = SearchRange.from_buffer(self._trailing_bytes, offset, self.header.endianness)
                 # remember the OID
                 self.sr.append(search_oid)
-                # end of stream post-loop
+            # end of stream post-loop
+            self._trailing_bytes = self._trailing_bytes[offset:]
         else:
             for oid in oids:
                 self.sr.append(
                     SearchRange(start=oid, end=oid.inc())
                 )
-            self.header = self.header._replace(payload_length=len(self.encode()))
+            self.header = self.header._replace(payload_length=self.payload_length)
 
-    def encode(self):
-        ret = super().encode()
+    def encode_payload_into(self, buf, offset):
+        offset = super().encode_payload_into(buf, offset)
         for sr in self.sr:
-            ret += sr.to_bytes(self.header.endianness)
-        return ret
+            offset = sr.encode_into(buf, offset, self.header.endianness)
+        return offset
+
+    @property
+    def payload_length(self):
+        return super().payload_length + sum(sr.size for sr in self.sr)
 
     def make_response(self, lut):
         """
@@ -218,21 +231,17 @@ class GetPDU(ContextOptionalPDU):
         :return:
         """
 
+        lut = self.get_lut(lut)
+        if lut is None:
+            return ResponsePDU.for_request(self, error=ResponsePDU.Errors.UNSUPPORTED_CONTEXT)
+
         var_bind_list = []
 
         for sr in self.sr:
             vr = lut.get(sr)
             var_bind_list.append(vr)
 
-        response_pdu = ResponsePDU(
-            header=self.header._replace(
-                type_=constants.PduTypes.RESPONSE,
-            ),
-            sys_up_time=0,  # ignored for this PDU type.
-            error=ResponsePDU.Errors.NO_AGENT_X_ERROR,
-            index=0,
-            values=var_bind_list
-        )
+        response_pdu = ResponsePDU.for_request(self, values=var_bind_list)
         # TODO: 'generr' on other failure
         return response_pdu
 
@@ -283,32 +292,123 @@ class GetNextPDU(GetPDU):
         :return:
         """
 
+        lut = self.get_lut(lut)
+        if lut is None:
+            return ResponsePDU.for_request(self, error=ResponsePDU.Errors.UNSUPPORTED_CONTEXT)
+
         var_bind_list = []
 
         for sr in self.sr:
-            vr = lut.get_next(sr)
+            vr = lut.get_next(sr, self.header.session_id)
             var_bind_list.append(vr)
 
-        response_pdu = ResponsePDU(
-            header=self.header._replace(
-                type_=constants.PduTypes.RESPONSE,
-            ),
-            sys_up_time=0,  # ignored for this PDU type.
-            error=ResponsePDU.Errors.NO_AGENT_X_ERROR,
-            index=0,
-            values=var_bind_list
-        )
+        response_pdu = ResponsePDU.for_request(self, values=var_bind_list)
         # TODO: 'generr' on other failure
         return response_pdu
 
 
-# class GetBulkPDU(ContextOptionalPDU):
-#     """
-#     https://tools.ietf.org/html/rfc2741#section-6.2.7
-#     """
-# TODO: 'generr' on other failure
-#     header_type_ = PduTypes.GET_BULK
-# TODO: Implement.
+class GetBulkPDU(ContextOptionalPDU):
+    """
+    https://tools.ietf.org/html/rfc2741#section-6.2.7
+    """
+    # TODO: 'generr' on other failure
+    header_type_ = PduTypes.GET_BULK
+
+    def __init__(self, header=None, payload=None, context=None, non_repeaters=None, max_repetitions=None,
+                 oids=None):
+        super().__init__(header=header, payload=payload, context=context)
+        self.sr = []
+
+        # +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+        # |        g.non_repeaters        |       g.max_repetitions       |
+        # +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+        if payload is not None:
+            endianness = self.header.endianness
+            self.non_repeaters, self.max_repetitions = \
+                codec.getbulk_header(endianness).unpack_from(self._trailing_bytes, 0)
+            # consume the remaining bytestream
+            offset = 4
+            while offset < len(self._trailing_bytes):
+                search_oid, offset = SearchRange.from_buffer(self._trailing_bytes, offset, endianness)
+                self.sr.append(search_oid)
+            # end of stream post-loop
+            self._trailing_bytes = self._trailing_bytes[offset:]
+        else:
+            self.non_repeaters, self.max_repetitions = non_repeaters, max_repetitions
+            for oid in oids:
+                # unbounded search ranges
+                self.sr.append(
+                    SearchRange(start=oid, end=ObjectIdentifier.null_oid())
+                )
+            self.header = self.header._replace(payload_length=self.payload_length)
+
+    def encode_payload_into(self, buf, offset):
+        endianness = self.header.endianness
+        offset = super().encode_payload_into(buf, offset)
+        codec.getbulk_header(endianness).pack_into(buf, offset, self.non_repeaters, self.max_repetitions)
+        offset += 4
+        for sr in self.sr:
+            offset = sr.encode_into(buf, offset, endianness)
+        return offset
+
+    @property
+    def payload_length(self):
+        return super().payload_length + 4 + sum(sr.size for sr in self.sr)
+
+    def make_response(self, lut):
+        """
+        From https://tools.ietf.org/html/rfc2741#section-7.2.3.3:
+
+           (1)  For each of the first N SearchRanges (N being the value of
+                g.non_repeaters), the subagent performs the same processing as
+                for an agentx-GetNext-PDU.
+
+           (2)  The remaining SearchRanges are processed as repeaters: the
+                subagent performs up to g.max_repetitions iterations of GetNext
+                processing, each one starting from the variable found for the
+                same SearchRange in the previous iteration.  The VarBinds of
+                one iteration are appended to the response in the order of the
+                SearchRanges before the next iteration begins.
+
+           Once a repeater reaches the end of the MIB view, its remaining
+           VarBinds are set to `endOfMibView'.  Processing stops early when every
+           VarBind of an iteration is `endOfMibView'.
+
+        :param lut:
+        :return:
+        """
+
+        lut = self.get_lut(lut)
+        if lut is None:
+            return ResponsePDU.for_request(self, error=ResponsePDU.Errors.UNSUPPORTED_CONTEXT)
+
+        var_bind_list = []
+
+        non_repeaters = self.sr[:self.non_repeaters]
+        repeaters = self.sr[self.non_repeaters:]
+
+        for sr in non_repeaters:
+            vr = lut.get_next(sr)
+            var_bind_list.append(vr)
+
+        # each repeater walks the MIB with its own cursor rather than issuing a new GetNext per iteration.
+        walks = [lut.walk(sr) for sr in repeaters]
+        last_names = [sr.start for sr in repeaters]
+        for _ in range(self.max_repetitions if repeaters else 0):
+            end_of_mib_view = True
+            for i, walk in enumerate(walks):
+                vr = next(walk, None)
+                if vr is None:
+                    vr = ValueRepresentation(ValueType.END_OF_MIB_VIEW, 0, last_names[i], None)
+                else:
+                    last_names[i] = vr.name
+                    end_of_mib_view = False
+                var_bind_list.append(vr)
+            if end_of_mib_view:
+                break
+
+        response_pdu = ResponsePDU.for_request(self, values=var_bind_list)
+        return response_pdu
 
 
 
@@ -322,11 +422,12 @@ class TestSetPDU(ContextOptionalPDU):
         super().__init__(*args, **kwargs)
         self.vbs = []
 
-        while self._trailing_bytes:
-            # unpack the VarBind
-            vb = ValueRepresentation.from_bytes(self._trailing_bytes, self.header.endianness)
-            # move up the pointer
-            self._trailing_bytes = self._trailing_bytes[vb.size:]
+        offset = 0
+        while offset < len(self._trailing_bytes):
+            # unpack the VarBind and move up the pointer
+            vb, offset = ValueRepresentation.from_buffer(self._trailing_bytes, offset, self.header.endianness)
+            self.vbs.append(vb)
+        self._trailing_bytes = self._trailing_bytes[offset:]
 
 
 class CommitSetPDU(PDU):
@@ -478,17 +579,16 @@ class ResponsePDU(PDU):
         super().__init__(header=header, payload=payload)
 
         if payload is not None:
-            self.sys_up_time, self.error, self.index = struct.unpack(
-                self.header.endianness + 'LHH', self._trailing_bytes[:8])
-            self._trailing_bytes = self._trailing_bytes[8:]
+            endianness = self.header.endianness
+            self.sys_up_time, self.error, self.index = \
+                codec.response_header(endianness).unpack_from(self._trailing_bytes, 0)
 
             self.values = []
-            bytes_read = 0
-            while self._trailing_bytes and bytes_read < self.header.payload_length - 8:
-                vr_next = ValueRepresentation.from_bytes(self._trailing_bytes, self.header.endianness)
+            offset = 8
+            while offset < len(self._trailing_bytes):
+                vr_next, offset = ValueRepresentation.from_buffer(self._trailing_bytes, offset, endianness)
                 self.values.append(vr_next)
-                bytes_read += vr_next.size
-                self._trailing_bytes = self._trailing_bytes[vr_next.size:]
+            self._trailing_bytes = self._trailing_bytes[offset:]
 
         else:
             self.sys_up_time, self.error, self.index = sys_up_time, error, index
@@ -496,14 +596,40 @@ class ResponsePDU(PDU):
             self.values = list(values)
             self.header = self.header._replace(payload_length=self.payload_length)
 
-    def encode(self):
-        ret = super().encode()
-        fmt = self.header.endianness + 'LHH'
-        ret += struct.pack(fmt, self.sys_up_time, self.error, self.index)
-        if self.values:
-            for value in self.values:
-                ret += value.to_bytes(self.header.endianness)
-        return ret
+    def encode_payload_into(self, buf, offset):
+        endianness = self.header.endianness
+        offset = super().encode_payload_into(buf, offset)
+        codec.response_header(endianness).pack_into(buf, offset, self.sys_up_time, self.error, self.index)
+        offset += 8
+        for value in self.values:
+            offset = value.encode_into(buf, offset, endianness)
+        return offset
+
+    @property
+    def payload_length(self):
+        return super().payload_length + 8 + sum(value.size for value in self.values)
+
+    @classmethod
+    def for_request(cls, request, error=Errors.NO_AGENT_X_ERROR, values=()):
+        """
+        From https://tools.ietf.org/html/rfc2741#section-7.2.2: an agentx-Response-PDU is created whose header fields
+        are identical to the received request PDU except that h.type is set to Response. A response carries no context,
+        so the NON_DEFAULT_CONTEXT bit is cleared as well.
+
+        :param request: the request PDU
+        :param error: res.error
+        :param values: the VarBindList
+        """
+        return cls(
+            header=request.header._replace(
+                type_=constants.PduTypes.RESPONSE,
+                flags=request.header.flags & ~PDUHeader.MASK_NON_DEFAULT_CONTEXT,
+            ),
+            sys_up_time=0,  # ignored for this PDU type.
+            error=error,
+            index=0,
+            values=values
+        )
 
     def make_response(self, lut):
         raise NotImplementedError(
@@ -1,8 +1,9 @@
 import asyncio
+from collections import deque
 
 from . import logger, constants, exceptions
-from .encodings import ObjectIdentifier
-from .pdu import PDUHeader, PDUStream
+from .encodings import ObjectIdentifier, OctetString
+from .pdu import PDU, PDUHeader
 from .pdu_implementations import RegisterPDU, ResponsePDU, OpenPDU
 
 
@@ -19,6 +20,15 @@ class AgentX(asyncio.Protocol):
         self.mib_table = mib_table
         self.closed = asyncio.Event()
         self.counter = 0
+        # bytes received from the socket that do not yet form a complete PDU
+        self._buffer = bytearray()
+        # complete PDUs received while the transport is paused, answered once it resumes
+        self._paused = False
+        self._pending_pdus = deque()
+        # flow control accounting
+        self.pause_count = 0
+        self.queued_pdus = 0
+        self.dropped_pdus = 0
 
     def send_pdu(self, pdu):
         write_bytes = pdu.encode()
@@ -51,22 +61,32 @@ class AgentX(asyncio.Protocol):
         self.session_id = pdu.header.session_id
         logger.info("AgentX session starting with ID: {}".format(self.session_id))
 
-        for idx, subtree in enumerate(self.mib_table.prefixes):
+        self._register_prefixes(pdu.header, self.mib_table.prefixes)
+        for context, context_table in self.mib_table.contexts.items():
+            self._register_prefixes(pdu.header, context_table.prefixes, context)
+
+        logger.info("OID registration complete. Waiting to receive PDUs...")
+
+    def _register_prefixes(self, header, prefixes, context=None):
+        context_str = OctetString.from_string(context) if context is not None else None
+        for idx, subtree in enumerate(prefixes):
             logger.debug(subtree)
             oid = ObjectIdentifier.from_iterable(subtree)
             register_pdu = RegisterPDU(
-                header=pdu.header,
+                header=header,
+                context=context_str,
                 timeout=constants.DEFAULT_PDU_TIMEOUT,
                 priority=idx,  # Lower index in the subtree list, higher priority.
                 range_subid=0,
                 subtree=oid,
             )
-            logger.info("Registering subID: [{}]".format(oid))
+            if context is None:
+                logger.info("Registering subID: [{}]".format(oid))
+            else:
+                logger.info("Registering subID: [{}] in context [{}]".format(oid, context))
             logger.debug(repr(oid))
             self.send_pdu(register_pdu)
 
-        logger.info("OID registration complete. Waiting to receive PDUs...")
-
     def parse_response(self, pdu):
         # no session established,
         if self.session_id == -1:
@@ -121,6 +141,73 @@ class AgentX(asyncio.Protocol):
 
         :param data: Socket stream data (as byte string)
         """
+        # A single read may hold a partial PDU, several back-to-back PDUs, or both. Frames are cut from the
+        # reassembly buffer using h.payload_length; the consumed prefix is released once per read.
+        self._buffer.extend(data)
+        buffer_length = len(self._buffer)
+        offset = 0
+        frames = []
+        try:
+            while buffer_length - offset >= constants.AGENTX_HEADER_LENGTH:
+                header, _ = PDUHeader.from_buffer(self._buffer, offset)
+                if header.version != constants.AGENTX_VERSION:
+                    # we lost track of the PDU boundaries, there is no way to resynchronize the stream.
+                    logger.error("Invalid AgentX version [{}], discarding [{}] buffered bytes.".format(
+                        header.version, buffer_length - offset))
+                    offset = buffer_length
+                    break
+
+                pdu_length = constants.AGENTX_HEADER_LENGTH + header.payload_length
+                if buffer_length - offset < pdu_length:
+                    # the rest of this PDU will arrive with a later read.
+                    break
+
+                frames.append(bytes(self._buffer[offset:offset + pdu_length]))
+                offset += pdu_length
+        finally:
+            del self._buffer[:offset]
+
+        if self._paused or self._pending_pdus:
+            self._hold_pdus(frames)
+        else:
+            self._process_batch(frames)
+
+    def _process_batch(self, frames):
+        """
+        Answer a batch of PDUs with a single write.
+        """
+        responses = []
+        for pdu_bytes in frames:
+            response_bytes = self.process_pdu(pdu_bytes)
+            if response_bytes is not None:
+                responses.append(response_bytes)
+        if responses:
+            self.transport.write(b''.join(responses))
+
+    def _hold_pdus(self, frames):
+        for pdu_bytes in frames:
+            if len(self._pending_pdus) >= constants.AGENTX_MAX_PENDING_PDUS:
+                self._pending_pdus.popleft()
+                self.dropped_pdus += 1
+                if self.dropped_pdus == 1 or not self.dropped_pdus % constants.REPORTING_FREQUENCY:
+                    logger.warning("AgentX transport paused with [{}] PDUs pending, dropped [{}] PDUs so far.".format(
+                        len(self._pending_pdus), self.dropped_pdus))
+            self._pending_pdus.append(pdu_bytes)
+            self.queued_pdus += 1
+
+    def _process_pending(self):
+        while self._pending_pdus and not self._paused:
+            batch_size = min(len(self._pending_pdus), constants.AGENTX_PENDING_PDU_BATCH)
+            # writing the batch's responses may pause the transport again.
+            self._process_batch([self._pending_pdus.popleft() for _ in range(batch_size)])
+
+    def process_pdu(self, pdu_bytes):
+        """
+        Decode a single, complete PDU and prepare the response to it.
+
+        :param pdu_bytes: the PDU header and payload (as byte string)
+        :return: the encoded response, or None if the PDU does not warrant one
+        """
         self.counter += 1
         if not (self.counter % constants.REPORTING_FREQUENCY):
             # Stayin' alive...Stayin' alive...
@@ -128,31 +215,52 @@ class AgentX(asyncio.Protocol):
             logger.debug("Parsed {} PDUs...".format(self.counter))
         try:
             # each PDU type implements it's own subclass and will be inferred at construction.
-            pdu_stream = PDUStream(data)
-            for pdu in pdu_stream:
-                if isinstance(pdu, ResponsePDU):
-                    # parse the response
-                    self.parse_response(pdu)
-                else:
-                    # a response will be returned if the current PDU warrants a response
-                    response_pdu = pdu.make_response(self.mib_table)
-                    self.transport.write(response_pdu.encode())
+            pdu = PDU.decode(pdu_bytes)
+            if isinstance(pdu, ResponsePDU):
+                # parse the response
+                self.parse_response(pdu)
+            else:
+                # a response will be returned if the current PDU warrants a response
+                monitor = self.mib_table.loop_monitor
+                if monitor is None:
+                    return pdu.make_response(self.mib_table).encode()
+                with monitor.blocking('request', type(pdu).__name__, lambda: self.describe_request(pdu)):
+                    return pdu.make_response(self.mib_table).encode()
         except exceptions.PDUUnpackError:
-            logger.exception('decode_error[{}]'.format(data))
+            logger.exception('decode_error[{}]'.format(pdu_bytes))
         except exceptions.PDUPackError:
-            logger.exception('encode_error[{}]'.format(data))
+            logger.exception('encode_error[{}]'.format(pdu_bytes))
         except Exception:
-            logger.exception("Uncaught AgentX proto error! [{}]".format(data))
+            logger.exception("Uncaught AgentX proto error! [{}]".format(pdu_bytes))
+        return None
+
+    @staticmethod
+    def describe_request(pdu):
+        """
+        :return: the PDU type and the first OID it requests, naming a slow request
+        """
+        search_ranges = getattr(pdu, 'sr', None)
+        if not search_ranges:
+            return type(pdu).__name__
+        return '{} {}'.format(type(pdu).__name__, search_ranges[0].start)
 
     def pause_writing(self):
         logger.warning("AgentX buffer above high-water mark. Suspending PDU processing.")
+        self._paused = True
+        self.pause_count += 1
 
     def resume_writing(self):
-        logger.warning("AgentX buffer below high-water mark. Resuming PDU processing.")
+        logger.warning("AgentX buffer below high-water mark. Resuming PDU processing, [{}] PDUs pending.".format(
+            len(self._pending_pdus)))
+        self._paused = False
+        self._process_pending()
 
     def connection_lost(self, exc):
         # The socket has been closed
         logger.info("AgentX socket connection closed.")
+        self._buffer.clear()
+        self._pending_pdus.clear()
+        self.mib_table.close_session(self.session_id)
         if isinstance(exc, Exception):
             logger.error(exc)
         self.closed.set()
@@ -0,0 +1,273 @@
+"""
+Scheduler running the update cycles of all MIB updaters from a single task.
+
+Each updater gets a phase within its update interval, so updaters sharing an interval are spread over it rather than
+firing together. Deadlines are kept in a priority queue; each iteration of the scheduler (a tick) starts at most
+MAX_UPDATES_PER_TICK due updaters and stops starting more once update work has spent UPDATE_TICK_CPU_BUDGET of event
+loop CPU time during the tick, yielding to request handling in between. Update cycles run as tasks of their own, so a
+cycle done in slices does not hold up the other updaters. Only the slices of update work are charged to the budget (see
+MIBUpdater.timed), not the requests served in between. Updaters starting more than MISSED_DEADLINE_TOLERANCE late are
+reported.
+
+With an AccessTracker, updaters whose subtrees nobody requested for a while refresh at IDLE_UPDATE_FREQUENCY at most,
+and the first request after such a while makes them refresh right away. That request is still answered from the data
+at hand.
+"""
+
+import asyncio
+import functools
+import heapq
+import itertools
+import time
+
+from . import logger
+from .constants import IDLE_UPDATE_FREQUENCY, MAX_UPDATES_PER_TICK, MISSED_DEADLINE_TOLERANCE, REPORTING_FREQUENCY, \
+    UPDATE_TICK_CPU_BUDGET
+
+
+class AccessTracker:
+    """
+    Tracks when MIB subtrees, and the updaters serving them, were last requested.
+    """
+
+    def __init__(self, idle_timeout):
+        """
+        :param idle_timeout: seconds without requests after which an updater is idle
+        """
+        self.idle_timeout = idle_timeout
+        # MIB entry -> (subtree prefix, updater serving it or None)
+        self._entries = {}
+        # subtree prefix / updater -> time.monotonic() of the last request. Registration counts as one.
+        self.subtree_access = {}
+        self.updater_access = {}
+        # updater -> number of refreshes triggered by a request after a while idle
+        self.on_demand_refreshes = {}
+        # called with an updater to refresh, set by the scheduler
+        self.wake = None
+
+    def register(self, mib_entry, updater):
+        now = time.monotonic()
+        prefix = mib_entry.get_prefix()
+        self._entries[mib_entry] = (prefix, updater)
+        self.subtree_access.setdefault(prefix, now)
+        if updater is not None:
+            self.updater_access.setdefault(updater, now)
+
+    def touch(self, mib_entry):
+        """
+        Record a request served by 'mib_entry'.
+        """
+        prefix, updater = self._entries.get(mib_entry, (None, None))
+        if prefix is None:
+            return
+        now = time.monotonic()
+        self.subtree_access[prefix] = now
+        if updater is None:
+            return
+        last_access = self.updater_access[updater]
+        self.updater_access[updater] = now
+        if now - last_access > self.idle_timeout and self.wake is not None:
+            self.on_demand_refreshes[updater] = self.on_demand_refreshes.get(updater, 0) + 1
+            self.wake(updater)
+
+    def is_idle(self, updater):
+        """
+        :return: True if the updater serves subtrees and none of them was requested for idle_timeout. Updaters serving
+            no subtree are never idle.
+        """
+        last_access = self.updater_access.get(updater)
+        return last_access is not None and time.monotonic() - last_access > self.idle_timeout
+
+    def stats(self):
+        """
+        :return: updater class name -> {'idle_for': seconds since the last request, 'idle': bool,
+            'on_demand_refreshes': count}
+        """
+        now = time.monotonic()
+        return {
+            type(updater).__name__: {
+                'idle_for': now - last_access,
+                'idle': now - last_access > self.idle_timeout,
+                'on_demand_refreshes': self.on_demand_refreshes.get(updater, 0),
+            }
+            for updater, last_access in self.updater_access.items()
+        }
+
+
+class UpdaterScheduler:
+    def __init__(self, updaters, run_event, max_updates_per_tick=MAX_UPDATES_PER_TICK,
+                 tick_cpu_budget=UPDATE_TICK_CPU_BUDGET, access_tracker=None, idle_frequency=IDLE_UPDATE_FREQUENCY,
+                 frequency_controller=None):
+        """
+        :param updaters: MIBUpdaters to run
+        :param run_event: the scheduler runs while the event is set
+        :param max_updates_per_tick: update cycles started per tick
+        :param tick_cpu_budget: event loop CPU time (in seconds) a tick may spend on update cycles
+        :param access_tracker: AccessTracker telling idle updaters, None to refresh all of them on schedule
+        :param idle_frequency: update interval (in seconds) of idle updaters, unless theirs is longer
+        :param frequency_controller: FrequencyController to report the event loop lag to
+        """
+        # phases are assigned in a stable order
+        self.updaters = sorted(updaters, key=lambda updater: type(updater).__name__)
+        self.run_event = run_event
+        self.max_updates_per_tick = max_updates_per_tick
+        self.tick_cpu_budget = tick_cpu_budget
+        # heap of (deadline, sequence, updater). Updaters running in an executor are out of it until their cycle ends.
+        self._queue = []
+        self._sequence = itertools.count()
+        # update cycles in progress, as futures
+        self._running = set()
+        # event loop CPU time (in seconds) spent on slices of update work
+        self.loop_cpu_time = 0.0
+        for updater in self.updaters:
+            updater.on_loop_time = self.charge
+        # updater -> its deadline. Heap items with another deadline are stale: the updater was rescheduled.
+        self._deadlines = {}
+        self._wakeup = asyncio.Event()
+        self.access_tracker = access_tracker
+        self.idle_frequency = idle_frequency
+        if access_tracker is not None:
+            access_tracker.wake = self.wake
+        self.frequency_controller = frequency_controller
+
+        self.ticks = 0
+        # due updaters left for a later tick because of the per-tick cap or the CPU budget
+        self.deferred = 0
+        # updater -> number of missed deadlines
+        self.missed_deadlines = {}
+        self.total_missed_deadlines = 0
+        # updater -> number of update cycles run at the idle rate
+        self.idle_cycles = {}
+
+    def schedule(self, updater, deadline):
+        self._deadlines[updater] = deadline
+        heapq.heappush(self._queue, (deadline, next(self._sequence), updater))
+
+    def wake(self, updater):
+        """
+        Refresh 'updater' as soon as possible, unless an update cycle of it is already running.
+        """
+        deadline = self._deadlines.get(updater)
+        if deadline is None:
+            return
+        now = asyncio.get_event_loop().time()
+        if deadline > now:
+            self.schedule(updater, now)
+            self._wakeup.set()
+
+    def charge(self, cpu_time):
+        """
+        :param cpu_time: event loop CPU time (in seconds) of a slice of update work
+        """
+        self.loop_cpu_time += cpu_time
+
+    def stop(self):
+        """
+        Return from run() now that run_event is cleared, rather than at the next deadline.
+        """
+        self._wakeup.set()
+
+    def _peek(self):
+        """
+        :return: the first heap item, dropping stale ones, or None
+        """
+        while self._queue:
+            deadline, _, updater = self._queue[0]
+            if self._deadlines.get(updater) == deadline:
+                return self._queue[0]
+            heapq.heappop(self._queue)
+        return None
+
+    def stagger(self, now):
+        """
+        Schedule the first cycle of each updater, spreading them over their update interval.
+        """
+        for index, updater in enumerate(self.updaters):
+            self.schedule(updater, now + updater.frequency * index / len(self.updaters))
+
+    async def run(self):
+        loop = asyncio.get_event_loop()
+        self.stagger(loop.time())
+        try:
+            while self.run_event.is_set():
+                now = loop.time()
+                head = self._peek()
+                if head is not None and head[0] <= now:
+                    await self.tick()
+                    # let requests through before the next tick
+                    await asyncio.sleep(0)
+                    continue
+
+                if head is None and not self._running:
+                    # nothing to schedule
+                    break
+                # a cycle ending early, or an updater woken up, may be due right away
+                self._wakeup.clear()
+                waiter = asyncio.ensure_future(self._wakeup.wait())
+                done, _ = await asyncio.wait(self._running | {waiter}, timeout=head[0] - now if head else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                if not self.run_event.is_set():
+                    break
+                if not done and self.frequency_controller is not None:
+                    # woken up by the timeout: how late the loop got to it
+                    self.frequency_controller.observe_loop_lag(loop.time() - head[0])
+        finally:
+            if self._running:
+                await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def tick(self):
+        """
+        Start the due update cycles, within the per-tick cap and CPU budget.
+        """
+        loop = asyncio.get_event_loop()
+        self.ticks += 1
+        cpu_start = self.loop_cpu_time
+        started = 0
+        while self._peek() is not None:
+            deadline, _, updater = self._queue[0]
+            now = loop.time()
+            if deadline > now:
+                break
+            if started >= self.max_updates_per_tick or self.loop_cpu_time - cpu_start >= self.tick_cpu_budget:
+                self.deferred += sum(1 for item in self._queue
+                                     if item[0] <= now and self._deadlines.get(item[2]) == item[0])
+                break
+
+            heapq.heappop(self._queue)
+            del self._deadlines[updater]
+            self._check_deadline(updater, deadline, now)
+            started += 1
+            fut = asyncio.ensure_future(updater.run_cycle())
+            self._running.add(fut)
+            fut.add_done_callback(functools.partial(self._cycle_done, updater, deadline))
+            if updater.executor is None:
+                # let the cycle run its first slice, so that the budget accounts for it
+                await asyncio.sleep(0)
+
+    def _cycle_done(self, updater, deadline, fut):
+        self._running.discard(fut)
+        if not fut.cancelled():
+            self._reschedule(updater, deadline, fut.result())
+
+    def _reschedule(self, updater, deadline, interval):
+        if self.access_tracker is not None and self.access_tracker.is_idle(updater) \
+                and interval < self.idle_frequency:
+            interval = self.idle_frequency
+            self.idle_cycles[updater] = self.idle_cycles.get(updater, 0) + 1
+        now = asyncio.get_event_loop().time()
+        next_deadline = deadline + interval
+        if next_deadline < now:
+            # a whole interval behind: start over from now rather than running back to back
+            next_deadline = now + interval
+        self.schedule(updater, next_deadline)
+
+    def _check_deadline(self, updater, deadline, now):
+        lateness = now - deadline
+        if lateness <= MISSED_DEADLINE_TOLERANCE:
+            return
+        self.missed_deadlines[updater] = self.missed_deadlines.get(updater, 0) + 1
+        self.total_missed_deadlines += 1
+        if self.total_missed_deadlines % REPORTING_FREQUENCY == 1:
+            logger.warning("Updater [{}] started {:.2f}s past its deadline, {} missed deadlines so far".format(
+                type(updater).__name__, lateness, self.total_missed_deadlines))
@@ -0,0 +1,144 @@
+"""
+OID trie used to dispatch requests to the MIB entry registered for a subtree.
+"""
+
+import bisect
+
+
+class _Node:
+    __slots__ = ('key', 'value', 'has_value', 'children', 'child_ids')
+
+    def __init__(self, key):
+        self.key = key
+        self.value = None
+        self.has_value = False
+        # sub-identifier -> _Node, and the same sub-identifiers in ascending order for ordered traversal.
+        self.children = {}
+        self.child_ids = []
+
+    def items(self):
+        """
+        Pre-order traversal: the node itself precedes its descendants in lexicographic OID order.
+        """
+        if self.has_value:
+            yield self.key, self.value
+        for child_id in self.child_ids:
+            yield from self.children[child_id].items()
+
+
+class OidTrie:
+    """
+    Maps OID tuples to values, one trie level per sub-identifier. Lookups cost O(depth of the OID) regardless of how
+    many OIDs are stored or how their subtrees overlap.
+    """
+
+    def __init__(self, items=()):
+        self._root = _Node(())
+        self._len = 0
+        for key, value in items:
+            self[key] = value
+
+    def __len__(self):
+        return self._len
+
+    def __setitem__(self, key, value):
+        key = tuple(key)
+        node = self._root
+        for depth, sub_id in enumerate(key):
+            child = node.children.get(sub_id)
+            if child is None:
+                child = node.children[sub_id] = _Node(key[:depth + 1])
+                bisect.insort(node.child_ids, sub_id)
+            node = child
+        if not node.has_value:
+            self._len += 1
+        node.value = value
+        node.has_value = True
+
+    def _find(self, key):
+        node = self._root
+        for sub_id in key:
+            node = node.children.get(sub_id)
+            if node is None:
+                return None
+        return node
+
+    def __getitem__(self, key):
+        node = self._find(key)
+        if node is None or not node.has_value:
+            raise KeyError(key)
+        return node.value
+
+    def __contains__(self, key):
+        node = self._find(key)
+        return node is not None and node.has_value
+
+    def __iter__(self):
+        for key, _ in self._root.items():
+            yield key
+
+    def items(self):
+        return self._root.items()
+
+    def longest_prefix(self, oid):
+        """
+        :param oid: OID tuple
+        :return: (key, value) of the longest stored key that is a prefix of (or equal to) oid, or None
+        """
+        node = self._root
+        match = (node.key, node.value) if node.has_value else None
+        for sub_id in oid:
+            node = node.children.get(sub_id)
+            if node is None:
+                break
+            if node.has_value:
+                match = (node.key, node.value)
+        return match
+
+    def items_after(self, oid, inclusive=False, skip_subtree=False):
+        """
+        Iterate stored items in lexicographic order, starting from the first key following oid.
+
+        :param oid: OID tuple to start from
+        :param inclusive: include oid itself, if stored
+        :param skip_subtree: skip the keys oid is a prefix of, i.e. start from the next subtree
+        :return: generator of (key, value)
+        """
+        # (node, index into node.child_ids) pairs still to visit, the deepest last.
+        pending = []
+        node = self._root
+        for sub_id in oid:
+            # children sorting after 'sub_id' follow everything below it
+            pending.append((node, bisect.bisect_right(node.child_ids, sub_id)))
+            node = node.children.get(sub_id)
+            if node is None:
+                break
+        else:
+            # oid is a node of the trie
+            if not skip_subtree:
+                if inclusive and node.has_value:
+                    yield node.key, node.value
+                pending.append((node, 0))
+
+        while pending:
+            node, index = pending.pop()
+            for child_id in node.child_ids[index:]:
+                yield from node.children[child_id].items()
+
+    def first_after(self, oid):
+        """
+        :return: (key, value) of the smallest key greater than oid, or None
+        """
+        return next(self.items_after(oid), None)
+
+    def first_at_or_after(self, oid):
+        """
+        :return: (key, value) of the smallest key >= oid, or None
+        """
+        return next(self.items_after(oid, inclusive=True), None)
+
+    def next_after_subtree(self, oid):
+        """
+        :return: (key, value) of the smallest key greater than oid that oid is not a prefix of, or None
+        """
+        return next(self.items_after(oid, skip_subtree=True), None)
@@ -0,0 +1,353 @@
+"""
+Updaters running their update cycles in a child process.
+
+The child owns the updater's database connections and runs reinit_data/update_data on its copy of the updater. After
+each cycle it writes the updater's data attributes to a snapshot file, memory-mapped by the agent process, and
+notifies the agent with the snapshot's generation. The agent loads the snapshot and publishes it to its own copy of
+the updater in a single step, so request handlers never observe a half-updated state.
+
+Snapshots are written to a temporary file and renamed over the previous one: the agent maps either the previous or the
+next snapshot, never a partially written one. The snapshot files live in a directory private to the agent's user, and
+are never opened through a symbolic link: the agent unpickles them.
+"""
+
+import asyncio
+import mmap
+import multiprocessing
+import os
+import pickle
+import signal
+import struct
+import tempfile
+import time
+
+from . import logger
+
+"""
+Directory the agent creates its private snapshot directory in. tmpfs when available: snapshots never touch a disk.
+"""
+SNAPSHOT_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+"""
+generation, snapshot time (seconds since the epoch), payload length
+"""
+SNAPSHOT_HEADER = struct.Struct('!QdQ')
+
+"""
+A child that has not published a snapshot for this many update intervals (and at least MIN_STALE_TIMEOUT seconds) is
+considered stuck and restarted.
+"""
+STALE_UPDATE_INTERVALS = 6
+MIN_STALE_TIMEOUT = 60
+
+"""
+Seconds a stopping child is given to exit, before being terminated, then killed. The agent polls it meanwhile, every
+STOP_POLL_INTERVAL seconds, rather than blocking the event loop in join().
+"""
+STOP_TIMEOUT = 1
+STOP_POLL_INTERVAL = 0.05
+
+"""
+Delay before restarting a child that exited (in seconds), doubled on each consecutive restart up to MAX_RESTART_DELAY.
+"""
+RESTART_DELAY = 1
+MAX_RESTART_DELAY = 60
+
+"""
+MIBUpdater attributes controlled by the agent process, never taken from a snapshot.
+"""
+PROCESS_LOCAL_ATTRIBUTES = frozenset((
+    'run_event',
+    'executor',
+    'frequency',
+    'enable_dynamic_frequency',
+    'reinit_rate',
+    'update_counter',
+    'redis_exception_happen',
+    'frequency_controller',
+    'loop_monitor',
+    'on_loop_time',
+    'cycle_loop_time',
+))
+
+
+def make_snapshot_dir(parent=SNAPSHOT_DIR):
+    """
+    :return: a new directory for the snapshot files of the agent, accessible to its user only
+    """
+    return tempfile.mkdtemp(prefix='snmp-subagent-{}-'.format(os.getpid()), dir=parent)
+
+
+def write_snapshot(path, generation, payload):
+    """
+    :param path: snapshot file
+    :param generation: generation of the snapshot
+    :param payload: pickled state
+    """
+    tmp_path = path + '.tmp'
+    # left over by a child killed while writing
+    try:
+        os.remove(tmp_path)
+    except FileNotFoundError:
+        pass
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600)
+    with open(fd, 'wb') as f:
+        f.write(SNAPSHOT_HEADER.pack(generation, time.time(), len(payload)))
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    """
+    :param path: snapshot file
+    :return: generation, snapshot time and the state of the snapshot
+    """
+    with open(os.open(path, os.O_RDONLY | os.O_NOFOLLOW), 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        generation, timestamp, length = SNAPSHOT_HEADER.unpack_from(mm, 0)
+        with memoryview(mm) as view, view[SNAPSHOT_HEADER.size:SNAPSHOT_HEADER.size + length] as payload:
+            state = pickle.loads(payload)
+    return generation, timestamp, state
+
+
+def dump_state(updater, unshared):
+    """
+    Pickle the data attributes of 'updater'. Attributes that cannot be pickled (e.g. database connections) are added to
+    'unshared' and left out from then on.
+
+    :return: the pickled state
+    """
+    state = {name: value for name, value in vars(updater).items() if name not in unshared}
+    try:
+        return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        for name, value in state.items():
+            try:
+                pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                unshared.add(name)
+        state = {name: value for name, value in state.items() if name not in unshared}
+        return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def run_child(updater, path, conn, agent_conn):
+    """
+    Child process entry point: run update cycles and publish a snapshot after each of them, until the agent closes
+    the pipe or asks to stop.
+    """
+    agent_conn.close()
+    # signals are the agent's business. Also detach from the event loop's wakeup fd inherited from the agent.
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    unshared = set(PROCESS_LOCAL_ATTRIBUTES)
+    generation = 0
+    # connections inherited from the agent are not ours to use.
+    reconnect = True
+    while True:
+        reinit = updater.update_counter > updater.reinit_rate
+        if not reinit:
+            updater.update_counter += 1
+        try:
+            updater.update(reinit, reconnect)
+            if reinit:
+                updater.update_counter = 0
+            reconnect = False
+
+            generation += 1
+            write_snapshot(path, generation, dump_state(updater, unshared))
+            conn.send(generation)
+        except (BrokenPipeError, EOFError):
+            # the agent is gone
+            return
+        except RuntimeError:
+            logger.exception("Updater process [{}] caught a RuntimeError during update_data(), will reinitialize "
+                             "the connections".format(type(updater).__name__))
+            reconnect = True
+        except Exception:
+            logger.exception("Updater process [{}] caught an unexpected exception during update_data()".format(
+                type(updater).__name__))
+
+        # wait for the next cycle. The agent sends new intervals, or None (or closes the pipe) to stop.
+        deadline = time.monotonic() + updater.frequency
+        while conn.poll(max(deadline - time.monotonic(), 0)):
+            try:
+                message = conn.recv()
+            except EOFError:
+                return
+            if message is None:
+                return
+            updater.frequency, updater.reinit_rate = message
+            deadline = min(deadline, time.monotonic() + updater.frequency)
+
+
+class UpdaterProcess:
+    """
+    Runs the update cycles of an updater in a child process and publishes its snapshots to the agent's copy of the
+    updater. The child is restarted if it exits or stops publishing snapshots.
+    """
+
+    def __init__(self, updater, snapshot_dir):
+        """
+        :param updater: MIBUpdater whose update cycles to run
+        :param snapshot_dir: directory private to the agent to write the snapshots in, see make_snapshot_dir
+        """
+        self.updater = updater
+        self.path = os.path.join(snapshot_dir, '{}-{}.snapshot'.format(type(updater).__name__, id(updater)))
+        self.process = None
+        self.conn = None
+        self.exited = None
+        # generation and time (seconds since the epoch) of the last published snapshot
+        self.generation = 0
+        self.snapshot_time = None
+        self._last_snapshot = None
+        self.restarts = 0
+        self._consecutive_restarts = 0
+        self.stale = False
+
+    @property
+    def stale_timeout(self):
+        return max(MIN_STALE_TIMEOUT, STALE_UPDATE_INTERVALS * self.updater.frequency)
+
+    def is_stale(self):
+        """
+        :return: True if no snapshot was published for longer than stale_timeout
+        """
+        return time.monotonic() - self._last_snapshot > self.stale_timeout
+
+    def start_process(self):
+        loop = asyncio.get_event_loop()
+        parent_conn, child_conn = multiprocessing.Pipe()
+        # fork: the child starts from the agent's copy of the updater, which need not be picklable (database
+        # connections are not), ruling out spawn and forkserver. Modules sharing locks with the agent's worker threads
+        # hold them free across the fork (see os.register_at_fork), so that the child does not inherit them held.
+        context = multiprocessing.get_context('fork')
+        self.process = context.Process(target=run_child, args=(self.updater, self.path, child_conn, parent_conn),
+                                       name='mib_updater-{}'.format(type(self.updater).__name__), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.exited = asyncio.Event()
+        self.generation = 0
+        self._last_snapshot = time.monotonic()
+        loop.add_reader(self.conn.fileno(), self._on_readable)
+        logger.info("Started updater process [{}] for [{}]".format(self.process.pid, type(self.updater).__name__))
+
+    async def wait_exit(self, timeout):
+        """
+        :return: True if the child exited within 'timeout' seconds
+        """
+        deadline = time.monotonic() + timeout
+        # is_alive() reaps the child once it exited
+        while self.process.is_alive():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(STOP_POLL_INTERVAL)
+        return True
+
+    async def stop_process(self):
+        if self.conn is not None:
+            asyncio.get_event_loop().remove_reader(self.conn.fileno())
+            # later children inherited our end of the pipe: ask explicitly rather than rely on closing it.
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+            self.conn.close()
+            self.conn = None
+        if self.process is not None:
+            if not await self.wait_exit(STOP_TIMEOUT):
+                self.process.terminate()
+                if not await self.wait_exit(STOP_TIMEOUT):
+                    self.process.kill()
+                    if not await self.wait_exit(STOP_TIMEOUT):
+                        logger.error("Updater process [{}] of [{}] did not exit".format(
+                            self.process.pid, type(self.updater).__name__))
+            self.process = None
+        for path in (self.path, self.path + '.tmp'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def set_intervals(self, frequency, reinit_rate):
+        """
+        Pass the updater's new intervals on to the child.
+        """
+        if self.conn is not None:
+            try:
+                self.conn.send((frequency, reinit_rate))
+            except OSError:
+                # the child is gone, its successor starts from the updater's intervals
+                pass
+
+    def _on_readable(self):
+        try:
+            generation = None
+            while self.conn.poll():
+                generation = self.conn.recv()
+        except (EOFError, OSError):
+            asyncio.get_event_loop().remove_reader(self.conn.fileno())
+            self.exited.set()
+            return
+        if generation is not None:
+            with self.updater.timed():
+                self.load_snapshot()
+
+    def load_snapshot(self):
+        try:
+            generation, timestamp, state = read_snapshot(self.path)
+        except Exception:
+            logger.exception("Failed to load the snapshot of [{}]".format(type(self.updater).__name__))
+            return
+        if generation <= self.generation:
+            return
+        # publish in a single step
+        self.updater.__dict__.update(state)
+        self.generation = generation
+        self.snapshot_time = timestamp
+        self._last_snapshot = time.monotonic()
+        if self.stale:
+            logger.info("Updater process of [{}] is publishing again".format(type(self.updater).__name__))
+            self.stale = False
+
+    async def run(self):
+        """
+        Background task taking the place of the updater's scheduled update cycles.
+        """
+        while self.updater.run_event.is_set():
+            self.start_process()
+            try:
+                await self._watch()
+            finally:
+                await self.stop_process()
+            if not self.updater.run_event.is_set():
+                break
+
+            delay = min(RESTART_DELAY * 2 ** self._consecutive_restarts, MAX_RESTART_DELAY)
+            self._consecutive_restarts += 1
+            self.restarts += 1
+            logger.warning("Restarting the updater process of [{}] in {}s (restart #{})".format(
+                type(self.updater).__name__, delay, self.restarts))
+            await asyncio.sleep(delay)
+
+    async def _watch(self):
+        while self.updater.run_event.is_set():
+            try:
+                await asyncio.wait_for(self.exited.wait(), self.updater.frequency)
+            except asyncio.TimeoutError:
+                pass
+            if self.exited.is_set():
+                await self.wait_exit(STOP_TIMEOUT)
+                logger.error("Updater process of [{}] exited with code [{}]".format(
+                    type(self.updater).__name__, self.process.exitcode))
+                return
+            if self.is_stale():
+                # data served from here on is out of date
+                self.stale = True
+                logger.error("Updater process of [{}] published no snapshot for {}s, last generation [{}]".format(
+                    type(self.updater).__name__, self.stale_timeout, self.generation))
+                return
+            if self.generation:
+                # healthy again, restart delays start over
+                self._consecutive_restarts = 0
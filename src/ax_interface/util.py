@@ -1,5 +1,6 @@
 import ipaddress
 import math
+import random
 import re
 
 from ax_interface import constants
@@ -137,3 +138,13 @@ def get_next_update_interval(execution_time, static_frequency):
     frequency_based_on_execution_time = min(frequency_based_on_execution_time, constants.MAX_UPDATE_INTERVAL)
 
     return max(static_frequency, frequency_based_on_execution_time)
+
+
+def get_jittered_interval(interval):
+    """
+    :param interval: update interval (in seconds)
+    :return: the interval, randomized by up to UPDATE_JITTER seconds or a quarter of the interval, whichever is less.
+        Never negative.
+    """
+    jitter = min(constants.UPDATE_JITTER, interval / 4)
+    return interval + random.uniform(-jitter, jitter)
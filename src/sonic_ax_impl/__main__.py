@@ -111,4 +111,10 @@ if __name__ == "__main__":
 
     from .main import main
 
-    main(enable_dynamic_frequency=args.get('enable_dynamic_frequency'), update_frequency=args.get('update_frequency'))
+    main(enable_dynamic_frequency=args.get('enable_dynamic_frequency'), update_frequency=args.get('update_frequency'),
+         enable_context_registration=args.get('enable_context_registration', False),
+         update_workers=args.get('update_workers', 0),
+         process_updaters=args.get('process_updaters', False),
+         updater_config=args.get('updater_config'),
+         idle_timeout=args.get('idle_timeout', 0),
+         update_duty_budget=args.get('update_duty_budget'))
@@ -9,10 +9,13 @@ import signal
 import sys
 
 import ax_interface
+from ax_interface.frequency import DEFAULT_UPDATE_DUTY_BUDGET
 from sonic_ax_impl.mibs import ieee802_1ab, Namespace
 from . import logger
 from .mibs.ietf import rfc1213, rfc2737, rfc2863, rfc3433, rfc4292, rfc4363
+from .mibs import port_counters, topology
 from .mibs.vendor import dell, cisco
+from .updater_config import UpdaterConfigUpdater
 
 # Background task update frequency ( in seconds )
 DEFAULT_UPDATE_FREQUENCY = 5
@@ -54,14 +57,37 @@ def shutdown(signame, agent):
     shutdown_task = event_loop.create_task(agent.shutdown())
 
 
-def main(enable_dynamic_frequency=False, update_frequency=None):
+def main(enable_dynamic_frequency=False, update_frequency=None, enable_context_registration=False, update_workers=0,
+         process_updaters=False, updater_config=None, idle_timeout=0, update_duty_budget=None):
     global event_loop
 
     try:
         Namespace.init_sonic_db_config()
 
         # initialize handler and set update frequency (or use the default)
-        agent = ax_interface.Agent(SonicMIB, enable_dynamic_frequency, update_frequency or DEFAULT_UPDATE_FREQUENCY, event_loop)
+        # with context registration, each namespace of a multi-ASIC system is also served as a context of its name.
+        # with update workers, the heavier updaters refresh their caches in a thread pool rather than on the event loop.
+        # with process updaters, they refresh them in child processes instead.
+        # with an idle timeout, updaters of subtrees nobody polls refresh at a slow rate until polled again.
+        # with dynamic frequency, the updaters together keep the event loop busy for at most the update duty budget.
+        agent = ax_interface.Agent(SonicMIB, enable_dynamic_frequency, update_frequency or DEFAULT_UPDATE_FREQUENCY, event_loop,
+                                   enable_context_registration, update_workers, process_updaters, idle_timeout,
+                                   update_duty_budget or DEFAULT_UPDATE_DUTY_BUDGET)
+
+        # the updaters share the port, LAG, VLAN, RIF and management maps, rebuilt when the topology changes
+        topology.service.enable()
+        # and the port counters, read once for the updaters refreshing at about the same time
+        port_counters.service.enable()
+        agent.add_stats_source('topology', topology.service.stats)
+        agent.add_stats_source('port_counters', port_counters.service.stats)
+
+        # per-updater intervals from CONFIG_DB (and the updater config file, if any), reloaded while running
+        config_updater = UpdaterConfigUpdater(agent.mib_table, updater_config)
+        try:
+            config_updater.update_data()
+        except Exception:
+            logger.exception("Failed to load the updater settings, using the defaults")
+        agent.mib_table.add_updater(config_updater)
 
         # add "shutdown" signal handlers
         # https://docs.python.org/3.5/library/asyncio-eventloop.html#set-signal-handlers-for-sigint-and-sigterm
@@ -1,7 +1,12 @@
+import contextlib
+import json
 import pprint
 import re
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 
+from swsscommon import swsscommon
 from swsscommon.swsscommon import SonicV2Connector
 from swsscommon.swsscommon import SonicDBConfig
 from sonic_py_common import port_util
@@ -30,6 +35,25 @@ TABLE_NAME_SEPARATOR_VBAR = '|'
 
 HOST_NAMESPACE_DB_IDX = 0
 
+# HGETALLs sent in one pipeline (one round trip) by Namespace.dbs_get_all_many
+GET_ALL_PIPELINE_SIZE = 256
+
+# HGETALL of each of KEYS in one round trip, for the swsscommon clients, which have no pipelines. The replies are
+# returned JSON encoded, as a single string.
+GET_ALL_MANY_SCRIPT = """
+local result = {}
+for i, key in ipairs(KEYS) do
+    result[i] = redis.call('HGETALL', key)
+end
+return {cjson.encode(result)}
+"""
+
+# keys Namespace.scan asks redis to look at per SCAN call (COUNT)
+SCAN_COUNT = 1000
+
+# threads sending the per namespace requests of Namespace.fan_out concurrently
+NAMESPACE_FANOUT_WORKERS = 8
+
 RIF_COUNTERS_AGGR_MAP = {
     "SAI_PORT_STAT_IF_IN_OCTETS": "SAI_ROUTER_INTERFACE_STAT_IN_OCTETS",
     "SAI_PORT_STAT_IF_IN_UCAST_PKTS": "SAI_ROUTER_INTERFACE_STAT_IN_PACKETS",
@@ -220,6 +244,25 @@ def split_sai_id_key(sai_id_key):
     else:
         return result[0], result[1]
 
+def get_namespace_if_range(if_range, if_id_map, lag_sai_map):
+    """
+    Per namespace counterpart of the interface updaters' if_range, for the
+    interfaces whose SAI id key records their namespace: ports and LAGs.
+    :param if_range: sorted list of (OID,)
+    :param if_id_map: { sai_id_key -> if_name }
+    :param lag_sai_map: { lag_name -> sai_id_key }
+    :return: { namespace -> sorted list of (OID,) }
+    """
+    namespace_oids = {}
+    if_names = list(if_id_map.items()) + [(sai_id_key, lag_name) for lag_name, sai_id_key in lag_sai_map.items()]
+    for sai_id_key, if_name in if_names:
+        sub_id = (get_index_from_str(if_name),)
+        namespace = split_sai_id_key(sai_id_key)[0]
+        namespace_oids.setdefault(namespace, set()).add(sub_id)
+    if_range_set = set(if_range)
+    return {namespace: sorted(oids & if_range_set) for namespace, oids in namespace_oids.items()}
+
+
 def config(**kwargs):
     global redis_kwargs
     redis_kwargs = {k:v for (k,v) in kwargs.items() if k in ['unix_socket_path', 'host', 'port']}
@@ -569,6 +612,28 @@ class Namespace:
     """
     db_config_loaded = False
 
+    """
+        Connectors that raised a RuntimeError (e.g. a redis connection error)
+        since they were last connected.
+    """
+    failed_dbs = set()
+
+    """
+        Thread pool of Namespace.fan_out, made again after a fork, and
+        a lock per connector: a connector is used by one request of the
+        pool at a time.
+    """
+    fanout_executor = None
+    fanout_pid = None
+    fanout_db_locks = {}
+    fanout_lock = threading.Lock()
+
+    """
+        SHA of GET_ALL_MANY_SCRIPT, per redis client it is loaded in:
+        { (db_conn, db_name) -> sha }
+    """
+    get_all_many_script_shas = {}
+
     @staticmethod
     def init_sonic_db_config():
         """
@@ -614,25 +679,143 @@ class Namespace:
 
     @staticmethod
     def connect_namespace_dbs(dbs):
+        """
+        Connect the dbs. Once some of them failed, only those are
+        connected again: a failure in one namespace leaves the
+        connections to the others alone.
+        """
+        failed_dbs = [db_conn for db_conn in dbs if db_conn in Namespace.failed_dbs]
         list_of_dbs = [APPL_DB, COUNTERS_DB, CONFIG_DB, STATE_DB, ASIC_DB, SNMP_OVERLAY_DB]
         for db_name in list_of_dbs:
-            Namespace.connect_all_dbs(dbs, db_name)
+            Namespace.connect_all_dbs(failed_dbs or dbs, db_name)
+        Namespace.failed_dbs.difference_update(failed_dbs)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def track_failure(db_conn):
+        """
+        Remember db_conn as failed if the block raises a RuntimeError.
+        """
+        try:
+            yield
+        except RuntimeError:
+            Namespace.failed_dbs.add(db_conn)
+            raise
 
     @staticmethod
     def connect_all_dbs(dbs, db_name):
         for db_conn in dbs:
             db_conn.connect(db_name)
 
+    @staticmethod
+    def acquire_fanout_locks():
+        """
+        Wait for the fan-out locks, so that a fork does not copy them
+        held by a thread the child would not have.
+        """
+        Namespace.fanout_lock.acquire()
+        for db_lock in Namespace.fanout_db_locks.values():
+            db_lock.acquire()
+
+    @staticmethod
+    def release_fanout_locks():
+        for db_lock in Namespace.fanout_db_locks.values():
+            db_lock.release()
+        Namespace.fanout_lock.release()
+
+    @staticmethod
+    def fan_out_submit(dbs, per_namespace_func, *args, **kwargs):
+        """
+        Submit per_namespace_func(db_conn, *args, **kwargs) for each of
+        dbs to the fan-out thread pool. Return the futures, in the
+        order of dbs.
+        """
+        with Namespace.fanout_lock:
+            if Namespace.fanout_pid != os.getpid():
+                # threads and locks inherited through a fork belong to the parent
+                Namespace.fanout_executor = ThreadPoolExecutor(max_workers=NAMESPACE_FANOUT_WORKERS,
+                                                               thread_name_prefix='namespace-fanout')
+                Namespace.fanout_pid = os.getpid()
+                Namespace.fanout_db_locks = {}
+            db_locks = [Namespace.fanout_db_locks.setdefault(db_conn, threading.Lock()) for db_conn in dbs]
+            executor = Namespace.fanout_executor
+
+        def call(db_conn, db_lock):
+            with db_lock, Namespace.track_failure(db_conn):
+                return per_namespace_func(db_conn, *args, **kwargs)
+
+        return [executor.submit(call, db_conn, db_lock) for db_conn, db_lock in zip(dbs, db_locks)]
+
+    @staticmethod
+    def fan_out(dbs, per_namespace_func, *args, **kwargs):
+        """
+        per_namespace_func(db_conn, *args, **kwargs) executed on all
+        namespace DBs at once: the latency is the one of the slowest
+        namespace rather than the sum of them.
+        Return the results in the order of dbs once all of them are
+        done, or raise the exception of the first failed namespace.
+        Meant for bulk operations (key scans, pipelined hashes): for a
+        single hash, the pool hop costs more than it saves.
+        """
+        if len(dbs) == 1:
+            with Namespace.track_failure(dbs[0]):
+                return [per_namespace_func(dbs[0], *args, **kwargs)]
+        futures = Namespace.fan_out_submit(dbs, per_namespace_func, *args, **kwargs)
+        wait(futures)
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def scan(db_conn, db_name, pattern='*', count=SCAN_COUNT):
+        """
+        Generator of the keys of db_conn matching pattern, a list per
+        SCAN call: unlike KEYS, redis does not block for the whole
+        keyspace, and the caller may yield between the lists.
+        A key can be listed more than once, some of the lists be empty.
+        """
+        redis_client = db_conn.get_redis_client(db_name)
+        if not hasattr(redis_client, 'scan'):
+            # Client without SCAN: all the keys at once.
+            with Namespace.track_failure(db_conn):
+                keys = db_conn.keys(db_name, pattern)
+            yield keys or []
+            return
+        cursor = 0
+        while True:
+            with Namespace.track_failure(db_conn):
+                cursor, keys = redis_client.scan(cursor, pattern, count)
+            yield keys
+            if int(cursor) == 0:
+                break
+
+    @staticmethod
+    def dbs_scan(dbs, db_name, pattern='*', count=SCAN_COUNT):
+        """
+        scan function executed on global and all namespace DBs.
+        Generator of (db index, keys), a list of keys per SCAN call.
+        """
+        for db_index, db_conn in enumerate(dbs):
+            for keys in Namespace.scan(db_conn, db_name, pattern, count):
+                yield db_index, keys
+
+    @staticmethod
+    def scan_all(db_conn, db_name, pattern='*'):
+        """
+        All the keys of db_conn matching pattern, each one once.
+        """
+        # A key listed twice by SCAN is kept once
+        keys = {}
+        for scanned_keys in Namespace.scan(db_conn, db_name, pattern):
+            keys.update(dict.fromkeys(scanned_keys))
+        return list(keys)
+
     @staticmethod
     def dbs_keys(dbs, db_name, pattern='*'):
         """
         db keys function execute on global and all namespace DBs.
         """
         result_keys=[]
-        for db_conn in dbs:
-            keys = db_conn.keys(db_name, pattern)
-            if keys is not None:
-                result_keys.extend(keys)
+        for keys in Namespace.fan_out(dbs, Namespace.scan_all, db_name, pattern):
+            result_keys.extend(keys)
         return result_keys
 
     @staticmethod
@@ -643,11 +826,8 @@ class Namespace:
         and namespace(db index).
         """
         result_keys = {}
-        for db_index in range(len(dbs)):
-            keys = dbs[db_index].keys(db_name, pattern)
-            if keys is not None:
-                keys_ns = dict.fromkeys(keys, db_index)
-                result_keys.update(keys_ns)
+        for db_index, keys in enumerate(Namespace.fan_out(dbs, Namespace.scan_all, db_name, pattern)):
+            result_keys.update(dict.fromkeys(keys, db_index))
         return result_keys
 
     @staticmethod
@@ -664,12 +844,127 @@ class Namespace:
             tmp_kwargs['blocking'] = False
         else:
             tmp_kwargs = kwargs
+        # A single hash: a pool hop per namespace would cost more than
+        # it saves, the namespaces are queried one after the other.
         for db_conn in dbs:
-            ns_result = db_conn.get_all(db_name, _hash, *args, **tmp_kwargs)
+            with Namespace.track_failure(db_conn):
+                ns_result = db_conn.get_all(db_name, _hash, *args, **tmp_kwargs)
             if ns_result:
                 result.update(ns_result)
         return result
 
+    @staticmethod
+    def dbs_get_all_first(dbs, db_name, _hash, *args, **kwargs):
+        """
+        dbs_get_all of a hash present in one namespace at most (e.g.
+        the entry of an interface): return it from the first namespace
+        holding it, without querying the others.
+        """
+        if len(dbs) > 1:
+            kwargs = dict(kwargs, blocking=False)
+        for db_conn in dbs:
+            with Namespace.track_failure(db_conn):
+                ns_result = db_conn.get_all(db_name, _hash, *args, **kwargs)
+            if ns_result:
+                return ns_result
+        return {}
+
+    @staticmethod
+    def get_all_many(db_conn, db_name, keys, chunk_size=GET_ALL_PIPELINE_SIZE):
+        """
+        HGETALL of each of keys in the db_conn namespace, pipelined
+        chunk_size at a time. Return the hashes in the order of keys,
+        {} for the missing ones.
+        """
+        redis_client = db_conn.get_redis_client(db_name)
+        if not hasattr(redis_client, 'pipeline'):
+            if keys and hasattr(swsscommon, 'runRedisScript'):
+                return Namespace.get_all_many_script(db_conn, db_name, keys, chunk_size)
+            # Client without pipelines nor scripts: one round trip per hash.
+            return [db_conn.get_all(db_name, key, blocking=False) or {} for key in keys]
+        result = []
+        for start in range(0, len(keys), chunk_size):
+            pipeline = redis_client.pipeline(transaction=False)
+            for key in keys[start:start + chunk_size]:
+                pipeline.hgetall(key)
+            result.extend(ns_hash or {} for ns_hash in pipeline.execute())
+        return result
+
+    @staticmethod
+    def get_all_many_script(db_conn, db_name, keys, chunk_size=GET_ALL_PIPELINE_SIZE):
+        """
+        get_all_many for a swsscommon DBConnector: the HGETALLs of each
+        chunk of keys are run by GET_ALL_MANY_SCRIPT, in one round trip.
+        The script is loaded once per client, and again once redis
+        forgot it (e.g. after a restart).
+        """
+        redis_client = db_conn.get_redis_client(db_name)
+        result = []
+        for start in range(0, len(keys), chunk_size):
+            chunk_keys = list(keys[start:start + chunk_size])
+            sha = Namespace.get_all_many_script_shas.get((db_conn, db_name))
+            if sha is None:
+                sha = swsscommon.loadRedisScript(redis_client, GET_ALL_MANY_SCRIPT)
+                Namespace.get_all_many_script_shas[(db_conn, db_name)] = sha
+            try:
+                reply = swsscommon.runRedisScript(redis_client, sha, chunk_keys, [])
+            except RuntimeError as e:
+                if 'NOSCRIPT' not in str(e):
+                    raise
+                sha = swsscommon.loadRedisScript(redis_client, GET_ALL_MANY_SCRIPT)
+                Namespace.get_all_many_script_shas[(db_conn, db_name)] = sha
+                reply = swsscommon.runRedisScript(redis_client, sha, chunk_keys, [])
+            # [[field, value, ...], ...]; cjson encodes an empty reply as {}
+            for fields in json.loads(next(iter(reply))):
+                result.append(dict(zip(fields[::2], fields[1::2])) if fields else {})
+        return result
+
+    @staticmethod
+    def dbs_get_all_many(dbs, db_name, keys, chunk_size=GET_ALL_PIPELINE_SIZE):
+        """
+        dbs_get_all of many hashes at once, without blocking on the
+        missing ones. The HGETALLs are pipelined per namespace DB, and
+        the namespace DBs queried concurrently.
+        Return the hashes in the order of keys, each merged over the
+        namespaces.
+        """
+        keys = list(keys)
+        result = None
+        for ns_result in Namespace.fan_out(dbs, Namespace.get_all_many, db_name, keys, chunk_size):
+            if result is None:
+                result = ns_result
+                continue
+            for _hash, ns_hash in zip(result, ns_result):
+                _hash.update(ns_hash)
+        return result if result is not None else [{} for _ in keys]
+
+    @staticmethod
+    def dbs_get_all_many_namespace(dbs, db_name, namespace_keys, chunk_size=GET_ALL_PIPELINE_SIZE):
+        """
+        dbs_get_all_many of hashes whose namespace is known: each one
+        is read in its own namespace only.
+        namespace_keys is a list of (namespace, key). Return the hashes
+        in the same order.
+        """
+        result = [None] * len(namespace_keys)
+        # { namespace -> positions of its keys in namespace_keys }
+        namespace_positions = {}
+        for position, (namespace, _) in enumerate(namespace_keys):
+            namespace_positions.setdefault(namespace, []).append(position)
+        namespace_db_map = Namespace.get_namespace_db_map(dbs)
+        ns_dbs = [namespace_db_map[namespace] for namespace in namespace_positions]
+
+        def get_all_many(db_conn):
+            positions = namespace_positions[db_conn.namespace]
+            return Namespace.get_all_many(db_conn, db_name, [namespace_keys[position][1] for position in positions],
+                                          chunk_size)
+
+        # the namespaces are queried concurrently
+        for db_conn, ns_result in zip(ns_dbs, Namespace.fan_out(ns_dbs, get_all_many)):
+            for position, ns_hash in zip(namespace_positions[db_conn.namespace], ns_result):
+                result[position] = ns_hash
+        return result
+
     @staticmethod
     def get_non_host_dbs(dbs):
         """
@@ -692,7 +987,8 @@ class Namespace:
         # list of return values
         result_list = []
         for db_conn in Namespace.get_non_host_dbs(dbs):
-            ns_tuple = per_namespace_func(db_conn)
+            with Namespace.track_failure(db_conn):
+                ns_tuple = per_namespace_func(db_conn)
             for idx in range(len(ns_tuple)):
                 if idx not in result_map:
                     result_map[idx] = ns_tuple[idx]
@@ -702,6 +998,17 @@ class Namespace:
             result_list.append(ns_tuple_dict)
         return result_list
 
+    @staticmethod
+    def get_contexts(dbs):
+        """
+        Return the AgentX contexts served for the given dbs: one per
+        namespace holding interface related tables, named after it.
+        Single namespace dbs are served in the default context only.
+        """
+        if len(dbs) == 1:
+            return ()
+        return tuple(db_conn.namespace for db_conn in Namespace.get_non_host_dbs(dbs))
+
     @staticmethod
     def dbs_get_bridge_port_map(dbs, db_name):
         """
@@ -709,7 +1016,8 @@ class Namespace:
         """
         if_br_oid_map = {}
         for db_conn in Namespace.get_non_host_dbs(dbs):
-            if_br_oid_map_ns = port_util.get_bridge_port_map(db_conn)
+            with Namespace.track_failure(db_conn):
+                if_br_oid_map_ns = port_util.get_bridge_port_map(db_conn)
             if_br_oid_map.update(if_br_oid_map_ns)
         return if_br_oid_map
 
@@ -721,3 +1029,8 @@ class Namespace:
             if vlan_obj is not None:
                 return port_util.get_vlan_id_from_bvid(db_conn, bvid)
         return None
+
+
+# updater processes are forked while fan-out threads may hold the locks: fork once they are free.
+os.register_at_fork(before=Namespace.acquire_fanout_locks, after_in_parent=Namespace.release_fanout_locks,
+                    after_in_child=Namespace.release_fanout_locks)
@@ -8,6 +8,7 @@ from bisect import bisect_right
 from sonic_py_common import port_util
 from sonic_ax_impl import mibs, logger
 from sonic_ax_impl.mibs import Namespace
+from sonic_ax_impl.mibs.topology import service as topology_service
 from ax_interface.util import ip2byte_tuple
 from ax_interface import MIBMeta, SubtreeMIBEntry, MIBEntry, MIBUpdater, ValueType
 
@@ -176,17 +177,18 @@ class LocPortUpdater(MIBUpdater):
         """
         Subclass update interface information
         """
+        topology = topology_service.snapshot(self.db_conn)
         self.if_name_map, \
         self.if_alias_map, \
         self.if_id_map, \
-        self.oid_name_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_interface_tables, self.db_conn)
+        self.oid_name_map = topology.interfaces
 
         self.mgmt_oid_name_map, \
-        self.mgmt_alias_map = mibs.init_mgmt_interface_tables(self.db_conn[0])
+        self.mgmt_alias_map = topology.mgmt
 
         # merge dataplane and mgmt ports
-        self.oid_name_map.update(self.mgmt_oid_name_map)
-        self.if_alias_map.update(self.mgmt_alias_map)
+        self.oid_name_map = {**self.oid_name_map, **self.mgmt_oid_name_map}
+        self.if_alias_map = {**self.if_alias_map, **self.mgmt_alias_map}
 
         self.if_range = []
         # get local port kvs from APP_BD's PORT_TABLE
@@ -212,7 +214,7 @@ class LocPortUpdater(MIBUpdater):
         else:
             return None
 
-        return Namespace.dbs_get_all(self.db_conn, db, if_table, blocking=True)
+        return Namespace.dbs_get_all_first(self.db_conn, db, if_table, blocking=True)
 
     def update_interface_data(self, if_name):
         """
@@ -413,14 +415,15 @@ class LLDPRemTableUpdater(MIBUpdater):
         """
         Subclass update interface information
         """
+        topology = topology_service.snapshot(self.db_conn)
         self.if_name_map, \
         self.if_alias_map, \
         self.if_id_map, \
-        self.oid_name_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_interface_tables, self.db_conn)
+        self.oid_name_map = topology.interfaces
 
-        self.mgmt_oid_name_map, _ = mibs.init_mgmt_interface_tables(self.db_conn[0])
+        self.mgmt_oid_name_map, _ = topology.mgmt
 
-        self.oid_name_map.update(self.mgmt_oid_name_map)
+        self.oid_name_map = {**self.oid_name_map, **self.mgmt_oid_name_map}
 
     def get_next(self, sub_id):
         """
@@ -440,8 +443,10 @@ class LLDPRemTableUpdater(MIBUpdater):
 
         self.if_range = []
         self.lldp_counters = {}
-        for if_oid, if_name in self.oid_name_map.items():
-            lldp_kvs = Namespace.dbs_get_all(self.db_conn, mibs.APPL_DB, mibs.lldp_entry_table(if_name))
+        if_oid_names = list(self.oid_name_map.items())
+        lldp_entries = Namespace.dbs_get_all_many(self.db_conn, mibs.APPL_DB,
+                                                  [mibs.lldp_entry_table(if_name) for _, if_name in if_oid_names])
+        for (if_oid, if_name), lldp_kvs in zip(if_oid_names, lldp_entries):
             if not lldp_kvs:
                 continue
             try:
@@ -576,11 +581,12 @@ class LLDPRemManAddrUpdater(MIBUpdater):
         """
         Subclass reinit data routine.
         """
-        _, _, _, self.oid_name_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_interface_tables, self.db_conn)
+        topology = topology_service.snapshot(self.db_conn)
+        _, _, _, self.oid_name_map = topology.interfaces
 
-        self.mgmt_oid_name_map, _ = mibs.init_mgmt_interface_tables(self.db_conn[0])
+        self.mgmt_oid_name_map, _ = topology.mgmt
 
-        self.oid_name_map.update(self.mgmt_oid_name_map)
+        self.oid_name_map = {**self.oid_name_map, **self.mgmt_oid_name_map}
 
         # establish connection to application database.
         Namespace.connect_all_dbs(self.db_conn, mibs.APPL_DB)
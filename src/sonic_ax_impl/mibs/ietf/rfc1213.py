@@ -6,7 +6,10 @@ from bisect import bisect_right
 
 from sonic_ax_impl import mibs
 from sonic_ax_impl.mibs import Namespace
+from sonic_ax_impl.mibs.port_counters import service as port_counter_cache
+from sonic_ax_impl.mibs.topology import service as topology_service
 from ax_interface.mib import MIBMeta, ValueType, MIBUpdater, MIBEntry, SubtreeMIBEntry, OverlayAdpaterMIBEntry, OidMIBEntry
+from ax_interface.mib import get_next_in_sorted
 from ax_interface.encodings import ObjectIdentifier
 from ax_interface.util import mac_decimals, ip2byte_tuple
 
@@ -46,6 +49,9 @@ class DbTables(int, Enum):
     # ifOutQLen ::= { ifEntry 21 }
     SAI_PORT_STAT_IF_OUT_QLEN = 21
 
+
+port_counter_cache.register(table.name for table in DbTables)
+
 @unique
 class IfTypes(int, Enum):
     """ IANA ifTypes """
@@ -127,7 +133,14 @@ class ArpUpdater(MIBUpdater):
             return None
         return self.arp_dest_list[right]
 
+    def get_next_hinted(self, sub_id, hint):
+        return get_next_in_sorted(self.arp_dest_list, sub_id, hint)
+
 class NextHopUpdater(MIBUpdater):
+
+    # route keys looked at per SCAN call, between two yields of update_data_chunks
+    scan_count = mibs.SCAN_COUNT
+
     def __init__(self):
         super().__init__()
         self.db_conn = Namespace.init_namespace_dbs()
@@ -137,37 +150,37 @@ class NextHopUpdater(MIBUpdater):
     def reinit_connection(self):
         Namespace.connect_all_dbs(self.db_conn, mibs.APPL_DB)
 
-    def update_data(self):
+    def update_data_chunks(self):
         """
         Update redis (caches config)
-        Pulls the table references for each interface.
-        """
-        self.nexthop_map = {}
-        self.route_list = []
-
-        route_entries = Namespace.dbs_keys(self.db_conn, mibs.APPL_DB, "ROUTE_TABLE:*")
-        if not route_entries:
-            return
-
-        for route_entry in route_entries:
-            routestr = route_entry
-            ipnstr = routestr[len("ROUTE_TABLE:"):]
-            if ipnstr == "0.0.0.0/0":
-                ipn = ipaddress.ip_network(ipnstr)
-                ent = Namespace.dbs_get_all(self.db_conn, mibs.APPL_DB, routestr, blocking=False)
-                if ent:
-                    nexthops = ent.get("nexthop", None)
-                    if nexthops is None:
-                        mibs.logger.warning("Route has no nexthop: {} {}".format(routestr, str(ent)))
-                        continue
-                    for nh in nexthops.split(','):
-                        # TODO: if ipn contains IP range, create more sub_id here
-                        sub_id = ip2byte_tuple(ipn.network_address)
-                        self.route_list.append(sub_id)
-                        self.nexthop_map[sub_id] = ipaddress.ip_address(nh).packed
-                        break # Just need the first nexthop
-
-        self.route_list.sort()
+        Pulls the table references for each interface, a SCAN call of route keys per slice.
+        The routes are published once all of them are scanned.
+        """
+        nexthop_map = {}
+
+        for db_index, route_entries in Namespace.dbs_scan(self.db_conn, mibs.APPL_DB, "ROUTE_TABLE:*",
+                                                           self.scan_count):
+            for route_entry in route_entries:
+                routestr = route_entry
+                ipnstr = routestr[len("ROUTE_TABLE:"):]
+                if ipnstr == "0.0.0.0/0":
+                    ipn = ipaddress.ip_network(ipnstr)
+                    # read in the namespace the route was found in
+                    ent = Namespace.dbs_get_all([self.db_conn[db_index]], mibs.APPL_DB, routestr, blocking=False)
+                    if ent:
+                        nexthops = ent.get("nexthop", None)
+                        if nexthops is None:
+                            mibs.logger.warning("Route has no nexthop: {} {}".format(routestr, str(ent)))
+                            continue
+                        for nh in nexthops.split(','):
+                            # TODO: if ipn contains IP range, create more sub_id here
+                            sub_id = ip2byte_tuple(ipn.network_address)
+                            nexthop_map[sub_id] = ipaddress.ip_address(nh).packed
+                            break # Just need the first nexthop
+            yield
+
+        self.nexthop_map = nexthop_map
+        self.route_list = sorted(nexthop_map)
 
     def nexthop(self, sub_id):
         return self.nexthop_map.get(sub_id, None)
@@ -179,6 +192,9 @@ class NextHopUpdater(MIBUpdater):
 
         return self.route_list[right]
 
+    def get_next_hinted(self, sub_id, hint):
+        return get_next_in_sorted(self.route_list, sub_id, hint)
+
 class IpMib(metaclass=MIBMeta, prefix='.1.3.6.1.2.1.4'):
     arp_updater = ArpUpdater()
     nexthop_updater = NextHopUpdater()
@@ -193,6 +209,12 @@ class InterfacesUpdater(MIBUpdater):
 
     RFC1213_MAX_SPEED = 4294967295
 
+    offload_update = True
+    process_update = True
+
+    # interfaces whose counters are read between two yields of update_data_chunks
+    update_chunk_size = 64
+
     def __init__(self):
         super().__init__()
         self.db_conn = Namespace.init_namespace_dbs()
@@ -216,6 +238,8 @@ class InterfacesUpdater(MIBUpdater):
         self.if_id_map = {}
         self.oid_name_map = {}
         self.rif_counters = {}
+        # { namespace -> if_range of the ports and LAGs within it }
+        self.namespace_if_range = {}
 
         self.namespace_db_map = Namespace.get_namespace_db_map(self.db_conn)
 
@@ -226,37 +250,38 @@ class InterfacesUpdater(MIBUpdater):
         """
         Subclass update interface information
         """
+        topology = topology_service.snapshot(self.db_conn)
         self.if_name_map, \
         self.if_alias_map, \
         self.if_id_map, \
-        self.oid_name_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_interface_tables, self.db_conn)
+        self.oid_name_map = topology.interfaces
         """
         db_conn - will have db_conn to all namespace DBs and
         global db. First db in the list is global db.
         Use first global db to get management interface table.
         """
         self.mgmt_oid_name_map, \
-        self.mgmt_alias_map = mibs.init_mgmt_interface_tables(self.db_conn[0])
+        self.mgmt_alias_map = topology.mgmt
 
         self.vlan_name_map, \
         self.vlan_oid_sai_map, \
-        self.vlan_oid_name_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_vlan_tables, self.db_conn)
+        self.vlan_oid_name_map = topology.vlans
 
         self.rif_port_map, \
-        self.port_rif_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_rif_tables, self.db_conn)
+        self.port_rif_map = topology.rifs
 
         self.lag_name_if_name_map, \
         self.if_name_lag_name_map, \
         self.oid_lag_name_map, \
-        self.lag_sai_map, self.sai_lag_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_lag_tables, self.db_conn)
+        self.lag_sai_map, self.sai_lag_map = topology.lags
 
-    def update_data(self):
+    def update_data_chunks(self):
         """
         Update redis (caches config)
         Pulls the table references for each interface.
         """
 
-        self.update_if_counters()
+        yield from self.update_if_counters()
         self.update_rif_counters()
 
         self.aggregate_counters()
@@ -266,26 +291,26 @@ class InterfacesUpdater(MIBUpdater):
                                list(self.mgmt_oid_name_map.keys()) +
                                list(self.vlan_oid_name_map.keys()))
         self.if_range = [(i,) for i in self.if_range]
+        self.namespace_if_range = mibs.get_namespace_if_range(self.if_range, self.if_id_map, self.lag_sai_map)
 
     def update_if_counters(self):
-        for sai_id_key in self.if_id_map:
-            namespace, sai_id = mibs.split_sai_id_key(sai_id_key)
-            if_idx = mibs.get_index_from_str(self.if_id_map[sai_id_key])
-            counters_db_data = self.namespace_db_map[namespace].get_all(mibs.COUNTERS_DB,
-                                                                        mibs.counter_table(sai_id))
-            if counters_db_data is None:
-                counters_db_data = {}
-            self.if_counters[if_idx] = {
-                counter: int(value) for counter, value in counters_db_data.items()
-            }
+        """
+        Generator reading the counters of update_chunk_size interfaces between yields, through the port counter cache.
+        The counters are published once all of them are read.
+        """
+        port_counters = yield from port_counter_cache.counters_chunks(self.db_conn, self.if_id_map,
+                                                                      self.update_chunk_size)
+        self.if_counters = {
+            mibs.get_index_from_str(if_name): port_counters[sai_id_key]
+            for sai_id_key, if_name in self.if_id_map.items()
+        }
 
     def update_rif_counters(self):
         rif_sai_ids = list(self.rif_port_map) + list(self.vlan_name_map)
-        for sai_id in rif_sai_ids:
-            counters_db_data = Namespace.dbs_get_all(self.db_conn, mibs.COUNTERS_DB,
-                                                     mibs.counter_table(mibs.split_sai_id_key(sai_id)[1]))
-            if counters_db_data is None:
-                counters_db_data = {}
+        counters = Namespace.dbs_get_all_many(
+            self.db_conn, mibs.COUNTERS_DB,
+            [mibs.counter_table(mibs.split_sai_id_key(sai_id)[1]) for sai_id in rif_sai_ids])
+        for sai_id, counters_db_data in zip(rif_sai_ids, counters):
             self.rif_counters[sai_id] = {
                 counter: int(value) for counter, value in counters_db_data.items()
             }
@@ -300,6 +325,15 @@ class InterfacesUpdater(MIBUpdater):
             return None
         return self.if_range[right]
 
+    def get_next_hinted(self, sub_id, hint):
+        return get_next_in_sorted(self.if_range, sub_id, hint)
+
+    def get_contexts(self):
+        return Namespace.get_contexts(self.db_conn)
+
+    def get_next_in_context(self, context, sub_id, hint=None):
+        return get_next_in_sorted(self.namespace_if_range.get(context, []), sub_id, hint)
+
     def get_oid(self, sub_id):
         """
         :param sub_id: The 1-based sub-identifier query.
@@ -368,19 +402,24 @@ class InterfacesUpdater(MIBUpdater):
         for rif_sai_id, port_sai_id in self.rif_port_map.items():
             if port_sai_id in self.if_id_map:
                 port_idx = mibs.get_index_from_str(self.if_id_map[port_sai_id])
+                # the cached port counters are shared: add to a copy
+                port_counters = dict(self.if_counters[port_idx])
                 for port_counter_name, rif_counter_name in mibs.RIF_DROPS_AGGR_MAP.items():
-                    self.if_counters[port_idx][port_counter_name] = \
-                    self.if_counters[port_idx].get(port_counter_name, 0) + \
+                    port_counters[port_counter_name] = \
+                    port_counters.get(port_counter_name, 0) + \
                     self.rif_counters[rif_sai_id].get(rif_counter_name, 0)
+                self.if_counters[port_idx] = port_counters
 
         for vlan_sai_id, vlan_name in self.vlan_name_map.items():
+            vlan_idx = mibs.get_index_from_str(vlan_name)
+            vlan_rif_counters = self.rif_counters[vlan_sai_id]
+            # build a new dict rather than updating the cached one in place
+            vlan_counters = dict(self.if_counters.get(vlan_idx, {}))
             for port_counter_name, rif_counter_name in mibs.RIF_COUNTERS_AGGR_MAP.items():
-                vlan_idx = mibs.get_index_from_str(vlan_name)
-                vlan_rif_counters = self.rif_counters[vlan_sai_id]
                 if rif_counter_name in vlan_rif_counters:
-                    self.if_counters.setdefault(vlan_idx, {})
-                    self.if_counters[vlan_idx][port_counter_name] = \
-                        vlan_rif_counters[rif_counter_name]
+                    vlan_counters[port_counter_name] = vlan_rif_counters[rif_counter_name]
+            if vlan_counters:
+                self.if_counters[vlan_idx] = vlan_counters
 
 
     def get_counter(self, sub_id, table_name):
@@ -470,7 +509,7 @@ class InterfacesUpdater(MIBUpdater):
         else:
             return None
 
-        return Namespace.dbs_get_all(self.db_conn, db, if_table, blocking=True)
+        return Namespace.dbs_get_all_first(self.db_conn, db, if_table, blocking=True)
 
     def _get_if_entry_state_db(self, sub_id):
         """
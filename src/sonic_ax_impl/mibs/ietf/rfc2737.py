@@ -10,6 +10,7 @@ from ax_interface import MIBMeta, MIBUpdater, ValueType, SubtreeMIBEntry
 
 from sonic_ax_impl import mibs
 from sonic_ax_impl.mibs import Namespace
+from sonic_ax_impl.mibs.topology import service as topology_service
 
 from .physical_entity_sub_oid_generator import CHASSIS_SUB_ID
 from .physical_entity_sub_oid_generator import CHASSIS_MGMT_SUB_ID
@@ -216,6 +217,9 @@ class PhysicalTableMIBUpdater(MIBUpdater):
     # to this list, and these types will be used for create instance for each type
     physical_entity_updater_types = []
 
+    # the inventory rarely changes
+    default_frequency = 60
+
     def __init__(self):
         super().__init__()
 
@@ -768,8 +772,7 @@ class XcvrCacheUpdater(PhysicalEntityCacheUpdater):
 
     def reinit_data(self):
         # update interface maps
-        _, self.if_alias_map, _, _ = \
-            Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_interface_tables, Namespace.init_namespace_dbs())
+        self.if_alias_map = topology_service.snapshot().interfaces.if_alias_map
         PhysicalEntityCacheUpdater.reinit_data(self)
 
     def _update_entity_cache(self, interface):
@@ -3,7 +3,10 @@ from bisect import bisect_right
 
 from sonic_ax_impl import mibs
 from ax_interface.mib import MIBMeta, MIBUpdater, ValueType, SubtreeMIBEntry, OverlayAdpaterMIBEntry, OidMIBEntry
+from ax_interface.mib import get_next_in_sorted
 from sonic_ax_impl.mibs import Namespace
+from sonic_ax_impl.mibs.port_counters import service as port_counter_cache
+from sonic_ax_impl.mibs.topology import service as topology_service
 
 @unique
 class DbTables32(int, Enum):
@@ -80,7 +83,13 @@ class DbTables(int, Enum):
     SAI_PORT_STAT_IF_OUT_QLEN = 21
 
 
+port_counter_cache.register(table.name for tables in (DbTables32, DbTables64, DbTables) for table in tables)
+
+
 class InterfaceMIBUpdater(MIBUpdater):
+
+    offload_update = True
+
     def __init__(self):
         super().__init__()
 
@@ -100,6 +109,9 @@ class InterfaceMIBUpdater(MIBUpdater):
         self.if_id_map = {}
         self.oid_name_map = {}
         self.rif_counters = {}
+        self.lag_sai_map = {}
+        # { namespace -> if_range of the ports and LAGs within it }
+        self.namespace_if_range = {}
 
         self.namespace_db_map = Namespace.get_namespace_db_map(self.db_conn)
 
@@ -110,25 +122,26 @@ class InterfaceMIBUpdater(MIBUpdater):
         """
         Subclass update interface information
         """
+        topology = topology_service.snapshot(self.db_conn)
         self.if_name_map, \
         self.if_alias_map, \
         self.if_id_map, \
-        self.oid_name_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_interface_tables, self.db_conn)
+        self.oid_name_map = topology.interfaces
 
         self.lag_name_if_name_map, \
         self.if_name_lag_name_map, \
-        self.oid_lag_name_map, _, _ = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_lag_tables, self.db_conn)
+        self.oid_lag_name_map, _, _ = topology.lags
         """
         db_conn - will have db_conn to all namespace DBs and
         global db. First db in the list is global db.
         Use first global db to get management interface table.
         """
         self.mgmt_oid_name_map, \
-        self.mgmt_alias_map = mibs.init_mgmt_interface_tables(self.db_conn[0])
+        self.mgmt_alias_map = topology.mgmt
 
         self.vlan_name_map, \
         self.vlan_oid_sai_map, \
-        self.vlan_oid_name_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_vlan_tables, self.db_conn)
+        self.vlan_oid_name_map = topology.vlans
 
         self.if_range = sorted(list(self.oid_name_map.keys()) +
                                list(self.oid_lag_name_map.keys()) +
@@ -141,25 +154,23 @@ class InterfaceMIBUpdater(MIBUpdater):
         Update redis (caches config)
         Pulls the table references for each interface.
         """
-        for sai_id_key in self.if_id_map:
-            namespace, sai_id = mibs.split_sai_id_key(sai_id_key)
-            if_idx = mibs.get_index_from_str(self.if_id_map[sai_id_key])
-            counter_table = self.namespace_db_map[namespace].get_all(mibs.COUNTERS_DB, \
-                    mibs.counter_table(sai_id))
-            if counter_table is None:
-                counter_table = {}
-            self.if_counters[if_idx] = counter_table
+        port_counters = port_counter_cache.counters(self.db_conn, self.if_id_map)
+        self.if_counters = {
+            mibs.get_index_from_str(if_name): port_counters[sai_id_key]
+            for sai_id_key, if_name in self.if_id_map.items()
+        }
 
         self.lag_name_if_name_map, \
         self.if_name_lag_name_map, \
         self.oid_lag_name_map, \
-        self.lag_sai_map, _ = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_lag_tables, self.db_conn)
+        self.lag_sai_map, _ = topology_service.snapshot(self.db_conn).lags
 
         self.if_range = sorted(list(self.oid_name_map.keys()) +
                                list(self.oid_lag_name_map.keys()) +
                                list(self.mgmt_oid_name_map.keys()) +
                                list(self.vlan_oid_name_map.keys()))
         self.if_range = [(i,) for i in self.if_range]
+        self.namespace_if_range = mibs.get_namespace_if_range(self.if_range, self.if_id_map, self.lag_sai_map)
 
     def get_next(self, sub_id):
         """
@@ -171,6 +182,15 @@ class InterfaceMIBUpdater(MIBUpdater):
             return None
         return self.if_range[right]
 
+    def get_next_hinted(self, sub_id, hint):
+        return get_next_in_sorted(self.if_range, sub_id, hint)
+
+    def get_contexts(self):
+        return Namespace.get_contexts(self.db_conn)
+
+    def get_next_in_context(self, context, sub_id, hint=None):
+        return get_next_in_sorted(self.namespace_if_range.get(context, []), sub_id, hint)
+
     def get_oid(self, sub_id):
         """
         :param sub_id: The 1-based sub-identifier query.
@@ -291,7 +311,7 @@ class InterfaceMIBUpdater(MIBUpdater):
         else:
             return None
 
-        return Namespace.dbs_get_all(self.db_conn, db, if_table, blocking=True)
+        return Namespace.dbs_get_all_first(self.db_conn, db, if_table, blocking=True)
 
     def get_high_speed(self, sub_id):
         """
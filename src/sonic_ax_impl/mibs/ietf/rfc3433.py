@@ -348,6 +348,11 @@ class PhysicalSensorTableMIBUpdater(MIBUpdater):
     FAN_SENSOR_KEY_PATTERN = mibs.fan_info_table("*")
     THERMAL_SENSOR_KEY_PATTERN = mibs.thermal_info_table("*")
 
+    process_update = True
+
+    # sensor readings change slowly
+    default_frequency = 30
+
     def __init__(self):
         """
         ctor
@@ -1,12 +1,37 @@
+import heapq
 import json
+import os
+import time
 
 from sonic_ax_impl import mibs
 from sonic_ax_impl.mibs import Namespace
+from sonic_ax_impl.mibs.topology import service as topology_service
 from ax_interface import MIBMeta, ValueType, MIBUpdater, SubtreeMIBEntry
+from ax_interface.mib import get_next_in_sorted
 from ax_interface.util import mac_decimals
 from bisect import bisect_right
 
+FDB_ENTRY_PATTERN = "ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:*"
+
 class FdbUpdater(MIBUpdater):
+
+    offload_update = True
+    process_update = True
+
+    # ~100k FDB entries on large systems: refreshing them is costly, and MAC tables are rarely polled at 5s resolution.
+    default_frequency = 15
+
+    # FDB keys looked at per SCAN call, between two yields of update_data_chunks
+    scan_count = mibs.SCAN_COUNT
+
+    # changed FDB entries read between two yields of update_data_chunks. More than scan_count changes at once (e.g.
+    # a MAC flush) are caught up with a full read instead.
+    update_chunk_size = mibs.GET_ALL_PIPELINE_SIZE
+
+    # Seconds between two full reads of the FDB. In between, only the entries named by ASIC_DB keyspace notifications
+    # are read again; the full read catches up with notifications that were lost.
+    reconcile_interval = 300
+
     def __init__(self):
         super().__init__()
         self.db_conn = Namespace.init_namespace_dbs()
@@ -22,6 +47,16 @@ class FdbUpdater(MIBUpdater):
         self.bvid_vlan_map = {}
         self.broken_fdbs = []
 
+        # { (db index, FDB key) -> (vlanmac, port index) } and { vlanmac -> {(db index, FDB key)} }, to apply changes
+        # to single entries
+        self.fdb_entry_ifindex = {}
+        self.vlanmac_fdb_entries = {}
+        # keyspace subscriptions to the FDB entries, one per namespace. None until subscribed, by process fdb_pubsub_pid.
+        self.fdb_pubsubs = None
+        self.fdb_pubsub_pid = None
+        # time of the last full read of the FDB, None to read it in full on the next update
+        self.reconciled = None
+
     def fdb_vlanmac(self, fdb):
         if 'vlan' in fdb:
             vlan_id = fdb["vlan"]
@@ -43,84 +78,245 @@ class FdbUpdater(MIBUpdater):
 
     def reinit_connection(self):
         Namespace.connect_namespace_dbs(self.db_conn)
+        # subscribe again, and read the FDB in full
+        self.fdb_pubsubs = None
 
     def reinit_data(self):
         """
         Subclass update interface information
         """
+        topology = topology_service.snapshot(self.db_conn)
         (
             self.if_name_map,
             self.if_alias_map,
             self.if_id_map,
             self.oid_name_map,
-        ) = Namespace.get_sync_d_from_all_namespace(
-            mibs.init_sync_d_interface_tables, self.db_conn
-        )
+        ) = topology.interfaces
 
         self.lag_name_if_name_map, \
         self.if_name_lag_name_map, \
         self.oid_lag_name_map,     \
-        _, self.sai_lag_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_lag_tables, self.db_conn)
+        _, self.sai_lag_map = topology.lags
 
         self.if_bpid_map = Namespace.dbs_get_bridge_port_map(self.db_conn, mibs.ASIC_DB)
         self.bvid_vlan_map.clear()
         self.broken_fdbs.clear()
+        # the ports the entries point to may have changed
+        self.reconciled = None
 
-    def update_data(self):
+    def update_data_chunks(self):
         """
         Update redis (caches config)
-        Pulls the table references for each interface.
+        Applies the changes notified since the last update, update_chunk_size entries per slice. Every
+        reconcile_interval, or on more than scan_count changes, pulls the table references for each interface instead,
+        a SCAN call of FDB keys per slice.
+        The FDB is published once all of its changes, or entries, are processed.
         """
-        self.vlanmac_ifindex_map = {}
-        self.vlanmac_ifindex_list = []
+        if self.fdb_pubsubs is None or self.fdb_pubsub_pid != os.getpid():
+            self.subscribe()
+        try:
+            if not self.fdb_pubsubs or self.reconciled is None or \
+                    time.monotonic() - self.reconciled >= self.reconcile_interval:
+                yield from self.reconcile()
+                return
 
-        fdb_strings = Namespace.dbs_keys(self.db_conn, mibs.ASIC_DB, "ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:*")
-        if not fdb_strings:
-            return
-
-        for s in fdb_strings:
-            fdb_str = s
             try:
-                fdb = json.loads(fdb_str.split(":", maxsplit=2)[-1])
-            except ValueError as e:  # includes simplejson.decoder.JSONDecodeError
-                mibs.logger.error("SyncD 'ASIC_DB' includes invalid FDB_ENTRY '{}': {}.".format(fdb_str, e))
-                continue
+                changed_entries = self.poll_changes()
+            except Exception as e:
+                mibs.logger.warning("Lost the FDB change notifications, reading the FDB in full: {}".format(e))
+                self.fdb_pubsubs = None
+                return
+            if len(changed_entries) > self.scan_count:
+                yield from self.reconcile()
+            elif changed_entries:
+                yield from self.apply_changes(changed_entries)
+        except Exception:
+            # the notifications are consumed: catch up with a full read
+            self.reconciled = None
+            raise
 
-            ent = Namespace.dbs_get_all(self.db_conn, mibs.ASIC_DB, s, blocking=False)
-            if not ent:
-                continue
+    async def update_in_executor(self, reinit=False, reconnect=False):
+        try:
+            await super().update_in_executor(reinit, reconnect)
+        except Exception:
+            # The failed cycle ran on a copy of the updater, which is dropped along with the notifications it
+            # consumed: catch up with a full read.
+            self.reconciled = None
+            raise
 
-            bridge_port_id_attr = ""
-            try:
-                bridge_port_id_attr = ent["SAI_FDB_ENTRY_ATTR_BRIDGE_PORT_ID"]
-            except KeyError as e:
-                # Only write warning log once
-                if fdb_str not in self.broken_fdbs:
-                    mibs.logger.warn("SyncD 'ASIC_DB' includes invalid FDB_ENTRY '{}': failed to get bridge_port_id, exception: {}".format(fdb_str, e))
-                    self.broken_fdbs.append(fdb_str)
-                continue
+    def subscribe(self):
+        """
+        Subscribe to the keyspace notifications of the FDB entries, and read the FDB in full on the next update.
+        """
+        self.fdb_pubsub_pid = os.getpid()
+        self.reconciled = None
+        try:
+            self.fdb_pubsubs = [mibs.get_redis_pubsub(db_conn, mibs.ASIC_DB, FDB_ENTRY_PATTERN)
+                                for db_conn in self.db_conn]
+        except Exception as e:
+            # no subscription: the FDB is read in full on each update
+            mibs.logger.warning("Failed to subscribe to the FDB changes: {}".format(e))
+            self.fdb_pubsubs = []
 
-            # Example output: oid:0x3a000000000608
-            bridge_port_id = bridge_port_id_attr[6:]
-            if bridge_port_id not in self.if_bpid_map:
-                continue
-            port_id = self.if_bpid_map[bridge_port_id]
-            if port_id in self.if_id_map:
-                port_name = self.if_id_map[port_id]
-                port_index = mibs.get_index_from_str(port_name)
-            elif port_id in self.sai_lag_map:
-                port_name = self.sai_lag_map[port_id]
-                port_index = mibs.get_index_from_str(port_name)
-            else:
-                continue
+    def poll_changes(self):
+        """
+        :return: {(db index, FDB key)} of the entries changed since the last poll
+        """
+        changed_entries = set()
+        for db_index, pubsub in enumerate(self.fdb_pubsubs):
+            while True:
+                msg = pubsub.get_message()
+                if not msg:
+                    break
+                if msg.get('type') != 'pmessage':
+                    continue
+                # __keyspace@1__:ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:{...}
+                changed_entries.add((db_index, msg['channel'].split(':', maxsplit=1)[-1]))
+        return changed_entries
+
+    def reconcile(self):
+        """
+        Generator reading the FDB in full, a SCAN call per slice.
+        """
+        # Changes notified before the scan are part of it, changes notified during the scan are applied again next
+        # update.
+        for pubsub in self.fdb_pubsubs or []:
+            mibs.clear_pubsub_msg(pubsub)
 
-            vlanmac = self.fdb_vlanmac(fdb)
-            if not vlanmac:
-                mibs.logger.debug("SyncD 'ASIC_DB' includes invalid FDB_ENTRY '{}': failed in fdb_vlanmac().".format(fdb_str))
+        vlanmac_ifindex_map = {}
+        fdb_entry_ifindex = {}
+        vlanmac_fdb_entries = {}
+
+        fdb_scan = Namespace.dbs_scan(self.db_conn, mibs.ASIC_DB, FDB_ENTRY_PATTERN, self.scan_count)
+        for db_index, fdb_strings in fdb_scan:
+            # read in the namespace the keys were found in, pipelined
+            ents = Namespace.dbs_get_all_many([self.db_conn[db_index]], mibs.ASIC_DB, fdb_strings,
+                                              self.update_chunk_size)
+            for fdb_str, ent in zip(fdb_strings, ents):
+                entry = self.fdb_entry(fdb_str, ent)
+                if entry is None:
+                    continue
+                vlanmac, port_index = entry
+                vlanmac_ifindex_map[vlanmac] = port_index
+                fdb_entry_ifindex[(db_index, fdb_str)] = entry
+                vlanmac_fdb_entries.setdefault(vlanmac, set()).add((db_index, fdb_str))
+            # the scan goes on at the next slice
+            yield
+        # keys listed twice by SCAN are in the map once
+        self.fdb_entry_ifindex = fdb_entry_ifindex
+        self.vlanmac_fdb_entries = vlanmac_fdb_entries
+        self.vlanmac_ifindex_map = vlanmac_ifindex_map
+        self.vlanmac_ifindex_list = sorted(vlanmac_ifindex_map)
+        self.reconciled = time.monotonic()
+
+    def apply_changes(self, changed_entries):
+        """
+        Generator reading the changed entries again, update_chunk_size per slice. They are applied to new FDB maps
+        and sorted list, published at the end.
+
+        :param changed_entries: {(db index, FDB key)}
+        """
+        db_fdb_strs = {}
+        for db_index, fdb_str in changed_entries:
+            db_fdb_strs.setdefault(db_index, []).append(fdb_str)
+        changed_ents = []
+        for db_index, fdb_strs in db_fdb_strs.items():
+            for start in range(0, len(fdb_strs), self.update_chunk_size):
+                chunk = fdb_strs[start:start + self.update_chunk_size]
+                ents = Namespace.dbs_get_all_many([self.db_conn[db_index]], mibs.ASIC_DB, chunk,
+                                                  self.update_chunk_size)
+                changed_ents.extend(((db_index, fdb_str), ent) for fdb_str, ent in zip(chunk, ents))
+                yield
+
+        vlanmac_ifindex_map = dict(self.vlanmac_ifindex_map)
+        fdb_entry_ifindex = dict(self.fdb_entry_ifindex)
+        vlanmac_fdb_entries = dict(self.vlanmac_fdb_entries)
+        changed_vlanmacs = set()
+
+        for entry_key, ent in changed_ents:
+            # drop the former entry, and its vlanmac unless another entry has it
+            former_entry = fdb_entry_ifindex.pop(entry_key, None)
+            if former_entry is not None:
+                vlanmac = former_entry[0]
+                changed_vlanmacs.add(vlanmac)
+                fdb_entries = vlanmac_fdb_entries[vlanmac] - {entry_key}
+                if fdb_entries:
+                    vlanmac_fdb_entries[vlanmac] = fdb_entries
+                    # the port of an entry left
+                    vlanmac_ifindex_map[vlanmac] = fdb_entry_ifindex[next(iter(fdb_entries))][1]
+                else:
+                    del vlanmac_fdb_entries[vlanmac]
+                    del vlanmac_ifindex_map[vlanmac]
+
+            # an entry deleted from ASIC_DB reads empty
+            entry = self.fdb_entry(entry_key[1], ent)
+            if entry is None:
                 continue
-            self.vlanmac_ifindex_map[vlanmac] = port_index
-            self.vlanmac_ifindex_list.append(vlanmac)
-        self.vlanmac_ifindex_list.sort()
+            vlanmac, port_index = entry
+            changed_vlanmacs.add(vlanmac)
+            vlanmac_ifindex_map[vlanmac] = port_index
+            fdb_entry_ifindex[entry_key] = entry
+            vlanmac_fdb_entries[vlanmac] = vlanmac_fdb_entries.get(vlanmac, frozenset()) | {entry_key}
+
+        # a single pass over the sorted list, whatever the number of changes
+        removed = {vlanmac for vlanmac in changed_vlanmacs
+                   if vlanmac in self.vlanmac_ifindex_map and vlanmac not in vlanmac_ifindex_map}
+        added = sorted(vlanmac for vlanmac in changed_vlanmacs
+                       if vlanmac not in self.vlanmac_ifindex_map and vlanmac in vlanmac_ifindex_map)
+        vlanmac_ifindex_list = self.vlanmac_ifindex_list
+        if removed:
+            vlanmac_ifindex_list = [vlanmac for vlanmac in vlanmac_ifindex_list if vlanmac not in removed]
+        if added:
+            vlanmac_ifindex_list = list(heapq.merge(vlanmac_ifindex_list, added))
+
+        self.fdb_entry_ifindex = fdb_entry_ifindex
+        self.vlanmac_fdb_entries = vlanmac_fdb_entries
+        self.vlanmac_ifindex_map = vlanmac_ifindex_map
+        self.vlanmac_ifindex_list = vlanmac_ifindex_list
+
+    def fdb_entry(self, fdb_str, ent):
+        """
+        :param fdb_str: FDB key in ASIC_DB
+        :param ent: its hash
+        :return: (vlanmac, port index) of the entry, None if it is invalid or on none of our ports
+        """
+        if not ent:
+            return None
+        try:
+            fdb = json.loads(fdb_str.split(":", maxsplit=2)[-1])
+        except ValueError as e:  # includes simplejson.decoder.JSONDecodeError
+            mibs.logger.error("SyncD 'ASIC_DB' includes invalid FDB_ENTRY '{}': {}.".format(fdb_str, e))
+            return None
+
+        bridge_port_id_attr = ""
+        try:
+            bridge_port_id_attr = ent["SAI_FDB_ENTRY_ATTR_BRIDGE_PORT_ID"]
+        except KeyError as e:
+            # Only write warning log once
+            if fdb_str not in self.broken_fdbs:
+                mibs.logger.warn("SyncD 'ASIC_DB' includes invalid FDB_ENTRY '{}': failed to get bridge_port_id, exception: {}".format(fdb_str, e))
+                self.broken_fdbs.append(fdb_str)
+            return None
+
+        # Example output: oid:0x3a000000000608
+        bridge_port_id = bridge_port_id_attr[6:]
+        if bridge_port_id not in self.if_bpid_map:
+            return None
+        port_id = self.if_bpid_map[bridge_port_id]
+        if port_id in self.if_id_map:
+            port_name = self.if_id_map[port_id]
+            port_index = mibs.get_index_from_str(port_name)
+        elif port_id in self.sai_lag_map:
+            port_name = self.sai_lag_map[port_id]
+            port_index = mibs.get_index_from_str(port_name)
+        else:
+            return None
+
+        vlanmac = self.fdb_vlanmac(fdb)
+        if not vlanmac:
+            mibs.logger.debug("SyncD 'ASIC_DB' includes invalid FDB_ENTRY '{}': failed in fdb_vlanmac().".format(fdb_str))
+            return None
+        return vlanmac, port_index
 
     def fdb_ifindex(self, sub_id):
         return self.vlanmac_ifindex_map.get(sub_id, None)
@@ -132,6 +328,9 @@ class FdbUpdater(MIBUpdater):
 
         return self.vlanmac_ifindex_list[right]
 
+    def get_next_hinted(self, sub_id, hint):
+        return get_next_in_sorted(self.vlanmac_ifindex_list, sub_id, hint)
+
 class QBridgeMIBObjects(metaclass=MIBMeta, prefix='.1.3.6.1.2.1.17.7.1'):
     """
     'Forwarding Database' https://tools.ietf.org/html/rfc4363
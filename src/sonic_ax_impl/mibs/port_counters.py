@@ -0,0 +1,128 @@
+"""
+Port counter cache: the COUNTERS_DB counters of the ports, shared by the interface MIBs.
+
+The interface (RFC 1213), interface extension (RFC 2863) and PFC updaters all poll the counters of every port. Each MIB
+module registers the counter names it serves (see PortCounterCache.register); the cache reads the ports' counter hashes
+in pipelined batches and keeps the registered counters only, as integers, in per-port maps refusing changes.
+
+Once enabled (see PortCounterCache.enable), a read is handed out to every updater asking for the same ports within
+PORT_COUNTERS_MAX_AGE: the updaters refreshing at about the same time share one read of each port's counters. Disabled,
+the cache reads the counters on each request, as the updaters used to.
+"""
+
+import os
+import threading
+import time
+
+from sonic_ax_impl import mibs
+from sonic_ax_impl.mibs import Namespace
+from sonic_ax_impl.mibs.topology import FrozenDict
+
+"""
+Maximum age (in seconds) of the counters handed out by the enabled cache.
+"""
+PORT_COUNTERS_MAX_AGE = 2
+
+
+class PortCounterCache:
+    def __init__(self, max_age=PORT_COUNTERS_MAX_AGE):
+        self.max_age = max_age
+        self.enabled = False
+        # counter names kept in the cache, all of them while empty
+        self.counter_names = frozenset()
+        # number of requests, and of reads of the counters from the database
+        self.requests = 0
+        self.reads = 0
+        # sai_id_key -> FrozenDict(counter name -> value), of the last read
+        self._counters = FrozenDict()
+        self._read_time = None
+        # a read is in progress: concurrent requesters take the last counters rather than reading them again
+        self._reading = False
+        self._lock = threading.Lock()
+
+    def enable(self):
+        """
+        Share the counters between requesters from now on.
+        """
+        self.enabled = True
+
+    def register(self, counter_names):
+        """
+        Keep counter_names in the cache, in addition to the counters already registered.
+        """
+        with self._lock:
+            self.counter_names = self.counter_names | frozenset(counter_names)
+            # the counters read so far may miss the new names
+            self._read_time = None
+
+    def counters(self, dbs, if_id_map):
+        """
+        :param dbs: connectors of the requesting updater
+        :param if_id_map: sai_id_key -> interface name, of the ports to read
+        :return: FrozenDict sai_id_key -> FrozenDict(counter name -> value), {} for the ports without counters
+        """
+        chunks = self.counters_chunks(dbs, if_id_map)
+        while True:
+            try:
+                next(chunks)
+            except StopIteration as stop:
+                return stop.value
+
+    def counters_chunks(self, dbs, if_id_map, chunk_size=mibs.GET_ALL_PIPELINE_SIZE):
+        """
+        Generator version of counters() for updaters reading their data in chunks (see
+        MIBUpdater.update_data_chunks): yields between the reads of chunk_size ports, and returns the counters.
+        """
+        with self._lock:
+            self.requests += 1
+            if self.enabled and self._read_time is not None and self._counters.keys() >= if_id_map.keys():
+                if self._reading or time.monotonic() - self._read_time < self.max_age:
+                    return self._counters
+            self._reading = True
+
+        try:
+            counters = {}
+            sai_id_keys = list(if_id_map)
+            for start in range(0, len(sai_id_keys), chunk_size):
+                chunk = sai_id_keys[start:start + chunk_size]
+                namespace_tables = []
+                for sai_id_key in chunk:
+                    namespace, sai_id = mibs.split_sai_id_key(sai_id_key)
+                    namespace_tables.append((namespace, mibs.counter_table(sai_id)))
+                hashes = Namespace.dbs_get_all_many_namespace(dbs, mibs.COUNTERS_DB, namespace_tables, chunk_size)
+                for sai_id_key, counters_db_data in zip(chunk, hashes):
+                    counters[sai_id_key] = FrozenDict(self._convert(counters_db_data))
+                yield
+        finally:
+            with self._lock:
+                self._reading = False
+
+        counters = FrozenDict(counters)
+        with self._lock:
+            self.reads += 1
+            if self.enabled:
+                self._counters = counters
+                self._read_time = time.monotonic()
+        return counters
+
+    def _convert(self, counters_db_data):
+        counter_names = self.counter_names
+        if not counter_names:
+            return {counter: int(value) for counter, value in counters_db_data.items()}
+        return {counter: int(value) for counter, value in counters_db_data.items() if counter in counter_names}
+
+    def stats(self):
+        """
+        :return: {'requests': int, 'reads': int, 'ports': int}
+        """
+        return {
+            'requests': self.requests,
+            'reads': self.reads,
+            'ports': len(self._counters),
+        }
+
+
+service = PortCounterCache()
+# updater processes are forked while update worker threads may hold the lock: fork once it is free.
+os.register_at_fork(before=service._lock.acquire, after_in_parent=service._lock.release,
+                    after_in_child=service._lock.release)
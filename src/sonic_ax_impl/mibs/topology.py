@@ -0,0 +1,310 @@
+"""
+Topology service: the port, LAG, VLAN, RIF and management interface maps, shared by the updaters.
+
+Updaters get the maps from TopologySnapshot objects rather than building them on their own reinit. Each family of
+maps is built on first use, at most once per snapshot, and the maps refuse changes: updaters merging them copy first.
+
+Once enabled (see TopologyService.enable), the service hands out the same snapshot to every updater until the
+topology changes, as told by keyspace notifications on the tables the maps are built from, or until it is
+TOPOLOGY_REFRESH_INTERVAL old. Snapshots are rebuilt at most once per TOPOLOGY_MIN_REBUILD_INTERVAL, so that a
+flapping port does not bring back a rebuild per updater. The maps are kept per namespace: a new snapshot only reads
+again the namespaces that changed, or whose connection failed, and merges them with the maps of the others. Disabled,
+the service builds a new snapshot on each request, over the requester's connectors, as the updaters used to.
+"""
+
+import os
+import threading
+import time
+from collections import namedtuple
+
+from sonic_ax_impl import logger
+from sonic_ax_impl import mibs
+from sonic_ax_impl.mibs import Namespace
+
+"""
+Maximum age (in seconds) of a shared snapshot, in case a change notification was lost.
+"""
+TOPOLOGY_REFRESH_INTERVAL = 60
+
+"""
+Minimum interval (in seconds) between two rebuilds of the shared snapshot.
+"""
+TOPOLOGY_MIN_REBUILD_INTERVAL = 5
+
+"""
+(database, key pattern) of the tables the maps are built from, watched in each namespace holding interfaces, and in
+the host namespace.
+"""
+NAMESPACE_TOPOLOGY_KEYS = (
+    (mibs.COUNTERS_DB, 'COUNTERS_*_MAP'),
+    (mibs.APPL_DB, mibs.if_entry_table('*')),
+    (mibs.APPL_DB, mibs.lag_entry_table('*')),
+    (mibs.APPL_DB, 'LAG_MEMBER_TABLE:*'),
+    (mibs.ASIC_DB, 'ASIC_STATE:SAI_OBJECT_TYPE_ROUTER_INTERFACE:*'),
+)
+HOST_TOPOLOGY_KEYS = (
+    (mibs.CONFIG_DB, mibs.mgmt_if_entry_table('*')),
+)
+
+InterfaceMaps = namedtuple('InterfaceMaps', ('if_name_map', 'if_alias_map', 'if_id_map', 'oid_name_map'))
+LagMaps = namedtuple('LagMaps', ('lag_name_if_name_map', 'if_name_lag_name_map', 'oid_lag_name_map', 'lag_sai_map',
+                                 'sai_lag_map'))
+VlanMaps = namedtuple('VlanMaps', ('vlan_name_map', 'oid_sai_map', 'oid_name_map'))
+RifMaps = namedtuple('RifMaps', ('rif_port_map', 'port_rif_map'))
+MgmtMaps = namedtuple('MgmtMaps', ('oid_name_map', 'if_alias_map'))
+
+
+class FrozenDict(dict):
+    """
+    dict refusing changes, safe to share between updaters.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("'{}' object is read-only".format(type(self).__name__))
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def freeze(maps_cls, maps):
+    return maps_cls(*(FrozenDict(m) for m in maps))
+
+
+class TopologySnapshot:
+    def __init__(self, version, dbs, lock=None, fragments=None):
+        """
+        :param version: increases with each snapshot of the service
+        :param dbs: connectors the maps are read with, the host namespace first
+        :param lock: held while reading the maps, for connectors shared between threads
+        :param fragments: (per namespace function, namespace) -> its maps, reused and completed by the snapshot. None
+            to read all namespaces at once.
+        """
+        self.version = version
+        self.dbs = dbs
+        self.created = time.monotonic()
+        self._lock = lock if lock is not None else threading.Lock()
+        self._fragments = fragments
+        self._interfaces = None
+        self._lags = None
+        self._vlans = None
+        self._rifs = None
+        self._mgmt = None
+
+    @property
+    def interfaces(self):
+        with self._lock:
+            if self._interfaces is None:
+                self._interfaces = freeze(InterfaceMaps, self._merged(mibs.init_sync_d_interface_tables))
+            return self._interfaces
+
+    @property
+    def lags(self):
+        with self._lock:
+            if self._lags is None:
+                self._lags = freeze(LagMaps, self._merged(mibs.init_sync_d_lag_tables))
+            return self._lags
+
+    @property
+    def vlans(self):
+        with self._lock:
+            if self._vlans is None:
+                self._vlans = freeze(VlanMaps, self._merged(mibs.init_sync_d_vlan_tables))
+            return self._vlans
+
+    @property
+    def rifs(self):
+        with self._lock:
+            if self._rifs is None:
+                self._rifs = freeze(RifMaps, self._merged(mibs.init_sync_d_rif_tables))
+            return self._rifs
+
+    @property
+    def mgmt(self):
+        """
+        Management interfaces, from the host namespace.
+        """
+        with self._lock:
+            if self._mgmt is None:
+                if self._fragments is None:
+                    self._mgmt = freeze(MgmtMaps, mibs.init_mgmt_interface_tables(self.dbs[0]))
+                else:
+                    self._mgmt = freeze(MgmtMaps, self._fragment(mibs.init_mgmt_interface_tables, self.dbs[0]))
+            return self._mgmt
+
+    def _fragment(self, per_namespace_func, db_conn):
+        key = (per_namespace_func, db_conn.namespace)
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            with Namespace.track_failure(db_conn):
+                fragment = self._fragments[key] = per_namespace_func(db_conn)
+        return fragment
+
+    def _merged(self, per_namespace_func):
+        """
+        :return: the maps of per_namespace_func merged over the namespaces holding interfaces
+        """
+        if self._fragments is None:
+            return Namespace.get_sync_d_from_all_namespace(per_namespace_func, self.dbs)
+        merged = []
+        for db_conn in Namespace.get_non_host_dbs(self.dbs):
+            fragment = self._fragment(per_namespace_func, db_conn)
+            if not merged:
+                merged = [dict(maps) for maps in fragment]
+            else:
+                for maps, fragment_maps in zip(merged, fragment):
+                    maps.update(fragment_maps)
+        return merged
+
+
+class TopologyService:
+    def __init__(self, refresh_interval=TOPOLOGY_REFRESH_INTERVAL, min_rebuild_interval=TOPOLOGY_MIN_REBUILD_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.min_rebuild_interval = min_rebuild_interval
+        self.enabled = False
+        self.version = 0
+        # number of shared snapshots built, and of those caused by a change notification
+        self.rebuilds = 0
+        self.notified_rebuilds = 0
+        # namespace -> number of times its maps were read again for a new shared snapshot
+        self.namespace_rebuilds = {}
+        # namespace -> number of times its connectors were connected again after a failure
+        self.reconnects = {}
+        self._snapshot = None
+        # (per namespace function, namespace) -> maps, of the current shared snapshot
+        self._fragments = {}
+        # namespaces to read again for the next shared snapshot
+        self._stale_namespaces = set()
+        # connectors and keyspace subscriptions of the shared snapshots, made again after a fork
+        self._dbs = None
+        # [(namespace, pubsub)]
+        self._pubsubs = []
+        self._pid = None
+        self._lock = threading.RLock()
+
+    def enable(self):
+        """
+        Share snapshots from now on.
+        """
+        self.enabled = True
+
+    def invalidate(self, namespace=None):
+        """
+        Read the maps of 'namespace' (all namespaces if None) again for the next shared snapshot.
+        """
+        with self._lock:
+            if namespace is None:
+                self._fragments = {}
+                self._snapshot = None
+            else:
+                self._stale_namespaces.add(namespace)
+
+    def snapshot(self, dbs=None):
+        """
+        :param dbs: connectors of the requesting updater, used when the service is disabled
+        :return: TopologySnapshot
+        """
+        if not self.enabled:
+            self.version += 1
+            return TopologySnapshot(self.version, dbs if dbs is not None else Namespace.init_namespace_dbs())
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._connect()
+            self._reconnect_failed()
+            notified = self._poll_changes()
+            self._stale_namespaces.update(notified)
+
+            snapshot = self._snapshot
+            if snapshot is not None:
+                age = time.monotonic() - snapshot.created
+                if age < self.min_rebuild_interval or (age < self.refresh_interval and not self._stale_namespaces):
+                    return snapshot
+                if age >= self.refresh_interval:
+                    self._fragments = {}
+                elif notified:
+                    self.notified_rebuilds += 1
+
+            namespaces = {db_conn.namespace for db_conn in self._dbs}
+            rebuilt = namespaces if not self._fragments else self._stale_namespaces & namespaces
+            for namespace in rebuilt:
+                self.namespace_rebuilds[namespace] = self.namespace_rebuilds.get(namespace, 0) + 1
+            # the maps of the unchanged namespaces carry over, the previous snapshot keeps its own
+            self._fragments = {key: maps for key, maps in self._fragments.items() if key[1] not in rebuilt}
+            self._stale_namespaces.clear()
+            self.version += 1
+            self.rebuilds += 1
+            self._snapshot = TopologySnapshot(self.version, self._dbs, self._lock, self._fragments)
+            return self._snapshot
+
+    def _connect(self):
+        # connectors and subscriptions inherited through a fork belong to the parent
+        self._pid = os.getpid()
+        self._snapshot = None
+        self._fragments = {}
+        self._dbs = Namespace.init_namespace_dbs()
+        self._pubsubs = []
+        try:
+            watched = [(self._dbs[0], db_name, pattern) for db_name, pattern in HOST_TOPOLOGY_KEYS]
+            watched.extend((db_conn, db_name, pattern)
+                           for db_conn in Namespace.get_non_host_dbs(self._dbs)
+                           for db_name, pattern in NAMESPACE_TOPOLOGY_KEYS)
+            for db_conn, db_name, pattern in watched:
+                self._pubsubs.append((db_conn.namespace, mibs.get_redis_pubsub(db_conn, db_name, pattern)))
+        except Exception:
+            logger.exception("Failed to subscribe to topology changes, refreshing every {}s".format(
+                self.refresh_interval))
+            self._pubsubs = []
+
+    def _reconnect_failed(self):
+        """
+        Connect again the connectors that failed while reading the maps, and read their namespace again.
+        """
+        failed_dbs = [db_conn for db_conn in self._dbs if db_conn in Namespace.failed_dbs]
+        if not failed_dbs:
+            return
+        Namespace.connect_namespace_dbs(failed_dbs)
+        for db_conn in failed_dbs:
+            self.reconnects[db_conn.namespace] = self.reconnects.get(db_conn.namespace, 0) + 1
+            self._stale_namespaces.add(db_conn.namespace)
+
+    def _poll_changes(self):
+        """
+        :return: the namespaces whose topology tables changed since the last poll
+        """
+        changed = set()
+        for namespace, pubsub in self._pubsubs:
+            while True:
+                msg = pubsub.get_message()
+                if not msg:
+                    break
+                if msg.get('type') == 'pmessage':
+                    changed.add(namespace)
+        return changed
+
+    def stats(self):
+        """
+        :return: {'version': int, 'rebuilds': int, 'notified_rebuilds': int, 'namespace_rebuilds': {namespace: int},
+            'reconnects': {namespace: int}}
+        """
+        return {
+            'version': self.version,
+            'rebuilds': self.rebuilds,
+            'notified_rebuilds': self.notified_rebuilds,
+            'namespace_rebuilds': dict(self.namespace_rebuilds),
+            'reconnects': dict(self.reconnects),
+        }
+
+
+service = TopologyService()
+# updater processes are forked while update worker threads may hold the lock: fork once it is free.
+os.register_at_fork(before=service._lock.acquire, after_in_parent=service._lock.release,
+                    after_in_child=service._lock.release)
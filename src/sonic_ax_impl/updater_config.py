@@ -0,0 +1,112 @@
+"""
+Per-updater update and reinit intervals, reloaded at runtime.
+
+Settings come from the SNMP_AGENT|updaters hash of CONFIG_DB, with fields named '<updater class>.interval' and
+'<updater class>.reinit_interval', and from an optional JSON file of the form
+{"<updater class>": {"interval": seconds, "reinit_interval": seconds}}. CONFIG_DB takes precedence over the file.
+Updaters without settings keep their built-in defaults (see MIBUpdater.default_frequency).
+"""
+
+import json
+
+from ax_interface import MIBUpdater
+from . import logger
+from . import mibs
+
+UPDATER_SETTINGS = ('interval', 'reinit_interval')
+
+
+def snmp_agent_table(key):
+    """
+    :param key: given key to cast
+    :return: SNMP_AGENT key
+    """
+
+    return 'SNMP_AGENT|' + key
+
+
+def parse_updater_settings(settings, source):
+    """
+    :param settings: iterable of (updater class name, setting, value)
+    :param source: where the settings come from, for logging
+    :return: updater class name -> {setting: seconds}. Invalid settings are logged and left out.
+    """
+    result = {}
+    for updater_name, setting, value in settings:
+        if setting not in UPDATER_SETTINGS:
+            logger.warning("Unknown updater setting '{}' for [{}] in {}".format(setting, updater_name, source))
+            continue
+        try:
+            seconds = float(value)
+        except (TypeError, ValueError):
+            seconds = 0
+        if seconds <= 0:
+            logger.warning("Invalid {} '{}' for [{}] in {}".format(setting, value, updater_name, source))
+            continue
+        result.setdefault(updater_name, {})[setting] = seconds
+    return result
+
+
+def load_updater_config_file(path):
+    """
+    :param path: JSON file
+    :return: updater class name -> {setting: seconds}
+    """
+    with open(path) as f:
+        config = json.load(f)
+    return parse_updater_settings(
+        ((updater_name, setting, value)
+         for updater_name, updater_settings in config.items()
+         for setting, value in updater_settings.items()),
+        path)
+
+
+def load_updater_config_db(db_conn):
+    """
+    :param db_conn: connector of the host namespace, connected to CONFIG_DB
+    :return: updater class name -> {setting: seconds}
+    """
+    fields = db_conn.get_all(mibs.CONFIG_DB, snmp_agent_table('updaters'), blocking=False) or {}
+    settings = []
+    for name, value in fields.items():
+        updater_name, _, setting = name.rpartition('.')
+        settings.append((updater_name, setting, value))
+    return parse_updater_settings(settings, snmp_agent_table('updaters'))
+
+
+class UpdaterConfigUpdater(MIBUpdater):
+    """
+    Reloads the updater settings and applies them to the updaters of a MIBTable when they change.
+    """
+
+    default_frequency = 30
+
+    def __init__(self, mib_table, config_file=None):
+        super().__init__()
+        self.mib_table = mib_table
+        self.config_file = config_file
+        self.db_conn = None
+        self.settings = None
+
+    def reinit_connection(self):
+        if self.db_conn is not None:
+            self.db_conn.connect(mibs.CONFIG_DB)
+
+    def update_data(self):
+        settings = {}
+        if self.config_file is not None:
+            try:
+                settings = load_updater_config_file(self.config_file)
+            except (OSError, ValueError, AttributeError) as e:
+                logger.warning("Failed to load the updater settings from {}: {}".format(self.config_file, e))
+
+        if self.db_conn is None:
+            self.db_conn = mibs.init_db()
+            self.db_conn.connect(mibs.CONFIG_DB)
+        for updater_name, updater_settings in load_updater_config_db(self.db_conn).items():
+            settings.setdefault(updater_name, {}).update(updater_settings)
+
+        if settings != self.settings:
+            logger.info("Applying updater settings: {}".format(settings))
+            self.settings = settings
+            self.mib_table.configure_updaters(settings)
@@ -5,14 +5,14 @@ from getopt import getopt
 
 def usage(script_name):
     print('Usage: python ', script_name,
-          '-t [host] -p [port] -s [unix_socket_path] -d [logging_level] -f [update_frequency] -r [enable_dynamic_frequency] -h [help]')
+          '-t [host] -p [port] -s [unix_socket_path] -d [logging_level] -f [update_frequency] -r [enable_dynamic_frequency] -c [enable_context_registration] -w [update_workers] -u [process_updaters] -i [updater_config] -l [idle_timeout] -b [update_duty_budget] -h [help]')
 
 
 def process_options(script_name):
     """
     Process command line options
     """
-    options, remainders = getopt(sys.argv[1:], "t:p:s:d:f:rh", ["host=", "port=", "unix_socket_path=", "debug=", "frequency=", "enable_dynamic_frequency", "help"])
+    options, remainders = getopt(sys.argv[1:], "t:p:s:d:f:rcw:ui:l:b:h", ["host=", "port=", "unix_socket_path=", "debug=", "frequency=", "enable_dynamic_frequency", "enable_context_registration", "update_workers=", "process_updaters", "updater_config=", "idle_timeout=", "update_duty_budget=", "help"])
 
     args = {}
     for (opt, arg) in options:
@@ -29,6 +29,18 @@ def process_options(script_name):
                 args['update_frequency'] = int(arg)
             elif opt in ('-r', '--enable_dynamic_frequency'):
                 args['enable_dynamic_frequency'] = True
+            elif opt in ('-c', '--enable_context_registration'):
+                args['enable_context_registration'] = True
+            elif opt in ('-w', '--update_workers'):
+                args['update_workers'] = int(arg)
+            elif opt in ('-u', '--process_updaters'):
+                args['process_updaters'] = True
+            elif opt in ('-i', '--updater_config'):
+                args['updater_config'] = arg
+            elif opt in ('-l', '--idle_timeout'):
+                args['idle_timeout'] = int(arg)
+            elif opt in ('-b', '--update_duty_budget'):
+                args['update_duty_budget'] = float(arg)
             elif opt in ('-h', '--help'):
                 usage(script_name)
                 sys.exit(0)
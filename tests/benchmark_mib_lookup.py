@@ -0,0 +1,104 @@
+"""
+Compare MIBTable subtree dispatch through the OID trie against the previous bisect over sorted prefixes.
+
+Usage: python tests/benchmark_mib_lookup.py [number of iterations]
+"""
+import bisect
+import os
+import sys
+import timeit
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from ax_interface import ValueType
+from ax_interface.mib import MIBMeta, MIBTable, MIBEntry
+from ax_interface.util import oid2tuple
+
+# Registration layout roughly matching SonicMIB: scalar groups and table columns under mib-2 and enterprises.
+PREFIXES = (
+    ['1.3.6.1.2.1.1.{}.0'.format(i) for i in range(1, 8)] +
+    ['1.3.6.1.2.1.2.1.0'] +
+    ['1.3.6.1.2.1.2.2.1.{}'.format(i) for i in range(1, 23)] +
+    ['1.3.6.1.2.1.4.21.1.{}'.format(i) for i in range(1, 14)] +
+    ['1.3.6.1.2.1.4.22.1.{}'.format(i) for i in range(1, 5)] +
+    ['1.3.6.1.2.1.4.24.4.1.{}'.format(i) for i in range(1, 17)] +
+    ['1.3.6.1.2.1.17.7.1.2.2.1.{}'.format(i) for i in range(2, 4)] +
+    ['1.3.6.1.2.1.31.1.1.1.{}'.format(i) for i in range(1, 20)] +
+    ['1.3.6.1.2.1.47.1.1.1.1.{}'.format(i) for i in range(2, 17)] +
+    ['1.3.6.1.2.1.99.1.1.1.{}'.format(i) for i in range(1, 6)] +
+    ['1.0.8802.1.1.2.1.4.1.1.{}'.format(i) for i in range(4, 13)] +
+    ['1.3.6.1.4.1.9.9.813.1.1.1.{}'.format(i) for i in range(1, 3)] +
+    ['1.3.6.1.4.1.9.9.580.1.5.5.1.{}'.format(i) for i in range(1, 5)] +
+    ['1.3.6.1.4.1.9.9.117.1.1.2.1.{}'.format(i) for i in range(1, 3)] +
+    ['1.3.6.1.4.1.9.9.187.1.2.5.1.{}'.format(i) for i in (3, 7)] +
+    ['1.3.6.1.4.1.9.9.813.1.2.1.{}'.format(i) for i in range(1, 3)] +
+    ['1.3.6.1.4.1.6027.3.10.1.2.9.1.{}'.format(i) for i in range(1, 6)]
+)
+
+# the leading '1' is supplied by the MIB prefix
+BenchmarkMIB = MIBMeta('BenchmarkMIB', (), {
+    'entry{}'.format(i): MIBEntry(prefix[2:], ValueType.INTEGER, lambda: 0)
+    for i, prefix in enumerate(PREFIXES)
+}, prefix='.1')
+
+LOOKUPS = [oid2tuple(prefix, dot_prefix=False) + (1, 1000) for prefix in PREFIXES] + [
+    (1, 3, 6, 1, 2, 1, 2, 2),
+    (1, 3, 6, 1, 2, 1, 4, 23, 1),
+    (1, 3, 6, 1, 4, 1, 9, 9, 600),
+    (1, 3, 6, 1, 6),
+]
+
+
+def bisect_longest_prefix(prefixes, item):
+    """
+    Parent prefix lookup as MIBTable implemented it before the trie.
+    """
+    oids = sorted(prefixes)
+    left_insert_index = bisect.bisect(oids, item)
+    preceding_oids = oids[:left_insert_index]
+    if not preceding_oids:
+        return None
+    if preceding_oids[-1] == item[: len(preceding_oids[-1])]:
+        return preceding_oids[-1]
+    return None
+
+
+def bisect_next_subtree(prefixes, item):
+    oid_list = sorted(prefixes)
+    remaining_oids = oid_list[bisect.bisect_right(oid_list, item):]
+    return remaining_oids[0] if remaining_oids else None
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    lut = MIBTable(BenchmarkMIB)
+    prefixes = lut.prefixes
+    trie = lut.trie
+
+    for item in LOOKUPS:
+        match = trie.longest_prefix(item)
+        assert (match[0] if match else None) == bisect_longest_prefix(prefixes, item), item
+        match = next(trie.items_after(item), None)
+        assert (match[0] if match else None) == bisect_next_subtree(prefixes, item), item
+
+    cases = [
+        ('longest prefix', lambda: [bisect_longest_prefix(prefixes, item) for item in LOOKUPS],
+         lambda: [trie.longest_prefix(item) for item in LOOKUPS]),
+        ('next subtree', lambda: [bisect_next_subtree(prefixes, item) for item in LOOKUPS],
+         lambda: [next(trie.items_after(item), None) for item in LOOKUPS]),
+    ]
+    print('{} registered subtrees, {} lookups x {} iterations'.format(len(prefixes), len(LOOKUPS), number))
+    for name, previous, current in cases:
+        previous_time = timeit.timeit(previous, number=number)
+        current_time = timeit.timeit(current, number=number)
+        print('{:<16} bisect: {:8.2f} us/lookup   trie: {:8.2f} us/lookup   ({:.1f}x)'.format(
+            name,
+            previous_time / number / len(LOOKUPS) * 1e6,
+            current_time / number / len(LOOKUPS) * 1e6,
+            previous_time / current_time,
+        ))
+
+
+if __name__ == '__main__':
+    main()
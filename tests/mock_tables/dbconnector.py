@@ -140,6 +140,20 @@ class SwssSyncClient(mockredis.MockRedis):
         # Find every key that matches the pattern
         return [key for key in self.redis.keys() if regex.match(key)]
 
+    # Patch mockredis/mockredis/client.py
+    # The official implementation matches the pattern against bytes,
+    # which fails once the keys are decoded
+    def scan(self, cursor=0, match=None, count=10):
+        """Emulate scan, looking at count keys per call."""
+        import fnmatch
+        import re
+
+        keys = sorted(self.redis.keys())
+        cursor = int(cursor)
+        next_cursor = cursor + count if cursor + count < len(keys) else 0
+        regex = re.compile(fnmatch.translate(match or '*'))
+        return next_cursor, [key for key in keys[cursor:cursor + count] if regex.match(key)]
+
 DBInterface._subscribe_keyspace_notification = _subscribe_keyspace_notification
 mockredis.MockRedis.config_set = config_set
 redis.StrictRedis = SwssSyncClient
@@ -16,7 +16,7 @@ from unittest import TestCase
 
 from ax_interface import ValueType
 from ax_interface.pdu_implementations import GetPDU, GetNextPDU
-from ax_interface.encodings import ObjectIdentifier
+from ax_interface.encodings import ObjectIdentifier, SearchRange
 from ax_interface.constants import PduTypes
 from ax_interface.pdu import PDU, PDUHeader
 from ax_interface.mib import MIBTable
@@ -1056,3 +1056,23 @@ class TestGetNextPDU_2863(TestCase):
         self.assertEqual(value0.type_, ValueType.OCTET_STRING)
         self.assertEqual(str(value0.name), str(ObjectIdentifier(12, 0, 1, 0, (1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 18, 3000))))
         self.assertEqual(str(value0.data), '')
+
+    def test_namespace_contexts(self):
+        """
+        Each namespace holding interfaces is served as a context listing only its own ports and LAGs.
+        """
+        lut = MIBTable(rfc2863.InterfaceMIBObjects, enable_context_registration=True)
+        updater = next(iter(lut.updater_instances))
+        self.assertEqual(sorted(lut.contexts), sorted(updater.get_contexts()))
+
+        sr = SearchRange(ObjectIdentifier(10, 0, 0, 0, (1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 1)),
+                         ObjectIdentifier(11, 0, 0, 0, (1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 2)))
+        context_if_ranges = []
+        for context, context_table in lut.contexts.items():
+            if_range = [vr.name.to_tuple()[11:] for vr in context_table.walk(sr)]
+            self.assertEqual(if_range, updater.namespace_if_range.get(context, []))
+            context_if_ranges.extend(if_range)
+        # management and VLAN interfaces are only served in the default context.
+        self.assertEqual(sorted(context_if_ranges),
+                         [sub_id for sub_id in updater.if_range
+                          if sub_id[0] not in updater.mgmt_oid_name_map and sub_id[0] not in updater.vlan_oid_name_map])
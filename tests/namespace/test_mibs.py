@@ -52,6 +52,38 @@ class TestGetNextPDU(TestCase):
             self.assertTrue(oid_name_map[intf_index] == recirc_port_name)
             self.assertTrue(if_id_map[intf_id_key] == recirc_port_name)
 
+    def test_dbs_get_all_many_namespace(self):
+        dbs = Namespace.init_namespace_dbs()
+        namespace_keys = [('asic0', 'PORT_TABLE:Ethernet0'), ('asic1', 'PORT_TABLE:Ethernet8'),
+                          ('asic1', 'PORT_TABLE:Ethernet0')]
+        namespace_db_map = Namespace.get_namespace_db_map(dbs)
+        hashes = Namespace.dbs_get_all_many_namespace(dbs, mibs.APPL_DB, namespace_keys)
+        for (namespace, key), _hash in zip(namespace_keys, hashes):
+            self.assertEqual(_hash, namespace_db_map[namespace].get_all(mibs.APPL_DB, key, blocking=False) or {})
+        # read in its own namespace only
+        self.assertEqual(hashes[2], {})
+
+        # merged over the namespaces
+        hashes = Namespace.dbs_get_all_many(dbs, mibs.APPL_DB, ['PORT_TABLE:Ethernet0', 'PORT_TABLE:Ethernet8'])
+        self.assertEqual(hashes, [Namespace.dbs_get_all(dbs, mibs.APPL_DB, 'PORT_TABLE:Ethernet0'),
+                                  Namespace.dbs_get_all(dbs, mibs.APPL_DB, 'PORT_TABLE:Ethernet8')])
+
+    def test_dbs_fan_out(self):
+        dbs = Namespace.init_namespace_dbs()
+        # asic1 entry, read from all namespaces at once
+        entry = Namespace.dbs_get_all(dbs, mibs.APPL_DB, 'PORT_TABLE:Ethernet8')
+        self.assertTrue(entry)
+        self.assertEqual(Namespace.dbs_get_all_first(dbs, mibs.APPL_DB, 'PORT_TABLE:Ethernet8', blocking=True), entry)
+        self.assertEqual(Namespace.dbs_get_all_first(dbs, mibs.APPL_DB, 'PORT_TABLE:Ethernet-missing'), {})
+
+        keys = Namespace.dbs_keys_namespace(dbs, mibs.APPL_DB, 'PORT_TABLE:*')
+        for db_index, db_conn in enumerate(dbs):
+            for key in db_conn.keys(mibs.APPL_DB, 'PORT_TABLE:*') or []:
+                self.assertIn(key, keys)
+        self.assertEqual(dbs[keys['PORT_TABLE:Ethernet8']].namespace, 'asic1')
+        self.assertEqual(sorted(Namespace.dbs_keys(dbs, mibs.APPL_DB, 'PORT_TABLE:*')),
+                         sorted(key for db_conn in dbs for key in db_conn.keys(mibs.APPL_DB, 'PORT_TABLE:*') or []))
+
     @classmethod
     def tearDownClass(cls):
         tests.mock_tables.dbconnector.clean_up_config()
@@ -6,7 +6,7 @@ sys.path.insert(0, os.path.join(modules_path, 'src'))
 import struct
 from unittest import TestCase
 from ax_interface.encodings import ObjectIdentifier, OctetString, SearchRange, ValueRepresentation
-from ax_interface import constants
+from ax_interface import codec, constants
 
 
 class TestPDUEncodings(TestCase):
@@ -108,3 +108,74 @@ class TestPDUEncodings(TestCase):
                                                        subids=(1, 6027, 3, 10, 1, 2, 9)), data=None)
         self.assertEqual(ValueRepresentation.from_bytes(vr.to_bytes('!'), '!'), vr)  # roundtrip
 
+    def test_from_buffer_offsets(self):
+        oids = [ObjectIdentifier(5, 2, 0, 0, (1, 1, 1, 0, i)) for i in range(40)]
+        encoded = b''.join(SearchRange(oid, oid.inc()).to_bytes('<') for oid in oids)
+        buf = memoryview(b'\xff' * 3 + encoded)
+
+        offset = 3
+        decoded = []
+        while offset < len(buf):
+            sr, offset = SearchRange.from_buffer(buf, offset, '<')
+            decoded.append(sr.start)
+        self.assertEqual(decoded, oids)
+        self.assertEqual(offset, len(buf))
+
+    def test_octet_string_from_buffer(self):
+        s = OctetString.from_string('abcde')
+        buf = bytearray(b'\x00' * 4) + s.to_bytes('!') + s.to_bytes('!')
+        first, offset = OctetString.from_buffer(buf, 4, '!')
+        second, offset = OctetString.from_buffer(buf, offset, '!')
+        self.assertEqual(first, s)
+        self.assertEqual(second, s)
+        self.assertEqual(offset, len(buf))
+        self.assertIsInstance(first.string, bytes)
+
+    def test_value_representation_from_buffer(self):
+        name = ObjectIdentifier(n_subid=7, prefix_=4, include=0, reserved=0, subids=(1, 6027, 3, 10, 1, 2, 9))
+        vrs = [
+            ValueRepresentation.from_typecast(constants.ValueType.INTEGER, name, 42),
+            ValueRepresentation.from_typecast(constants.ValueType.COUNTER_64, name, 2 ** 40),
+            ValueRepresentation.from_typecast(constants.ValueType.OCTET_STRING, name, 'Ethernet0'),
+            ValueRepresentation.from_typecast(constants.ValueType.OBJECT_IDENTIFIER, name, (1, 3, 6, 1, 2, 1)),
+            ValueRepresentation.from_typecast(constants.ValueType.END_OF_MIB_VIEW, name, None),
+        ]
+        buf = memoryview(b''.join(vr.to_bytes('!') for vr in vrs))
+        offset = 0
+        for vr in vrs:
+            decoded, offset = ValueRepresentation.from_buffer(buf, offset, '!')
+            self.assertEqual(decoded, vr)
+        self.assertEqual(offset, len(buf))
+
+    def test_value_representation_all_types(self):
+        name = ObjectIdentifier.from_iterable((1, 3, 6, 1, 2, 1, 2, 2, 1, 10, 1))
+        samples = {
+            constants.ValueType.INTEGER: 0xffffffff,
+            constants.ValueType.COUNTER_32: 12,
+            constants.ValueType.GAUGE_32: 10000,
+            constants.ValueType.TIME_TICKS: 360000,
+            constants.ValueType.COUNTER_64: 2 ** 64 - 1,
+            constants.ValueType.IP_ADDRESS: b'\x0a\x00\x00\x01',
+            constants.ValueType.OPAQUE: b'\x01\x02\x03',
+            constants.ValueType.OCTET_STRING: 'Ethernet0',
+            constants.ValueType.OBJECT_IDENTIFIER: (1, 3, 6, 1, 4, 1, 9),
+        }
+        for type_ in constants.ValueType:
+            for endianness in ('!', '<'):
+                vr = ValueRepresentation.from_typecast(type_, name, samples.get(type_))
+                encoded = vr.to_bytes(endianness)
+                self.assertEqual(len(encoded), vr.size)
+                self.assertEqual(ValueRepresentation.from_bytes(encoded, endianness), vr)
+
+    def test_value_representation_unknown_type(self):
+        name = ObjectIdentifier.from_iterable((1, 3, 6, 1, 2, 1))
+        vr = ValueRepresentation(1000, 0, name, 0)
+        with self.assertRaises(ValueError):
+            vr.to_bytes('!')
+
+    def test_oid_codec_memoized(self):
+        for endianness in ('!', '<'):
+            codec_ = codec.oid(endianness, 3)
+            self.assertIs(codec.oid(endianness, 3), codec_)
+            self.assertEqual(codec_.format, endianness + 'BBBB3L')
+        self.assertIsNot(codec.oid('!', 3), codec.oid('<', 3))
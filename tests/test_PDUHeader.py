@@ -10,8 +10,8 @@ from unittest import TestCase
 from ax_interface.pdu import PDU, PDUHeader, PDUHeaderTags, supported_pdus, ContextOptionalPDU, _ignored_pdus, PDUStream
 from ax_interface.pdu_implementations import OpenPDU, ResponsePDU, RegisterPDU, GetPDU
 from ax_interface import exceptions
-from ax_interface.encodings import ObjectIdentifier
-from ax_interface.constants import PduTypes
+from ax_interface.encodings import ObjectIdentifier, ValueRepresentation
+from ax_interface.constants import PduTypes, ValueType
 from ax_interface.mib import MIBTable
 from sonic_ax_impl.mibs.vendor.dell import force10
 
@@ -128,6 +128,31 @@ class TestResponsePDU(TestCase):
         self.assertEqual(response_pdu, decoded)
         print(response_pdu)
 
+    def test_encode_values(self):
+        name = ObjectIdentifier(5, 2, 0, 0, (2, 2, 1, 10, 1))
+        values = [
+            ValueRepresentation.from_typecast(ValueType.COUNTER_32, name._replace(subids=(2, 2, 1, 10, i)), i)
+            for i in range(1, 100)
+        ]
+        values.append(ValueRepresentation.from_typecast(ValueType.OCTET_STRING, name, 'Ethernet0'))
+        values.append(ValueRepresentation.from_typecast(ValueType.END_OF_MIB_VIEW, name, None))
+        response_pdu = ResponsePDU(
+            header=PDUHeader(1, PduTypes.RESPONSE, 16, 0, 42, 0, 0, 0),
+            sys_up_time=0,
+            error=0,
+            index=0,
+            values=values,
+        )
+
+        encoded = response_pdu.encode()
+        self.assertEqual(len(encoded), response_pdu.size)
+        self.assertEqual(response_pdu.header.payload_length, response_pdu.size - 20)
+        self.assertEqual(
+            bytes(encoded),
+            response_pdu.header.to_bytes() + b'\x00' * 8 + b''.join(vr.to_bytes('!') for vr in values)
+        )
+        self.assertEqual(PDU.decode(encoded), response_pdu)
+
 
 class TestRegisterPDU(TestCase):
     def test_roundtrip(self):
@@ -233,6 +258,31 @@ class TestGetPDU(TestCase):
         print(get_pdu)
 
 
+class TestPDUFromBuffer(TestCase):
+    def test_from_buffer(self):
+        get_pdu = GetPDU(
+            header=PDUHeader(1, PduTypes.GET, 16, 0, 42, 0, 0, 0),
+            oids=[ObjectIdentifier(5, 2, 0, 0, (1, 1, 1, 0, i)) for i in range(60)]
+        )
+        encoded = get_pdu.encode()
+        buf = memoryview(encoded * 3)
+
+        offset = 0
+        for _ in range(3):
+            decoded, offset = PDU.from_buffer(buf, offset)
+            self.assertEqual(decoded, get_pdu)
+            self.assertIsInstance(decoded._trailing_bytes, bytes)
+        self.assertEqual(offset, len(buf))
+
+    def test_truncated_payload(self):
+        encoded = GetPDU(
+            header=PDUHeader(1, PduTypes.GET, 16, 0, 42, 0, 0, 0),
+            oids=(ObjectIdentifier(4, 2, 0, 0, (1, 1, 1, 0)),)
+        ).encode()
+        with self.assertRaises(exceptions.PDUUnpackError):
+            PDU.from_buffer(encoded[:-4])
+
+
 class TestGetNextPDU(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -2,7 +2,7 @@ import asyncio
 import os
 import sys
 import time
-from unittest import TestCase
+from unittest import TestCase, mock
 
 modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, os.path.join(modules_path, 'src'))
@@ -25,3 +25,20 @@ class TestAgentLoop(TestCase):
         agent = ax_interface.Agent(SonicMIB, False, 5, event_loop)
         event_loop.create_task(self.delayed_shutdown(agent))
         event_loop.run_until_complete(agent.run_in_event_loop())
+
+
+class TestAgentStats(TestCase):
+    def test_report_stats(self):
+        event_loop = asyncio.new_event_loop()
+        self.addCleanup(event_loop.close)
+        agent = ax_interface.Agent(SonicMIB, True, 5, event_loop, idle_timeout=60)
+        agent.add_stats_source('custom', lambda: {'reads': 1})
+        agent.add_stats_source('broken', lambda: 1 / 0)
+        with mock.patch('ax_interface.logger.info') as info, mock.patch('ax_interface.logger.exception') as exception:
+            agent.report_stats()
+        lines = [call[0][0] for call in info.call_args_list]
+        self.assertEqual([line.split(']')[0] for line in lines],
+                         ['Stats [loop_monitor', 'Stats [updater_access', 'Stats [update_frequency', 'Stats [custom'])
+        self.assertEqual(lines[-1], 'Stats [custom]: {"reads": 1}')
+        # a failing source does not keep the others from being reported
+        self.assertEqual(exception.call_count, 1)
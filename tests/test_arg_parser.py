@@ -20,6 +20,12 @@ class TestUtil(TestCase):
         self.assertNotIn("unix_socket_path", args)
         self.assertNotIn("update_frequency", args)
         self.assertNotIn("enable_dynamic_frequency", args)
+        self.assertNotIn("enable_context_registration", args)
+        self.assertNotIn("update_workers", args)
+        self.assertNotIn("process_updaters", args)
+        self.assertNotIn("updater_config", args)
+        self.assertNotIn("idle_timeout", args)
+        self.assertNotIn("update_duty_budget", args)
 
     # Given: Pass --port=aaa
     # When: Parse args
@@ -41,7 +47,7 @@ class TestUtil(TestCase):
         with pytest.raises(SystemExit) as excinfo:
             process_options("sonic_ax_impl")
         assert excinfo.value.code == 0
-        mock_print.assert_called_with('Usage: python ', 'sonic_ax_impl', '-t [host] -p [port] -s [unix_socket_path] -d [logging_level] -f [update_frequency] -r [enable_dynamic_frequency] -h [help]')
+        mock_print.assert_called_with('Usage: python ', 'sonic_ax_impl', '-t [host] -p [port] -s [unix_socket_path] -d [logging_level] -f [update_frequency] -r [enable_dynamic_frequency] -c [enable_context_registration] -w [update_workers] -u [process_updaters] -i [updater_config] -l [idle_timeout] -b [update_duty_budget] -h [help]')
 
     # Given: Pass help
     # When: Parse args
@@ -52,7 +58,7 @@ class TestUtil(TestCase):
         with pytest.raises(SystemExit) as excinfo:
             process_options("sonic_ax_impl")
         assert excinfo.value.code == 0
-        mock_print.assert_called_with('Usage: python ', 'sonic_ax_impl', '-t [host] -p [port] -s [unix_socket_path] -d [logging_level] -f [update_frequency] -r [enable_dynamic_frequency] -h [help]')
+        mock_print.assert_called_with('Usage: python ', 'sonic_ax_impl', '-t [host] -p [port] -s [unix_socket_path] -d [logging_level] -f [update_frequency] -r [enable_dynamic_frequency] -c [enable_context_registration] -w [update_workers] -u [process_updaters] -i [updater_config] -l [idle_timeout] -b [update_duty_budget] -h [help]')
 
     # Given: Pass -r
     # When: Parse args
@@ -70,6 +76,62 @@ class TestUtil(TestCase):
         args = process_options("sonic_ax_impl")
         self.assertEqual(args["enable_dynamic_frequency"], True)
 
+    # Given: Pass -c
+    # When: Parse args
+    # Then: Enable enable_context_registration
+    @patch('sys.argv', ['sonic_ax_impl', '-c'])
+    def test_valid_options_enable_context_registration(self):
+        args = process_options("sonic_ax_impl")
+        self.assertEqual(args["enable_context_registration"], True)
+
+    # Given: Pass --enable_context_registration
+    # When: Parse args
+    # Then: Enable enable_context_registration
+    @patch('sys.argv', ['sonic_ax_impl', '--enable_context_registration'])
+    def test_valid_options_enable_context_registration_long(self):
+        args = process_options("sonic_ax_impl")
+        self.assertEqual(args["enable_context_registration"], True)
+
+    # Given: Pass -w
+    # When: Parse args
+    # Then: Set update_workers
+    @patch('sys.argv', ['sonic_ax_impl', '-w4'])
+    def test_valid_options_update_workers(self):
+        args = process_options("sonic_ax_impl")
+        self.assertEqual(args["update_workers"], 4)
+
+    # Given: Pass -u
+    # When: Parse args
+    # Then: Enable process_updaters
+    @patch('sys.argv', ['sonic_ax_impl', '-u'])
+    def test_valid_options_process_updaters(self):
+        args = process_options("sonic_ax_impl")
+        self.assertEqual(args["process_updaters"], True)
+
+    # Given: Pass --updater_config
+    # When: Parse args
+    # Then: Set updater_config
+    @patch('sys.argv', ['sonic_ax_impl', '--updater_config=/etc/sonic/snmp_updaters.json'])
+    def test_valid_options_updater_config(self):
+        args = process_options("sonic_ax_impl")
+        self.assertEqual(args["updater_config"], "/etc/sonic/snmp_updaters.json")
+
+    # Given: Pass -l
+    # When: Parse args
+    # Then: Set idle_timeout
+    @patch('sys.argv', ['sonic_ax_impl', '-l300'])
+    def test_valid_options_idle_timeout(self):
+        args = process_options("sonic_ax_impl")
+        self.assertEqual(args["idle_timeout"], 300)
+
+    # Given: Pass --update_duty_budget
+    # When: Parse args
+    # Then: Set update_duty_budget
+    @patch('sys.argv', ['sonic_ax_impl', '--update_duty_budget=0.2'])
+    def test_valid_options_update_duty_budget(self):
+        args = process_options("sonic_ax_impl")
+        self.assertEqual(args["update_duty_budget"], 0.2)
+
     # Given: Pass -f
     # When: Parse args
     # Then: Enable enable_dynamic_frequency
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase, mock
+
+from ax_interface import frequency
+from ax_interface.constants import MAX_UPDATE_INTERVAL
+from ax_interface.frequency import FrequencyController, duty_cap
+from ax_interface.mib import MIBUpdater
+
+
+class FixedUpdater(MIBUpdater):
+    def __init__(self, interval):
+        super().__init__()
+        self.frequency = interval
+
+    def update_data(self):
+        pass
+
+
+class SlowUpdater(FixedUpdater):
+    def update_data(self):
+        time.sleep(0.1)
+
+
+class SlicedUpdater(FixedUpdater):
+    def update_data_chunks(self):
+        for _ in range(3):
+            yield
+
+
+class TestFrequencyController(TestCase):
+    def setUp(self):
+        # no CPU load unless a test sets one
+        patcher = mock.patch.object(FrequencyController, '_sample_cpu_load')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.controller = FrequencyController(duty_budget=0.1)
+
+    def settle(self, updaters_times, cycles=20):
+        intervals = {}
+        for _ in range(cycles):
+            for updater, execution_time in updaters_times:
+                intervals[updater] = self.controller.next_interval(updater, execution_time)
+        return intervals
+
+    def test_within_budget(self):
+        cheap = FixedUpdater(5)
+        intervals = self.settle([(cheap, 0.01)])
+        self.assertEqual(intervals[cheap], 5)
+
+    def test_expensive_slowed_first(self):
+        cheap, expensive = FixedUpdater(5), FixedUpdater(5)
+        intervals = self.settle([(cheap, 0.05), (expensive, 2)])
+        # the cheap updater keeps its interval, the expensive one gets the rest of the budget
+        self.assertEqual(intervals[cheap], 5)
+        self.assertAlmostEqual(2 / intervals[expensive], 0.09, delta=0.09 * frequency.HYSTERESIS)
+
+    def test_hysteresis(self):
+        updater = FixedUpdater(5)
+        first = self.settle([(updater, 1)])[updater]
+        # a slightly slower cycle moves the target by less than the deadband
+        self.assertEqual(self.controller.next_interval(updater, 1.1), first)
+
+    def test_back_to_configured_interval(self):
+        updater = FixedUpdater(5)
+        self.settle([(updater, 2)])
+        intervals = self.settle([(updater, 0.01)], cycles=50)
+        self.assertEqual(intervals[updater], 5)
+
+    def test_loop_lag_pressure(self):
+        updater = FixedUpdater(5)
+        relaxed = self.settle([(updater, 1)])[updater]
+        for _ in range(20):
+            self.controller.observe_loop_lag(frequency.LOOP_LAG_TARGET * 2)
+        self.assertAlmostEqual(self.controller.pressure, 2)
+        loaded = self.settle([(updater, 1)])[updater]
+        self.assertAlmostEqual(loaded / relaxed, 2, delta=2 * frequency.HYSTERESIS)
+
+    def test_max_interval(self):
+        updater = FixedUpdater(5)
+        self.controller.cpu_load = frequency.CPU_LOAD_TARGET * 100
+        self.assertEqual(self.controller.pressure, frequency.MAX_PRESSURE)
+        intervals = self.settle([(updater, 100)])
+        self.assertEqual(intervals[updater], MAX_UPDATE_INTERVAL)
+
+    def test_duty_cap(self):
+        self.assertEqual(duty_cap([], 0.1), float('inf'))
+        self.assertAlmostEqual(duty_cap([0.05, 0.05, 0.05], 0.1), 0.1 / 3)
+
+
+class TestLoopResidentTime(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def run_cycle(self, updater):
+        updater.enable_dynamic_frequency = True
+        updater.frequency_controller = mock.Mock(**{'next_interval.return_value': updater.frequency})
+        self.loop.run_until_complete(updater.run_cycle())
+        (_, execution_time), _ = updater.frequency_controller.next_interval.call_args
+        return execution_time
+
+    def test_executor_cycle(self):
+        updater = SlowUpdater(5)
+        with ThreadPoolExecutor(1) as executor:
+            updater.executor = executor
+            # only publishing the update took event loop time
+            self.assertLess(self.run_cycle(updater), 0.05)
+
+    def test_sliced_cycle(self):
+        updater = SlicedUpdater(5)
+
+        async def busy_loop():
+            # requests served in between the slices
+            for _ in range(3):
+                await asyncio.sleep(0)
+                time.sleep(0.05)
+
+        task = self.loop.create_task(busy_loop())
+        self.assertLess(self.run_cycle(updater), 0.05)
+        self.loop.run_until_complete(task)
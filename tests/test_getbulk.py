@@ -0,0 +1,148 @@
+import os
+import sys
+from bisect import bisect_right
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase
+
+from ax_interface import ValueType
+from ax_interface.constants import PduTypes
+from ax_interface.encodings import ObjectIdentifier, SearchRange
+from ax_interface.mib import MIBMeta, MIBTable, MIBUpdater, MIBEntry, SubtreeMIBEntry
+from ax_interface.pdu import PDU, PDUHeader
+from ax_interface.pdu_implementations import GetBulkPDU, GetNextPDU
+
+
+class IndexUpdater(MIBUpdater):
+    def __init__(self):
+        super().__init__()
+        self.if_range = [(i,) for i in (1, 2, 5, 9)]
+        self.get_next_calls = 0
+
+    def update_data(self):
+        return
+
+    def get_next(self, sub_id):
+        self.get_next_calls += 1
+        right = bisect_right(self.if_range, sub_id)
+        if right == len(self.if_range):
+            return None
+        return self.if_range[right]
+
+    def get_index(self, sub_id):
+        if sub_id in self.if_range:
+            return sub_id[0]
+
+    def get_name(self, sub_id):
+        if sub_id in self.if_range:
+            return 'Ethernet{}'.format(sub_id[0])
+
+
+class WalkMIB(metaclass=MIBMeta, prefix='.1.3.6.1.2.1.2'):
+    updater = IndexUpdater()
+
+    ifNumber = MIBEntry('1.0', ValueType.INTEGER, lambda: 4)
+
+    ifIndex = SubtreeMIBEntry('2.1.1', updater, ValueType.INTEGER, updater.get_index)
+
+    ifDescr = SubtreeMIBEntry('2.1.2', updater, ValueType.OCTET_STRING, updater.get_name)
+
+
+def make_oid(*subids):
+    return ObjectIdentifier.from_iterable((1, 3, 6, 1, 2, 1, 2) + subids)
+
+
+class TestMIBTableWalk(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lut = MIBTable(WalkMIB)
+
+    def test_walk_matches_get_next(self):
+        sr = SearchRange(make_oid(), ObjectIdentifier.null_oid())
+        walked = [str(vr.name) for vr in self.lut.walk(sr)]
+
+        expected = []
+        while True:
+            vr = self.lut.get_next(sr)
+            if vr.type_ == ValueType.END_OF_MIB_VIEW:
+                break
+            expected.append(str(vr.name))
+            sr = SearchRange(vr.name, ObjectIdentifier.null_oid())
+
+        self.assertEqual(walked, expected)
+        self.assertEqual(walked[0], '.1.3.6.1.2.1.2.1.0')
+        self.assertEqual(walked[1:5], ['.1.3.6.1.2.1.2.2.1.1.{}'.format(i) for i in (1, 2, 5, 9)])
+        self.assertEqual(walked[5:], ['.1.3.6.1.2.1.2.2.1.2.{}'.format(i) for i in (1, 2, 5, 9)])
+
+    def test_walk_end_bound(self):
+        sr = SearchRange(make_oid(2, 1, 1, 2), make_oid(2, 1, 2))
+        walked = [str(vr.name) for vr in self.lut.walk(sr)]
+        self.assertEqual(walked, ['.1.3.6.1.2.1.2.2.1.1.5', '.1.3.6.1.2.1.2.2.1.1.9'])
+
+    def test_walk_keeps_cursor(self):
+        sr = SearchRange(make_oid(2, 1, 1), ObjectIdentifier.null_oid())
+        calls = WalkMIB.updater.get_next_calls
+        walked = list(self.lut.walk(sr))
+        self.assertEqual(len(walked), 8)
+        # one call per value, plus one per subtree to find its end.
+        self.assertEqual(WalkMIB.updater.get_next_calls - calls, 10)
+
+
+class TestGetBulkPDU(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lut = MIBTable(WalkMIB)
+
+    def make_pdu(self, non_repeaters, max_repetitions, oids):
+        return GetBulkPDU(
+            header=PDUHeader(1, PduTypes.GET_BULK, 16, 0, 42, 0, 0, 0),
+            non_repeaters=non_repeaters,
+            max_repetitions=max_repetitions,
+            oids=oids
+        )
+
+    def test_roundtrip(self):
+        get_bulk = self.make_pdu(1, 10, [make_oid(1), make_oid(2, 1, 1), make_oid(2, 1, 2)])
+        decoded = PDU.decode(get_bulk.encode())
+        self.assertIsInstance(decoded, GetBulkPDU)
+        self.assertEqual(decoded, get_bulk)
+        self.assertEqual(decoded.non_repeaters, 1)
+        self.assertEqual(decoded.max_repetitions, 10)
+        self.assertEqual(len(decoded.sr), 3)
+
+    def test_make_response(self):
+        get_bulk = self.make_pdu(1, 3, [make_oid(), make_oid(2, 1, 1), make_oid(2, 1, 2)])
+        response = get_bulk.make_response(self.lut)
+        names = [str(vr.name) for vr in response.values]
+        self.assertEqual(names, [
+            # non-repeater
+            '.1.3.6.1.2.1.2.1.0',
+            # repetitions, one row at a time
+            '.1.3.6.1.2.1.2.2.1.1.1', '.1.3.6.1.2.1.2.2.1.2.1',
+            '.1.3.6.1.2.1.2.2.1.1.2', '.1.3.6.1.2.1.2.2.1.2.2',
+            '.1.3.6.1.2.1.2.2.1.1.5', '.1.3.6.1.2.1.2.2.1.2.5',
+        ])
+        self.assertEqual(response.values[2].data.string, b'Ethernet1')
+        self.assertEqual(response.header.type_, PduTypes.RESPONSE)
+
+    def test_end_of_mib_view(self):
+        get_bulk = self.make_pdu(0, 10, [make_oid(2, 1, 1, 5), make_oid(2, 1, 2, 5)])
+        response = get_bulk.make_response(self.lut)
+        types = [vr.type_ for vr in response.values]
+        self.assertEqual(types, [
+            ValueType.INTEGER, ValueType.OCTET_STRING,
+            ValueType.OCTET_STRING, ValueType.END_OF_MIB_VIEW,
+            ValueType.OCTET_STRING, ValueType.END_OF_MIB_VIEW,
+            ValueType.OCTET_STRING, ValueType.END_OF_MIB_VIEW,
+            ValueType.OCTET_STRING, ValueType.END_OF_MIB_VIEW,
+            ValueType.END_OF_MIB_VIEW, ValueType.END_OF_MIB_VIEW,
+        ])
+        self.assertEqual(str(response.values[3].name), '.1.3.6.1.2.1.2.2.1.2.9')
+
+    def test_matches_get_next(self):
+        oid = make_oid(2, 1, 1, 2)
+        get_bulk = self.make_pdu(1, 0, [oid])
+        get_next = GetNextPDU(header=PDUHeader(1, PduTypes.GET_NEXT, 16, 0, 42, 0, 0, 0), oids=[oid])
+        self.assertEqual(get_bulk.make_response(self.lut).values, get_next.make_response(self.lut).values)
@@ -0,0 +1,588 @@
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase
+
+from ax_interface import ValueType
+from ax_interface.constants import PduTypes
+from ax_interface.encodings import ObjectIdentifier, OctetString, SearchRange
+from ax_interface.mib import MIBMeta, MIBTable, MIBEntry, MIBUpdater, SubtreeMIBEntry, get_next_in_sorted
+from ax_interface.pdu import PDU, PDUHeader
+from ax_interface.pdu_implementations import GetPDU, GetNextPDU, ResponsePDU
+from ax_interface.trie import OidTrie
+
+
+class SystemMIB(metaclass=MIBMeta, prefix='.1.3.6.1.2.1.1'):
+    sysDescr = MIBEntry('1.0', ValueType.OCTET_STRING, lambda: 'SONiC')
+
+    sysUpTime = MIBEntry('3.0', ValueType.TIME_TICKS, lambda: 100)
+
+
+class NestedMIB(metaclass=MIBMeta, prefix='.1.3.6.1.2.1.4'):
+    # a registration enclosing other registrations
+    ipForwarding = MIBEntry('1', ValueType.INTEGER, lambda: 1)
+
+    ipDefaultTTL = MIBEntry('1.2', ValueType.INTEGER, lambda: 64)
+
+    ipInReceives = MIBEntry('3.0', ValueType.COUNTER_32, lambda: 10)
+
+
+class OverlappingMIB(SystemMIB, NestedMIB):
+    pass
+
+
+class SortedUpdater(MIBUpdater):
+    def __init__(self, sub_ids):
+        super().__init__()
+        self.sub_ids = sorted(sub_ids)
+
+    def update_data(self):
+        pass
+
+    def get_next(self, sub_id):
+        return get_next_in_sorted(self.sub_ids, sub_id)[0]
+
+    def value(self, sub_id):
+        if sub_id in self.sub_ids:
+            return len(sub_id)
+
+
+class NestedSubtreeMIB(metaclass=MIBMeta, prefix='.1.3.6.1.4.1.9'):
+    # (5, 3) falls within the nested registration, which serves it instead.
+    parent_updater = SortedUpdater([(3,), (5, 3), (7,), (9,)])
+
+    parent = SubtreeMIBEntry('2', parent_updater, ValueType.INTEGER, parent_updater.value)
+
+    child_updater = SortedUpdater([(1,), (2,)])
+
+    child = SubtreeMIBEntry('2.5', child_updater, ValueType.INTEGER, child_updater.value)
+
+    sibling = MIBEntry('3.0', ValueType.INTEGER, lambda: 1)
+
+
+class FdbUpdater(MIBUpdater):
+    def __init__(self):
+        super().__init__()
+        self.update_data()
+        self.hints = []
+
+    def update_data(self):
+        self.vlanmac_list = sorted((1000, 0, 0, 0, 0, i // 256, i % 256) for i in range(500))
+
+    def get_next(self, sub_id):
+        return get_next_in_sorted(self.vlanmac_list, sub_id)[0]
+
+    def get_next_hinted(self, sub_id, hint):
+        self.hints.append(hint)
+        return get_next_in_sorted(self.vlanmac_list, sub_id, hint)
+
+    def fdb_port(self, sub_id):
+        if sub_id in self.vlanmac_list:
+            return sub_id[-1] % 32 + 1
+
+
+class FdbMIB(metaclass=MIBMeta, prefix='.1.3.6.1.2.1.17.7.1'):
+    fdb_updater = FdbUpdater()
+
+    dot1qTpFdbPort = SubtreeMIBEntry('2.2.1.2', fdb_updater, ValueType.INTEGER, fdb_updater.fdb_port)
+
+
+class TestOidTrie(TestCase):
+    def setUp(self):
+        self.keys = [(1, 3), (1, 3, 6, 1, 2), (1, 3, 6, 1, 2, 1, 2), (1, 3, 6, 1, 2, 1, 4, 21), (1, 3, 6, 1, 4, 1),
+                     (1, 3, 6, 1, 4, 1, 9), (2,)]
+        self.trie = OidTrie((key, str(key)) for key in reversed(self.keys))
+
+    def test_mapping(self):
+        self.assertEqual(len(self.trie), len(self.keys))
+        self.assertEqual(list(self.trie), self.keys)
+        self.assertEqual(self.trie[(1, 3, 6, 1, 4, 1)], '(1, 3, 6, 1, 4, 1)')
+        self.assertIn((2,), self.trie)
+        self.assertNotIn((1, 3, 6), self.trie)
+        with self.assertRaises(KeyError):
+            self.trie[(1, 3, 6)]
+
+    def test_longest_prefix(self):
+        self.assertEqual(self.trie.longest_prefix((1, 3, 6, 1, 2, 1, 3, 1))[0], (1, 3, 6, 1, 2))
+        self.assertEqual(self.trie.longest_prefix((1, 3, 6, 1, 2, 1, 2))[0], (1, 3, 6, 1, 2, 1, 2))
+        self.assertIsNone(self.trie.longest_prefix((1, 4)))
+        self.assertIsNone(self.trie.longest_prefix(()))
+
+    def test_items_after(self):
+        for oid in [(), (1,), (1, 3), (1, 3, 6, 1, 2, 1), (1, 3, 6, 1, 2, 1, 2, 0), (1, 3, 6, 1, 3), (1, 3, 6, 1, 5),
+                    (2,), (3,)]:
+            expected = [key for key in self.keys if key > oid]
+            self.assertEqual([key for key, _ in self.trie.items_after(oid)], expected, oid)
+            expected = [key for key in self.keys if key >= oid]
+            self.assertEqual([key for key, _ in self.trie.items_after(oid, inclusive=True)], expected, oid)
+
+    def test_first_after(self):
+        self.assertEqual(self.trie.first_after((1, 3))[0], (1, 3, 6, 1, 2))
+        self.assertEqual(self.trie.first_after((1, 3, 6, 1, 2, 1, 3))[0], (1, 3, 6, 1, 2, 1, 4, 21))
+        self.assertIsNone(self.trie.first_after((2,)))
+
+    def test_first_at_or_after(self):
+        self.assertEqual(self.trie.first_at_or_after((1, 3))[0], (1, 3))
+        self.assertEqual(self.trie.first_at_or_after((1, 3, 6, 1, 2, 1, 3))[0], (1, 3, 6, 1, 2, 1, 4, 21))
+        self.assertIsNone(self.trie.first_at_or_after((2, 0)))
+
+    def test_next_after_subtree(self):
+        self.assertEqual(self.trie.next_after_subtree((1, 3, 6, 1, 2))[0], (1, 3, 6, 1, 4, 1))
+        self.assertEqual(self.trie.next_after_subtree((1, 3, 6, 1, 4))[0], (2,))
+        self.assertEqual(self.trie.next_after_subtree((1, 3, 6, 1, 3, 7))[0], (1, 3, 6, 1, 4, 1))
+        self.assertIsNone(self.trie.next_after_subtree((2,)))
+
+
+def get_sr(*oid):
+    oid = ObjectIdentifier.from_iterable(oid)
+    return SearchRange(oid, oid.inc())
+
+
+class TestMIBTableLookup(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lut = MIBTable(OverlappingMIB)
+
+    def test_trie(self):
+        trie = OverlappingMIB.__subtree_trie__
+        self.assertIs(self.lut.trie, trie)
+        self.assertEqual(list(trie), sorted(self.lut.prefixes))
+        self.assertEqual(len(trie), len(self.lut))
+
+    def test_longest_prefix(self):
+        def longest_prefix(oid):
+            match = self.lut.trie.longest_prefix(oid)
+            return match[0] if match is not None else None
+
+        self.assertEqual(longest_prefix((1, 3, 6, 1, 2, 1, 1, 1, 0)), (1, 3, 6, 1, 2, 1, 1, 1, 0))
+        self.assertEqual(longest_prefix((1, 3, 6, 1, 2, 1, 4, 1, 2, 0)), (1, 3, 6, 1, 2, 1, 4, 1, 2))
+        # follows a sibling (1.2) of the enclosing registration (1)
+        self.assertEqual(longest_prefix((1, 3, 6, 1, 2, 1, 4, 1, 3)), (1, 3, 6, 1, 2, 1, 4, 1))
+        self.assertIsNone(longest_prefix((1, 3, 6, 1, 2, 1, 2)))
+        self.assertIsNone(longest_prefix((1, 3, 6, 1, 2, 1, 1, 2)))
+        self.assertIsNone(longest_prefix((1,)))
+
+    def test_get(self):
+        vr = self.lut.get(get_sr(1, 3, 6, 1, 2, 1, 1, 3, 0))
+        self.assertEqual(vr.type_, ValueType.TIME_TICKS)
+        self.assertEqual(vr.data, 100)
+
+        vr = self.lut.get(get_sr(1, 3, 6, 1, 2, 1, 1, 2, 0))
+        self.assertEqual(vr.type_, ValueType.NO_SUCH_OBJECT)
+
+    def test_get_next_across_subtrees(self):
+        sr = SearchRange(ObjectIdentifier.from_iterable((1, 3, 6, 1, 2, 1, 1, 1, 0)), ObjectIdentifier.null_oid())
+        vr = self.lut.get_next(sr)
+        self.assertEqual(str(vr.name), '.1.3.6.1.2.1.1.3.0')
+
+        sr = SearchRange(vr.name, ObjectIdentifier.from_iterable((1, 3, 6, 1, 2, 1, 4)))
+        vr = self.lut.get_next(sr)
+        self.assertEqual(vr.type_, ValueType.END_OF_MIB_VIEW)
+
+    def test_walk_order(self):
+        sr = SearchRange(ObjectIdentifier.from_iterable((1, 3, 6, 1, 2, 1)), ObjectIdentifier.null_oid())
+        names = [str(vr.name) for vr in self.lut.walk(sr)]
+        self.assertEqual(names, [
+            '.1.3.6.1.2.1.1.1.0',
+            '.1.3.6.1.2.1.1.3.0',
+            '.1.3.6.1.2.1.4.1',
+            '.1.3.6.1.2.1.4.1.2',
+            '.1.3.6.1.2.1.4.3.0',
+        ])
+
+
+class TestNestedSubtreeWalk(TestCase):
+    prefix = (1, 3, 6, 1, 4, 1, 9)
+
+    expected = [prefix + (2, 3), prefix + (2, 5, 1), prefix + (2, 5, 2), prefix + (2, 7), prefix + (2, 9),
+                prefix + (3, 0)]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.lut = MIBTable(NestedSubtreeMIB)
+
+    def walk(self, oid):
+        sr = SearchRange(ObjectIdentifier.from_iterable(oid), ObjectIdentifier.null_oid())
+        return [vr.name.to_tuple() for vr in self.lut.walk(sr)]
+
+    def test_walk_interleaves_nested_subtree(self):
+        self.assertEqual(self.walk(self.prefix), self.expected)
+
+    def test_walk_from_each_variable(self):
+        for i, oid in enumerate(self.expected):
+            self.assertEqual(self.walk(oid), self.expected[i + 1:], oid)
+
+    def test_get_next_chain(self):
+        names = []
+        oid = ObjectIdentifier.from_iterable(self.prefix)
+        while True:
+            vr = self.lut.get_next(SearchRange(oid, ObjectIdentifier.null_oid()), 1)
+            if vr.type_ == ValueType.END_OF_MIB_VIEW:
+                break
+            names.append(vr.name.to_tuple())
+            oid = vr.name
+        self.assertEqual(names, self.expected)
+
+    def test_walk_from_shadowed_oid(self):
+        # inside the nested subtree, past its last variable
+        self.assertEqual(self.walk(self.prefix + (2, 5, 3)), self.expected[3:])
+
+
+class TestGetNextContinuation(TestCase):
+    def setUp(self):
+        self.lut = MIBTable(FdbMIB)
+        self.updater = FdbMIB.fdb_updater
+        self.updater.update_data()
+        self.updater.hints.clear()
+
+    def walk(self, session_id, steps, oid=(1, 3, 6, 1, 2, 1, 17, 7, 1, 2, 2, 1, 2)):
+        names = []
+        oid = ObjectIdentifier.from_iterable(oid)
+        for _ in range(steps):
+            vr = self.lut.get_next(SearchRange(oid, ObjectIdentifier.null_oid()), session_id)
+            if vr.type_ == ValueType.END_OF_MIB_VIEW:
+                break
+            names.append(vr.name.to_tuple())
+            oid = vr.name
+        return names
+
+    def test_get_next_in_sorted(self):
+        sub_ids = [(1,), (2,), (5,), (9,)]
+        self.assertEqual(get_next_in_sorted(sub_ids, ()), ((1,), (sub_ids, 0)))
+        self.assertEqual(get_next_in_sorted(sub_ids, (2,), (sub_ids, 1)), ((5,), (sub_ids, 2)))
+        # a hint pointing elsewhere, or into another list, is ignored.
+        self.assertEqual(get_next_in_sorted(sub_ids, (2,), (sub_ids, 3)), ((5,), (sub_ids, 2)))
+        self.assertEqual(get_next_in_sorted(sub_ids, (2,), (list(sub_ids), 1)), ((5,), (sub_ids, 2)))
+        self.assertEqual(get_next_in_sorted(sub_ids, (9,), (sub_ids, 3)), (None, None))
+        duplicates = [(1,), (2,), (2,), (3,)]
+        self.assertEqual(get_next_in_sorted(duplicates, (2,), (duplicates, 1)), ((3,), (duplicates, 3)))
+
+    def test_session_walk_resumes(self):
+        names = self.walk(1, 1000)
+        self.assertEqual(names, [(1, 3, 6, 1, 2, 1, 17, 7, 1, 2, 2, 1, 2) + sub_id
+                                 for sub_id in self.updater.vlanmac_list])
+        # every GetNext after the first resumes from the position returned by the previous one.
+        self.assertIsNone(self.updater.hints[0])
+        self.assertTrue(all(hint is not None for hint in self.updater.hints[1:]))
+
+    def test_without_session(self):
+        self.assertEqual(self.walk(None, 1000), self.walk(1, 1000))
+        self.assertEqual(list(self.lut._continuations), [1])
+
+    def test_refresh_invalidates(self):
+        expected = self.walk(None, 20)
+        first = self.walk(1, 10)
+        # the updater rebuilds its index, shifting positions
+        self.updater.update_data()
+        self.updater.vlanmac_list.insert(0, (999, 0, 0, 0, 0, 0, 0))
+        self.assertEqual(first + self.walk(1, 10, first[-1]), expected)
+        # in-place modifications are detected as well
+        self.updater.vlanmac_list.insert(1, (999, 0, 0, 0, 0, 0, 1))
+        self.assertEqual(self.walk(1, 5, expected[-1]), self.walk(None, 5, expected[-1]))
+
+    def test_close_session(self):
+        self.walk(1, 5)
+        self.walk(2, 5)
+        self.lut.close_session(1)
+        self.assertEqual(list(self.lut._continuations), [2])
+        self.lut.close_session(-1)
+        self.assertLessEqual(len(self.lut._continuations[2]), 5)
+
+
+class ContextUpdater(MIBUpdater):
+    def __init__(self):
+        super().__init__()
+        self.namespace_if_range = {'asic0': [(1,), (5,)], 'asic1': [(9,), (13,)]}
+        self.if_range = sorted(sub_id for if_range in self.namespace_if_range.values() for sub_id in if_range)
+
+    def update_data(self):
+        return
+
+    def get_next(self, sub_id):
+        return get_next_in_sorted(self.if_range, sub_id)[0]
+
+    def get_contexts(self):
+        return tuple(self.namespace_if_range)
+
+    def get_next_in_context(self, context, sub_id, hint=None):
+        return get_next_in_sorted(self.namespace_if_range.get(context, []), sub_id, hint)
+
+    def if_index(self, sub_id):
+        if sub_id in self.if_range:
+            return sub_id[0]
+
+
+class ContextMIB(metaclass=MIBMeta, prefix='.1.3.6.1.2.1.2'):
+    updater = ContextUpdater()
+
+    ifNumber = MIBEntry('1.0', ValueType.INTEGER, lambda: 4)
+
+    ifIndex = SubtreeMIBEntry('2.1.1', updater, ValueType.INTEGER, updater.if_index)
+
+
+class TestContexts(TestCase):
+    def setUp(self):
+        self.lut = MIBTable(ContextMIB, enable_context_registration=True)
+
+    def walk(self, lut):
+        sr = SearchRange(ObjectIdentifier.from_iterable((1, 3, 6, 1, 2, 1, 2)), ObjectIdentifier.null_oid())
+        return [vr.name.to_tuple()[7:] for vr in lut.walk(sr)]
+
+    def test_registration_disabled(self):
+        self.assertEqual(MIBTable(ContextMIB).contexts, {})
+
+    def test_context_tables(self):
+        self.assertEqual(sorted(self.lut.contexts), ['asic0', 'asic1'])
+        asic0 = self.lut.get_context(OctetString.from_string('asic0'))
+        # scalars are served in the default context only
+        self.assertEqual(asic0.prefixes, [(1, 3, 6, 1, 2, 1, 2, 2, 1, 1)])
+        self.assertEqual(asic0.updater_instances, set())
+        self.assertIsNone(self.lut.get_context(OctetString.from_string('asic2')))
+
+        self.assertEqual(self.walk(asic0), [(2, 1, 1, 1), (2, 1, 1, 5)])
+        self.assertEqual(self.walk(self.lut.contexts['asic1']), [(2, 1, 1, 9), (2, 1, 1, 13)])
+        self.assertEqual(self.walk(self.lut), [(1, 0)] + [(2, 1, 1, i) for i in (1, 5, 9, 13)])
+
+    def test_pdu_dispatch(self):
+        oid = ObjectIdentifier.from_iterable((1, 3, 6, 1, 2, 1, 2, 2, 1, 1, 5))
+        get_next = GetNextPDU(header=PDUHeader(1, PduTypes.GET_NEXT, 16, 0, 42, 0, 0, 0),
+                              context=OctetString.from_string('asic0'), oids=[oid])
+        self.assertTrue(get_next.header.flag__non_default_context)
+        decoded = PDU.decode(get_next.encode())
+        self.assertEqual(str(decoded.context), 'asic0')
+
+        response = decoded.make_response(self.lut)
+        self.assertEqual(response.values[0].type_, ValueType.END_OF_MIB_VIEW)
+        self.assertFalse(response.header.flag__non_default_context)
+
+        get_next = GetNextPDU(header=PDUHeader(1, PduTypes.GET_NEXT, 16, 0, 42, 0, 0, 0), oids=[oid])
+        self.assertEqual(get_next.make_response(self.lut).values[0].data, 9)
+
+    def test_unsupported_context(self):
+        oid = ObjectIdentifier.from_iterable((1, 3, 6, 1, 2, 1, 2, 1, 0))
+        get = GetPDU(header=PDUHeader(1, PduTypes.GET, 16, 0, 42, 0, 0, 0),
+                     context=OctetString.from_string('asic7'), oids=[oid])
+        response = PDU.decode(get.encode()).make_response(self.lut)
+        self.assertEqual(response.error, ResponsePDU.Errors.UNSUPPORTED_CONTEXT)
+        self.assertEqual(response.values, [])
+
+    def test_close_session(self):
+        sr = SearchRange(ObjectIdentifier.from_iterable((1, 3, 6, 1, 2, 1, 2, 2)), ObjectIdentifier.null_oid())
+        self.lut.contexts['asic1'].get_next(sr, 1)
+        self.lut.close_session(1)
+        self.assertEqual(self.lut.contexts['asic1']._continuations, {})
+
+
+class SnapshotUpdater(MIBUpdater):
+    offload_update = True
+
+    def __init__(self):
+        super().__init__()
+        self.counters = {}
+        self.if_range = []
+        self.fail = False
+
+    def update_data(self):
+        self.if_range = sorted(self.if_range + [(len(self.if_range) + 1,)])
+        for sub_id in self.if_range:
+            self.counters[sub_id] = self.counters.get(sub_id, 0) + 1
+        if self.fail:
+            raise RuntimeError
+
+
+class TestUpdateInExecutor(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.updater = SnapshotUpdater()
+        self.updater.executor = ThreadPoolExecutor(max_workers=1)
+
+    def tearDown(self):
+        self.updater.executor.shutdown()
+        self.loop.close()
+
+    def test_publish(self):
+        counters = self.updater.counters
+        self.loop.run_until_complete(self.updater.update_in_executor())
+        # the previous snapshot is left untouched, the new one replaces it.
+        self.assertEqual(counters, {})
+        self.assertEqual(self.updater.counters, {(1,): 1})
+        self.loop.run_until_complete(self.updater.update_in_executor())
+        self.assertEqual(self.updater.counters, {(1,): 2, (2,): 1})
+        self.assertEqual(self.updater.if_range, [(1,), (2,)])
+
+    def test_failure_publishes_nothing(self):
+        self.loop.run_until_complete(self.updater.update_in_executor())
+        self.updater.fail = True
+        with self.assertRaises(RuntimeError):
+            self.loop.run_until_complete(self.updater.update_in_executor())
+        self.assertEqual(self.updater.counters, {(1,): 1})
+
+    def test_concurrent_changes_kept(self):
+        async def update_and_retune():
+            update = asyncio.ensure_future(self.updater.update_in_executor())
+            # e.g. a frequency change made while the update runs
+            self.updater.frequency = 42
+            await update
+
+        self.loop.run_until_complete(update_and_retune())
+        self.assertEqual(self.updater.frequency, 42)
+        self.assertEqual(self.updater.counters, {(1,): 1})
+
+    def test_start_background_tasks(self):
+        lut = MIBTable(SystemMIB, update_workers=2)
+        lut.updater_instances = {self.updater, FdbMIB.fdb_updater}
+
+        async def run():
+            # the event is not set: the updaters return right away
+            await lut.start_background_tasks(asyncio.Event())
+
+        self.loop.run_until_complete(run())
+        self.assertIsInstance(self.updater.executor, ThreadPoolExecutor)
+        self.assertIsNone(FdbMIB.fdb_updater.executor)
+        lut.shutdown_background_tasks()
+        self.assertIsNone(lut.update_executor)
+
+
+class SlowUpdater(MIBUpdater):
+    default_frequency = 60
+    default_reinit_interval = 600
+
+    def update_data(self):
+        return
+
+
+class TestConfigureUpdaters(TestCase):
+    def setUp(self):
+        self.lut = MIBTable(SystemMIB, update_frequency=5)
+        self.fast = SnapshotUpdater()
+        self.slow = SlowUpdater()
+        self.lut.add_updater(self.fast)
+        self.lut.add_updater(self.slow)
+
+    def test_defaults(self):
+        self.lut.configure_updaters({})
+        self.assertEqual(self.fast.frequency, 5)
+        self.assertEqual(self.fast.reinit_rate, 12)
+        self.assertEqual(self.slow.frequency, 60)
+        self.assertEqual(self.slow.reinit_rate, 10)
+        # a default interval never refreshes faster than the agent's update frequency
+        self.lut.update_frequency = 90
+        self.lut.configure_updaters({})
+        self.assertEqual(self.slow.frequency, 90)
+
+    def test_settings(self):
+        self.lut.configure_updaters({'SnapshotUpdater': {'interval': 2, 'reinit_interval': 20},
+                                     'SlowUpdater': {'reinit_interval': 120}})
+        self.assertEqual(self.fast.frequency, 2)
+        self.assertEqual(self.fast.reinit_rate, 10)
+        self.assertEqual(self.slow.frequency, 60)
+        self.assertEqual(self.slow.reinit_rate, 2)
+        # settings removed: back to the defaults
+        self.lut.configure_updaters({})
+        self.assertEqual(self.fast.frequency, 5)
+        self.assertEqual(self.fast.reinit_rate, 12)
+
+    def test_add_updater(self):
+        # the MIB class' own set of updaters is left alone
+        self.assertNotIn(self.slow, getattr(SystemMIB, MIBMeta.UPDATERS))
+        self.assertIn(self.slow, self.lut.updater_instances)
+
+
+class ChunkedUpdater(MIBUpdater):
+    def __init__(self):
+        super().__init__()
+        self.keys = list(range(10))
+        self.values = {}
+        # values observed by request handlers while a pass is in progress
+        self.observed = []
+
+    def update_data_chunks(self):
+        values = {}
+        for key in self.keys:
+            values[key] = values.get(key, 0) + len(self.values) + 1
+            if key % 4 == 3:
+                yield
+        self.values = values
+
+
+class TestChunkedUpdate(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.updater = ChunkedUpdater()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_update_data(self):
+        self.assertTrue(self.updater.chunked_update)
+        self.assertFalse(SnapshotUpdater().chunked_update)
+        self.updater.update_data()
+        self.assertEqual(self.updater.values, dict.fromkeys(range(10), 1))
+
+    def test_update_cooperatively(self):
+        async def handler():
+            while True:
+                self.updater.observed.append(dict(self.updater.values))
+                await asyncio.sleep(0)
+
+        async def run():
+            task = asyncio.ensure_future(handler())
+            await asyncio.sleep(0)
+            await self.updater.update_cooperatively()
+            task.cancel()
+
+        self.loop.run_until_complete(run())
+        # the handler ran between slices, and only ever saw the previous pass' data
+        self.assertGreaterEqual(len(self.updater.observed), 3)
+        self.assertEqual(self.updater.observed, [{}] * len(self.updater.observed))
+        self.assertEqual(self.updater.values, dict.fromkeys(range(10), 1))
+
+
+class SystemFdbMIB(SystemMIB, FdbMIB):
+    pass
+
+
+class TestAccessTracking(TestCase):
+    def setUp(self):
+        self.lut = MIBTable(SystemFdbMIB, idle_timeout=60)
+        self.tracker = self.lut.access_tracker
+        self.wakes = []
+        self.tracker.wake = self.wakes.append
+        self.fdb_prefix = (1, 3, 6, 1, 2, 1, 17, 7, 1, 2, 2, 1, 2)
+
+    def test_disabled(self):
+        self.assertIsNone(MIBTable(FdbMIB).access_tracker)
+
+    def test_entry_updaters(self):
+        self.assertEqual(set(self.tracker.updater_access), {FdbMIB.fdb_updater})
+        self.assertFalse(self.tracker.is_idle(FdbMIB.fdb_updater))
+        # updaters serving no subtree are never idle
+        self.assertFalse(self.tracker.is_idle(SnapshotUpdater()))
+
+    def test_get(self):
+        self.tracker.updater_access[FdbMIB.fdb_updater] -= 120
+        self.assertTrue(self.tracker.is_idle(FdbMIB.fdb_updater))
+        oid = ObjectIdentifier.from_iterable(self.fdb_prefix + (1000, 0, 0, 0, 0, 0, 1))
+        self.lut.get(SearchRange(oid, ObjectIdentifier.null_oid()))
+        # the first request after a while idle refreshes the updater, the next ones do not
+        self.assertEqual(self.wakes, [FdbMIB.fdb_updater])
+        self.assertFalse(self.tracker.is_idle(FdbMIB.fdb_updater))
+        self.lut.get(SearchRange(oid, ObjectIdentifier.null_oid()))
+        self.assertEqual(self.wakes, [FdbMIB.fdb_updater])
+        stats = self.tracker.stats()['FdbUpdater']
+        self.assertEqual(stats['on_demand_refreshes'], 1)
+        self.assertFalse(stats['idle'])
+
+    def test_walk(self):
+        before = dict(self.tracker.subtree_access)
+        sr = SearchRange(ObjectIdentifier.from_iterable((1, 3, 6, 1, 2, 1, 1)), ObjectIdentifier.null_oid())
+        self.lut.get_next(sr)
+        # only the subtrees the walk went through
+        self.assertGreater(self.tracker.subtree_access[(1, 3, 6, 1, 2, 1, 1, 1, 0)],
+                           before[(1, 3, 6, 1, 2, 1, 1, 1, 0)])
+        self.assertEqual(self.tracker.subtree_access[self.fdb_prefix], before[self.fdb_prefix])
@@ -1,5 +1,8 @@
+import json
 import os
 import sys
+import threading
+import time
 from unittest import TestCase
 
 import tests.mock_tables.dbconnector
@@ -74,3 +77,83 @@ class TestGetNextPDU(TestCase):
         self.assertTrue(vlan_name_map == {})
         self.assertTrue(vlan_oid_sai_map == {})
         self.assertTrue(vlan_oid_name_map == {})
+
+    def test_dbs_get_all_many(self):
+        db_conn = Namespace.init_namespace_dbs()
+        keys = ['PORT_TABLE:Ethernet0', 'PORT_TABLE:Ethernet-missing', 'PORT_TABLE:Ethernet4']
+        expected = [Namespace.dbs_get_all(db_conn, mibs.APPL_DB, key, blocking=False) for key in keys]
+
+        # pipelined, in two chunks, without a get_all per hash
+        with mock.patch('swsscommon.swsscommon.SonicV2Connector.get_all', mock.MagicMock(side_effect=AssertionError)):
+            hashes = Namespace.dbs_get_all_many(db_conn, mibs.APPL_DB, keys, chunk_size=2)
+        self.assertEqual(hashes, expected)
+        self.assertEqual(hashes[0]['alias'], 'etp1')
+        self.assertEqual(hashes[1], {})
+
+    def test_get_all_many_script(self):
+        hashes = {'PORT_TABLE:Ethernet0': {'alias': 'etp1'}, 'PORT_TABLE:Ethernet4': {'alias': 'etp2', 'mtu': '9100'}}
+        keys = ['PORT_TABLE:Ethernet0', 'PORT_TABLE:Ethernet-missing', 'PORT_TABLE:Ethernet4']
+        db_conn = mock.MagicMock()
+        db_conn.get_redis_client.return_value = object()
+        db_conn.get_all.side_effect = AssertionError
+
+        def run_redis_script(redis_client, sha, script_keys, argv):
+            replies = [[item for field_value in hashes.get(key, {}).items() for item in field_value]
+                       for key in script_keys]
+            # as encoded by cjson, which has empty tables for objects
+            return (json.dumps(replies).replace('[]', '{}'),)
+
+        run_redis_script = mock.MagicMock(side_effect=run_redis_script)
+        load_redis_script = mock.MagicMock(return_value='sha')
+        with mock.patch('swsscommon.swsscommon.loadRedisScript', load_redis_script, create=True), \
+                mock.patch('swsscommon.swsscommon.runRedisScript', run_redis_script, create=True), \
+                mock.patch.object(Namespace, 'get_all_many_script_shas', {}):
+            result = Namespace.get_all_many(db_conn, mibs.APPL_DB, keys, chunk_size=2)
+            self.assertEqual(result, [hashes[keys[0]], {}, hashes[keys[2]]])
+            # a round trip per chunk, the script loaded once
+            self.assertEqual(run_redis_script.call_count, 2)
+            self.assertEqual(Namespace.get_all_many(db_conn, mibs.APPL_DB, keys), result)
+            self.assertEqual(load_redis_script.call_count, 1)
+
+            # loaded again once redis forgot it
+            replies = run_redis_script.side_effect
+            forgotten = [True]
+
+            def run_forgotten_script(*args):
+                if forgotten:
+                    forgotten.pop()
+                    raise RuntimeError('NOSCRIPT No matching script')
+                return replies(*args)
+
+            run_redis_script.side_effect = run_forgotten_script
+            self.assertEqual(Namespace.get_all_many(db_conn, mibs.APPL_DB, keys), result)
+            self.assertEqual(load_redis_script.call_count, 2)
+
+    def test_dbs_scan(self):
+        db_conn = Namespace.init_namespace_dbs()
+        pattern = 'PORT_TABLE:*'
+        batches = list(Namespace.dbs_scan(db_conn, mibs.APPL_DB, pattern, count=10))
+        # a batch per SCAN call, looking at 10 keys each
+        self.assertGreater(len(batches), 1)
+        scanned = [key for _, keys in batches for key in keys]
+        self.assertEqual(sorted(scanned), sorted(db_conn[0].keys(mibs.APPL_DB, pattern)))
+        self.assertEqual(sorted(Namespace.dbs_keys(db_conn, mibs.APPL_DB, pattern)), sorted(scanned))
+
+    def test_fork_with_fanout_lock_held(self):
+        db_lock = Namespace.fanout_db_locks.setdefault(object(), threading.Lock())
+        released = threading.Event()
+
+        def hold():
+            with Namespace.fanout_lock, db_lock:
+                released.wait(0.2)
+        thread = threading.Thread(target=hold)
+        thread.start()
+        time.sleep(0.05)
+        # the fork waits for the locks, the child does not inherit them held
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if Namespace.fanout_lock.acquire(timeout=1) and db_lock.acquire(timeout=1) else 1)
+        released.set()
+        thread.join()
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import sys
+import time
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase, mock
+
+from ax_interface.constants import PduTypes
+from ax_interface.encodings import ObjectIdentifier
+from ax_interface.mib import MIBMeta, MIBTable, MIBUpdater
+from ax_interface.monitor import UNATTRIBUTED, Histogram, LoopMonitor
+from ax_interface.pdu import PDUHeader
+from ax_interface.pdu_implementations import GetPDU
+from ax_interface.protocol import AgentX
+
+
+class EmptyMIB(metaclass=MIBMeta):
+    """
+    Test
+    """
+
+
+class BusyUpdater(MIBUpdater):
+    def __init__(self, busy):
+        super().__init__()
+        self.busy = busy
+
+    def update_data(self):
+        time.sleep(self.busy)
+
+
+class ChunkedBusyUpdater(BusyUpdater):
+    def update_data_chunks(self):
+        for _ in range(3):
+            time.sleep(self.busy)
+            yield
+
+
+class MockTransport:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(data)
+
+
+class TestHistogram(TestCase):
+    def test_buckets(self):
+        histogram = Histogram(buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value)
+        stats = histogram.stats()
+        self.assertEqual(stats['buckets'], {0.1: 2, 1: 1, float('inf'): 1})
+        self.assertEqual(stats['count'], 4)
+        self.assertAlmostEqual(stats['total'], 2.65)
+        self.assertEqual(stats['max'], 2)
+
+
+class TestLoopMonitor(TestCase):
+    def setUp(self):
+        self.monitor = LoopMonitor(slow_threshold=0.05, warning_interval=60)
+
+    def test_attribution(self):
+        with mock.patch('ax_interface.logger.warning') as warning:
+            self.monitor.record('updater', 'FastUpdater', 0.01)
+            self.monitor.record('updater', 'SlowUpdater', 0.2)
+        self.assertEqual(self.monitor.slow_callbacks, {'updater SlowUpdater': 1})
+        self.assertEqual(warning.call_count, 1)
+        self.assertIn('SlowUpdater', warning.call_args[0][0])
+        self.assertEqual(self.monitor.durations[('updater', 'FastUpdater')].count, 1)
+
+    def test_rate_limited_warning(self):
+        with mock.patch('ax_interface.logger.warning') as warning:
+            for _ in range(5):
+                self.monitor.record('request', 'GetPDU', 0.2, lambda: 'GetPDU 1.3.6.1.2.1.2')
+        self.assertEqual(warning.call_count, 1)
+        self.assertEqual(self.monitor.slow_callbacks, {'request GetPDU 1.3.6.1.2.1.2': 5})
+
+        self.monitor._last_warning -= 60
+        with mock.patch('ax_interface.logger.warning') as warning:
+            self.monitor.record('request', 'GetPDU', 0.2)
+        self.assertIn('4 more', warning.call_args[0][0])
+
+    def test_lag(self):
+        with mock.patch('ax_interface.logger.warning') as warning:
+            self.monitor.observe_lag(0.01)
+            # a lag explained by slow work is not reported twice
+            self.monitor.record('updater', 'SlowUpdater', 0.2)
+            self.monitor.observe_lag(0.2)
+            self.assertEqual(self.monitor.unattributed_lags, 0)
+            self.monitor.observe_lag(0.2)
+        self.assertEqual(self.monitor.unattributed_lags, 1)
+        self.assertEqual(warning.call_count, 1)
+        self.assertEqual(self.monitor.lag.count, 3)
+
+    def test_probe(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        monitor = LoopMonitor(interval=0.01, slow_threshold=0.05)
+
+        async def run():
+            event = asyncio.Event()
+            event.set()
+            task = asyncio.ensure_future(monitor.run(event))
+            await asyncio.sleep(0.02)
+            # a callback blocking the loop
+            time.sleep(0.1)
+            await asyncio.sleep(0.02)
+            event.clear()
+            await task
+
+        with mock.patch('ax_interface.logger.warning') as warning:
+            loop.run_until_complete(run())
+        self.assertGreaterEqual(monitor.lag.max, 0.05)
+        self.assertEqual(monitor.unattributed_lags, 1)
+        self.assertIn(UNATTRIBUTED, warning.call_args[0][0])
+
+
+class TestAttribution(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.monitor = LoopMonitor(slow_threshold=0.02)
+
+    def test_updater(self):
+        updater = BusyUpdater(0.03)
+        updater.loop_monitor = self.monitor
+        with mock.patch('ax_interface.logger.warning'):
+            self.loop.run_until_complete(updater.update_cooperatively())
+        self.assertEqual(self.monitor.slow_callbacks, {'updater BusyUpdater': 1})
+
+    def test_chunked_updater(self):
+        updater = ChunkedBusyUpdater(0.03)
+        updater.loop_monitor = self.monitor
+        with mock.patch('ax_interface.logger.warning'):
+            self.loop.run_until_complete(updater.update_cooperatively())
+        # timed per slice, and for the reinit step and the end of the generator
+        self.assertEqual(self.monitor.slow_callbacks, {'updater ChunkedBusyUpdater': 3})
+        self.assertEqual(self.monitor.durations[('updater', 'ChunkedBusyUpdater')].count, 5)
+
+    def test_request(self):
+        protocol = AgentX(MIBTable(EmptyMIB, loop_monitor=self.monitor), self.loop)
+        protocol.connection_made(MockTransport())
+        get_pdu = GetPDU(
+            header=PDUHeader(1, PduTypes.GET, 16, 0, 42, 0, 1, 0),
+            oids=(ObjectIdentifier(4, 2, 0, 0, (1, 1, 1, 0)),)
+        )
+        make_response = GetPDU.make_response
+
+        def slow_response(pdu, lut):
+            time.sleep(0.03)
+            return make_response(pdu, lut)
+
+        with mock.patch.object(GetPDU, 'make_response', slow_response), mock.patch('ax_interface.logger.warning'):
+            protocol.data_received(get_pdu.encode())
+        self.assertEqual(len(protocol.transport.writes), 1)
+        culprit, = self.monitor.slow_callbacks
+        self.assertTrue(culprit.startswith('request GetPDU '))
+        self.assertIn(str(get_pdu.sr[0].start), culprit)
@@ -0,0 +1,89 @@
+import os
+import sys
+from unittest import TestCase, mock
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from sonic_ax_impl.mibs.port_counters import PortCounterCache
+
+
+class TestPortCounterCache(TestCase):
+    def setUp(self):
+        self.dbs = [mock.MagicMock()]
+        self.if_id_map = {'asic0:1': 'Ethernet0', 'asic1:2': 'Ethernet4'}
+        # [(namespace, key)] of each batch read
+        self.reads = []
+
+        def dbs_get_all_many_namespace(dbs, db_name, namespace_keys, chunk_size):
+            self.reads.append(namespace_keys)
+            return [{'SAI_PORT_STAT_IF_IN_OCTETS': '10', 'SAI_PORT_STAT_PFC_3_RX_PKTS': '2'} if namespace == 'asic0'
+                    else {} for namespace, _ in namespace_keys]
+
+        patcher = mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_many_namespace', dbs_get_all_many_namespace)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = PortCounterCache()
+        self.cache.register(['SAI_PORT_STAT_IF_IN_OCTETS'])
+
+    def test_disabled(self):
+        first = self.cache.counters(self.dbs, self.if_id_map)
+        second = self.cache.counters(self.dbs, self.if_id_map)
+        # registered counters only, as integers
+        self.assertEqual(first, {'asic0:1': {'SAI_PORT_STAT_IF_IN_OCTETS': 10}, 'asic1:2': {}})
+        self.assertEqual(second, first)
+        self.assertEqual(self.reads, [[('asic0', 'COUNTERS:oid:0x1'), ('asic1', 'COUNTERS:oid:0x2')]] * 2)
+
+    def test_read_only(self):
+        counters = self.cache.counters(self.dbs, self.if_id_map)['asic0:1']
+        with self.assertRaises(TypeError):
+            counters['SAI_PORT_STAT_IF_IN_OCTETS'] = 11
+
+    def test_register(self):
+        self.cache.enable()
+        self.cache.counters(self.dbs, self.if_id_map)
+        self.cache.register(['SAI_PORT_STAT_PFC_3_RX_PKTS'])
+        # read again for the new counter
+        counters = self.cache.counters(self.dbs, self.if_id_map)
+        self.assertEqual(counters['asic0:1'], {'SAI_PORT_STAT_IF_IN_OCTETS': 10, 'SAI_PORT_STAT_PFC_3_RX_PKTS': 2})
+        self.assertEqual(self.cache.reads, 2)
+
+    def test_shared(self):
+        self.cache.enable()
+        first = self.cache.counters(self.dbs, self.if_id_map)
+        self.assertIs(self.cache.counters(self.dbs, self.if_id_map), first)
+        self.assertIs(self.cache.counters(self.dbs, {'asic0:1': 'Ethernet0'}), first)
+        self.assertEqual(len(self.reads), 1)
+        self.assertEqual(self.cache.stats(), {'requests': 3, 'reads': 1, 'ports': 2})
+
+        # a port the last read misses
+        self.cache.counters(self.dbs, {**self.if_id_map, 'asic0:3': 'Ethernet8'})
+        self.assertEqual(len(self.reads), 2)
+
+    def test_max_age(self):
+        self.cache.enable()
+        self.cache.max_age = 0
+        first = self.cache.counters(self.dbs, self.if_id_map)
+        self.assertIsNot(self.cache.counters(self.dbs, self.if_id_map), first)
+        self.assertEqual(len(self.reads), 2)
+
+    def test_chunks(self):
+        self.cache.enable()
+        chunks = self.cache.counters_chunks(self.dbs, self.if_id_map, chunk_size=1)
+        next(chunks)
+        self.assertEqual(self.reads, [[('asic0', 'COUNTERS:oid:0x1')]])
+        # nothing read yet to share: a concurrent requester reads on its own
+        self.cache.counters(self.dbs, self.if_id_map)
+        self.assertEqual(len(self.reads), 2)
+
+        # while a read is in progress, the last counters are handed out
+        chunks = self.cache.counters_chunks(self.dbs, self.if_id_map, chunk_size=1)
+        self.cache.max_age = 0
+        next(chunks)
+        last = self.cache.counters(self.dbs, self.if_id_map)
+        self.assertEqual(len(self.reads), 3)
+        next(chunks)
+        with self.assertRaises(StopIteration) as stop:
+            next(chunks)
+        self.assertIsNot(stop.exception.value, last)
+        self.assertEqual(stop.exception.value, last)
@@ -0,0 +1,211 @@
+import asyncio
+import os
+import sys
+from unittest import TestCase
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from ax_interface import constants
+from ax_interface.constants import PduTypes
+from ax_interface import ValueType
+from ax_interface.encodings import ObjectIdentifier
+from ax_interface.mib import MIBMeta, MIBTable, MIBEntry, MIBUpdater, SubtreeMIBEntry, get_next_in_sorted
+from ax_interface.pdu import PDUHeader, PDUStream
+from ax_interface.pdu_implementations import GetPDU, RegisterPDU, ResponsePDU
+from ax_interface.protocol import AgentX
+
+
+class EmptyMIB(metaclass=MIBMeta):
+    """
+    Test
+    """
+
+
+class ContextUpdater(MIBUpdater):
+    def update_data(self):
+        return
+
+    def get_next(self, sub_id):
+        return get_next_in_sorted([(1,), (2,)], sub_id)[0]
+
+    def get_contexts(self):
+        return ('asic0',)
+
+    def get_next_in_context(self, context, sub_id, hint=None):
+        return get_next_in_sorted([(1,)], sub_id, hint)
+
+
+class ContextMIB(metaclass=MIBMeta, prefix='.1.3.6.1.2.1.2'):
+    updater = ContextUpdater()
+
+    ifNumber = MIBEntry('1.0', ValueType.INTEGER, lambda: 2)
+
+    ifIndex = SubtreeMIBEntry('2.1.1', updater, ValueType.INTEGER, lambda sub_id: sub_id[0])
+
+
+class MockTransport:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(data)
+
+    def close(self):
+        pass
+
+
+def make_get_pdu(packet_id):
+    return GetPDU(
+        header=PDUHeader(1, PduTypes.GET, 16, 0, 42, 0, packet_id, 0),
+        oids=(
+            ObjectIdentifier(4, 2, 0, 0, (1, 1, 1, 0)),
+        )
+    ).encode()
+
+
+class TestAgentXFraming(TestCase):
+    def setUp(self):
+        self.protocol = AgentX(MIBTable(EmptyMIB), asyncio.new_event_loop())
+        self.transport = MockTransport()
+        self.protocol.connection_made(self.transport)
+
+    def responses(self):
+        return [pdu for data in self.transport.writes for pdu in PDUStream(data)]
+
+    def test_split_pdu(self):
+        get_bytes = make_get_pdu(7)
+        self.protocol.data_received(get_bytes[:13])
+        self.assertEqual(self.transport.writes, [])
+        self.protocol.data_received(get_bytes[13:30])
+        self.assertEqual(self.transport.writes, [])
+        self.protocol.data_received(get_bytes[30:])
+
+        responses = self.responses()
+        self.assertEqual(len(responses), 1)
+        self.assertIsInstance(responses[0], ResponsePDU)
+        self.assertEqual(responses[0].header.packet_id, 7)
+        self.assertEqual(len(self.protocol._buffer), 0)
+
+    def test_back_to_back_pdus(self):
+        stream = b''.join(make_get_pdu(packet_id) for packet_id in range(50))
+        self.protocol.data_received(stream)
+
+        responses = self.responses()
+        self.assertEqual([r.header.packet_id for r in responses], list(range(50)))
+        self.assertEqual(len(self.protocol._buffer), 0)
+
+    def test_back_to_back_with_trailing_partial_pdu(self):
+        first = make_get_pdu(1)
+        second = make_get_pdu(2)
+        self.protocol.data_received(first + second[:5])
+        self.assertEqual([r.header.packet_id for r in self.responses()], [1])
+        self.assertEqual(len(self.protocol._buffer), 5)
+
+        self.protocol.data_received(second[5:])
+        self.assertEqual([r.header.packet_id for r in self.responses()], [1, 2])
+        self.assertEqual(len(self.protocol._buffer), 0)
+
+    def test_bad_pdu_does_not_drop_stream(self):
+        # a header-only PDU with an unsupported type, followed by a valid request.
+        bad = b'\x01\x13\x10\x00' + b'\x00' * 16
+        self.protocol.data_received(bad + make_get_pdu(3))
+        self.assertEqual([r.header.packet_id for r in self.responses()], [3])
+
+    def test_invalid_version_discards_buffer(self):
+        self.protocol.data_received(b'\x07\x05\x10\x00' + b'\xff' * 16)
+        self.assertEqual(self.transport.writes, [])
+        self.assertEqual(len(self.protocol._buffer), 0)
+
+
+class TestAgentXFlowControl(TestCase):
+    def setUp(self):
+        self.protocol = AgentX(MIBTable(EmptyMIB), asyncio.new_event_loop())
+        self.transport = MockTransport()
+        self.protocol.connection_made(self.transport)
+
+    def packet_ids(self):
+        return [pdu.header.packet_id for data in self.transport.writes for pdu in PDUStream(data)]
+
+    def test_single_write_per_read(self):
+        self.protocol.data_received(b''.join(make_get_pdu(packet_id) for packet_id in range(10)))
+        self.assertEqual(len(self.transport.writes), 1)
+        self.assertEqual(self.packet_ids(), list(range(10)))
+
+    def test_paused_holds_pdus(self):
+        self.protocol.pause_writing()
+        self.protocol.data_received(make_get_pdu(1) + make_get_pdu(2))
+        self.protocol.data_received(make_get_pdu(3))
+        self.assertEqual(self.transport.writes, [])
+        self.assertEqual(self.protocol.queued_pdus, 3)
+
+        self.protocol.resume_writing()
+        self.assertEqual(len(self.transport.writes), 1)
+        self.assertEqual(self.packet_ids(), [1, 2, 3])
+        self.assertEqual(len(self.protocol._pending_pdus), 0)
+
+        self.protocol.data_received(make_get_pdu(4))
+        self.assertEqual(self.packet_ids(), [1, 2, 3, 4])
+
+    def test_pending_bound_drops_oldest(self):
+        limit = constants.AGENTX_MAX_PENDING_PDUS
+        self.protocol.pause_writing()
+        self.protocol.data_received(b''.join(make_get_pdu(packet_id) for packet_id in range(limit + 5)))
+        self.assertEqual(len(self.protocol._pending_pdus), limit)
+        self.assertEqual(self.protocol.dropped_pdus, 5)
+
+        self.protocol.resume_writing()
+        self.assertEqual(self.packet_ids(), list(range(5, limit + 5)))
+        # answered in batches
+        self.assertEqual(len(self.transport.writes), -(-limit // constants.AGENTX_PENDING_PDU_BATCH))
+
+    def test_pause_while_draining(self):
+        self.protocol.pause_writing()
+        count = constants.AGENTX_PENDING_PDU_BATCH * 3
+        self.protocol.data_received(b''.join(make_get_pdu(packet_id) for packet_id in range(count)))
+
+        write = self.transport.write
+
+        def write_and_pause(data):
+            write(data)
+            self.protocol.pause_writing()
+
+        self.transport.write = write_and_pause
+        self.protocol.resume_writing()
+        self.assertEqual(len(self.transport.writes), 1)
+        # PDUs arriving meanwhile line up behind those still pending.
+        self.protocol.data_received(make_get_pdu(count))
+
+        self.transport.write = write
+        self.protocol.resume_writing()
+        self.assertEqual(self.packet_ids(), list(range(count + 1)))
+        self.assertEqual(self.protocol.pause_count, 2)
+
+
+class TestAgentXRegistration(TestCase):
+    def register(self, mib_table):
+        protocol = AgentX(mib_table, asyncio.new_event_loop())
+        transport = MockTransport()
+        protocol.connection_made(transport)
+        protocol.data_received(ResponsePDU(
+            header=PDUHeader(1, PduTypes.RESPONSE, 16, 0, 7, 0, 1, 0),
+            sys_up_time=0,
+            error=ResponsePDU.Errors.NO_AGENT_X_ERROR,
+            index=0,
+        ).encode())
+        pdus = [pdu for data in transport.writes for pdu in PDUStream(data)]
+        self.assertTrue(all(isinstance(pdu, RegisterPDU) for pdu in pdus))
+        return [(str(pdu.subtree), pdu.context and str(pdu.context)) for pdu in pdus]
+
+    def test_default_context(self):
+        self.assertEqual(self.register(MIBTable(ContextMIB)), [
+            ('.1.3.6.1.2.1.2.1.0', None),
+            ('.1.3.6.1.2.1.2.2.1.1', None),
+        ])
+
+    def test_context_registration(self):
+        self.assertEqual(self.register(MIBTable(ContextMIB, enable_context_registration=True)), [
+            ('.1.3.6.1.2.1.2.1.0', None),
+            ('.1.3.6.1.2.1.2.2.1.1', None),
+            ('.1.3.6.1.2.1.2.2.1.1', 'asic0'),
+        ])
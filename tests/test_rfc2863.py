@@ -48,7 +48,7 @@ class TestInterfaceMIBUpdater(TestCase):
         return [{},{}]
 
     @mock.patch('sonic_ax_impl.mibs.Namespace.get_sync_d_from_all_namespace', mock_get_sync_d_from_all_namespace)
-    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all', mock_dbs_get_all)
+    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_first', mock_dbs_get_all)
     @mock.patch('sonic_ax_impl.mibs.lag_entry_table', mock_lag_entry_table)
     @mock.patch('sonic_ax_impl.mibs.init_mgmt_interface_tables', mock_init_mgmt_interface_tables)
     def test_InterfaceMIBUpdater_get_high_speed(self):
@@ -70,7 +70,7 @@ class TestInterfaceMIBUpdater(TestCase):
 
 
     @mock.patch('sonic_ax_impl.mibs.Namespace.get_sync_d_from_all_namespace', mock_get_sync_d_from_all_namespace)
-    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all', mock_dbs_get_all)
+    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_first', mock_dbs_get_all)
     @mock.patch('sonic_ax_impl.mibs.lag_entry_table', mock_lag_entry_table)
     @mock.patch('sonic_ax_impl.mibs.init_mgmt_interface_tables', mock_init_mgmt_interface_tables)
     def test_InterfaceMIBUpdater_get_counters(self):
@@ -1,6 +1,8 @@
+import asyncio
 import os
 import sys
 import sonic_ax_impl
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase
 
 if sys.version_info.major == 3:
@@ -15,8 +17,8 @@ from sonic_ax_impl.mibs.ietf.rfc4363 import FdbUpdater
 
 class TestFdbUpdater(TestCase):
 
-    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_keys', mock.MagicMock(return_value=(['ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:{"bvid":"oid:0x26000000000b6c","mac":"60:45:BD:98:6F:48","switch_id":"oid:0x21000000000000"}'])))
-    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all', mock.MagicMock(return_value=({"nexthop": "10.0.0.1,10.0.0.3", "ifname": "Ethernet0,Ethernet4"})))
+    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_scan', mock.MagicMock(return_value=([(0, ['ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:{"bvid":"oid:0x26000000000b6c","mac":"60:45:BD:98:6F:48","switch_id":"oid:0x21000000000000"}'])])))
+    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_many', mock.MagicMock(return_value=([{"nexthop": "10.0.0.1,10.0.0.3", "ifname": "Ethernet0,Ethernet4"}])))
     def test_FdbUpdater_ent_bridge_port_id_attr_missing(self):
         updater = FdbUpdater()
 
@@ -29,7 +31,7 @@ class TestFdbUpdater(TestCase):
         self.assertTrue(len(updater.vlanmac_ifindex_list) == 0)
 
 
-    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_keys', mock.MagicMock(return_value=(None)))
+    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_scan', mock.MagicMock(return_value=([])))
     @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_bridge_port_map', mock.MagicMock(return_value=(None)))
     def test_RouteUpdater_re_init_redis_exception(self):
         updater = FdbUpdater()
@@ -45,4 +47,105 @@ class TestFdbUpdater(TestCase):
                 updater.reinit_connection()
 
                 # check re-init
-                connect_namespace_dbs.assert_called()
\ No newline at end of file
+                connect_namespace_dbs.assert_called()
+
+    FDB_KEY = 'ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:{"bvid":"oid:0x26000000000b6c","mac":"60:45:BD:98:6F:48","switch_id":"oid:0x21000000000000"}'
+    VLANMAC = (1000, 96, 69, 189, 152, 111, 72)
+
+    def notified_updater(self):
+        """
+        FdbUpdater subscribed to self.messages, reading its changed entries from self.asic_db
+        """
+        self.asic_db = {self.FDB_KEY: {"SAI_FDB_ENTRY_ATTR_BRIDGE_PORT_ID": "oid:0x3a000000000608"}}
+        self.messages = []
+        messages = self.messages
+
+        class PubSub:
+            def get_message(self):
+                return messages.pop(0) if messages else None
+
+        with mock.patch('sonic_ax_impl.mibs.Namespace.init_namespace_dbs', mock.MagicMock(return_value=[mock.MagicMock()])):
+            updater = FdbUpdater()
+        updater.if_bpid_map = {'3a000000000608': 'oid:0x1000000000003'}
+        updater.if_id_map = {'oid:0x1000000000003': 'Ethernet4'}
+        updater.bvid_vlan_map = {'oid:0x26000000000b6c': '1000'}
+
+        self.dbs_get_all_many = mock.MagicMock(
+            side_effect=lambda dbs, db_name, keys, chunk_size: [dict(self.asic_db.get(key, {})) for key in keys])
+        self.dbs_scan = mock.MagicMock(return_value=[])
+        for patcher in (mock.patch('sonic_ax_impl.mibs.get_redis_pubsub', mock.MagicMock(return_value=PubSub())),
+                        mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_many', self.dbs_get_all_many),
+                        mock.patch('sonic_ax_impl.mibs.Namespace.dbs_scan', self.dbs_scan)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return updater
+
+    def notify(self, event):
+        self.messages.append({'type': 'pmessage', 'channel': '__keyspace@1__:' + self.FDB_KEY, 'data': event})
+
+    def test_FdbUpdater_notified_changes(self):
+        updater = self.notified_updater()
+        updater.update_data()
+        self.assertEqual(self.dbs_scan.call_count, 1)
+        self.assertEqual(updater.vlanmac_ifindex_list, [])
+        self.dbs_get_all_many.reset_mock()
+
+        # an added entry is read on its own
+        self.notify('hset')
+        updater.update_data()
+        self.assertEqual(updater.vlanmac_ifindex_list, [self.VLANMAC])
+        self.assertEqual(updater.fdb_ifindex(self.VLANMAC), 5)
+
+        # a deleted entry reads empty
+        del self.asic_db[self.FDB_KEY]
+        self.notify('del')
+        updater.update_data()
+        self.assertEqual(updater.vlanmac_ifindex_list, [])
+        self.assertEqual(self.dbs_scan.call_count, 1)
+        self.assertEqual(self.dbs_get_all_many.call_count, 2)
+
+        # full read once reconcile_interval is over
+        updater.reconcile_interval = 0
+        updater.update_data()
+        self.assertEqual(self.dbs_scan.call_count, 2)
+
+    def test_FdbUpdater_notified_burst(self):
+        updater = self.notified_updater()
+        updater.update_data()
+        # more changes than scan_count: read the FDB in full rather than entry by entry
+        updater.scan_count = 1
+        self.messages.append({'type': 'pmessage', 'channel': '__keyspace@1__:' + self.FDB_KEY + '2', 'data': 'hset'})
+        self.notify('hset')
+        self.dbs_get_all_many.reset_mock()
+        updater.update_data()
+        self.assertEqual(self.dbs_scan.call_count, 2)
+        # no entry read on its own
+        self.dbs_get_all_many.assert_not_called()
+
+    def test_FdbUpdater_notified_read_failure_in_executor(self):
+        updater = self.notified_updater()
+        updater.executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(updater.executor.shutdown)
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        loop.run_until_complete(updater.update_in_executor())
+        self.assertEqual(self.dbs_scan.call_count, 1)
+
+        self.notify('hset')
+        self.dbs_get_all_many.side_effect = RuntimeError('connection lost')
+        with self.assertRaises(RuntimeError):
+            loop.run_until_complete(updater.update_in_executor())
+        # the notification is consumed by the dropped copy of the updater: the next update reads the FDB in full
+        self.assertIsNone(updater.reconciled)
+        loop.run_until_complete(updater.update_in_executor())
+        self.assertEqual(self.dbs_scan.call_count, 2)
+
+    def test_FdbUpdater_reconcile_batches(self):
+        updater = self.notified_updater()
+        updater.db_conn = [mock.MagicMock(), mock.MagicMock()]
+        self.dbs_scan.return_value = [(1, [self.FDB_KEY, self.FDB_KEY + '2'])]
+        updater.update_data()
+        self.assertEqual(updater.vlanmac_ifindex_list, [self.VLANMAC])
+        # a pipelined read per SCAN batch, in its namespace only
+        self.dbs_get_all_many.assert_called_once_with([updater.db_conn[1]], 'ASIC_DB',
+                                                      [self.FDB_KEY, self.FDB_KEY + '2'], updater.update_chunk_size)
@@ -0,0 +1,232 @@
+import asyncio
+import os
+import sys
+import time
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase, mock
+
+from ax_interface.mib import MIBUpdater
+from ax_interface.scheduler import AccessTracker, UpdaterScheduler
+from ax_interface.util import get_jittered_interval
+
+
+class RecordingUpdater(MIBUpdater):
+    def __init__(self, name, frequency, busy=0):
+        super().__init__()
+        self.name = name
+        self.frequency = frequency
+        self.busy = busy
+        self.cycles = []
+
+    def update_data(self):
+        self.cycles.append(asyncio.get_event_loop().time())
+        end = time.thread_time() + self.busy
+        while time.thread_time() < end:
+            pass
+
+
+class ChunkedUpdater(RecordingUpdater):
+    def __init__(self, name, frequency, slices):
+        super().__init__(name, frequency)
+        self.slices = slices
+        self.slices_done = 0
+
+    def update_data_chunks(self):
+        for _ in range(self.slices):
+            self.slices_done += 1
+            yield
+
+
+def burn(seconds):
+    end = time.thread_time() + seconds
+    while time.thread_time() < end:
+        pass
+
+
+class TestUpdaterScheduler(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.event = asyncio.Event()
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def run_for(self, scheduler, duration):
+        async def run():
+            self.event.set()
+            task = asyncio.ensure_future(scheduler.run())
+            await asyncio.sleep(duration)
+            self.event.clear()
+            await asyncio.wait_for(task, 5)
+        self.loop.run_until_complete(run())
+
+    def test_stagger(self):
+        updaters = [RecordingUpdater(i, 1) for i in range(4)]
+        scheduler = UpdaterScheduler(updaters, self.event)
+        scheduler.stagger(100)
+        deadlines = sorted(deadline for deadline, _, _ in scheduler._queue)
+        self.assertEqual(deadlines, [100, 100.25, 100.5, 100.75])
+
+    def test_phases_kept(self):
+        updaters = [RecordingUpdater(i, 0.2) for i in range(2)]
+        scheduler = UpdaterScheduler(updaters, self.event)
+        self.run_for(scheduler, 0.7)
+        first, second = scheduler.updaters
+        self.assertGreaterEqual(len(first.cycles), 3)
+        # the second updater runs half an interval after the first, every time
+        for a, b in zip(first.cycles, second.cycles):
+            self.assertAlmostEqual(b - a, 0.1, delta=0.05)
+        self.assertEqual(scheduler.total_missed_deadlines, 0)
+
+    def test_max_updates_per_tick(self):
+        updaters = [RecordingUpdater(i, 10) for i in range(3)]
+        scheduler = UpdaterScheduler(updaters, self.event, max_updates_per_tick=2)
+        # all due at once
+        for updater in updaters:
+            scheduler.schedule(updater, 0)
+        self.loop.run_until_complete(scheduler.tick())
+        self.assertEqual(sum(len(updater.cycles) for updater in updaters), 2)
+        self.assertEqual(scheduler.deferred, 1)
+        self.loop.run_until_complete(scheduler.tick())
+        self.assertEqual(sum(len(updater.cycles) for updater in updaters), 3)
+
+    def test_cpu_budget(self):
+        updaters = [RecordingUpdater(i, 10, busy=0.05) for i in range(3)]
+        scheduler = UpdaterScheduler(updaters, self.event, max_updates_per_tick=3, tick_cpu_budget=0.01)
+        for updater in updaters:
+            scheduler.schedule(updater, 0)
+        # at least one cycle per tick, even over budget
+        self.loop.run_until_complete(scheduler.tick())
+        self.assertEqual(sum(len(updater.cycles) for updater in updaters), 1)
+        self.assertEqual(scheduler.deferred, 2)
+
+    def test_chunked_cycle_runs_alongside(self):
+        chunked = ChunkedUpdater('a', 10, slices=50)
+        updater = RecordingUpdater('b', 10)
+        scheduler = UpdaterScheduler([chunked, updater], self.event)
+        for u in (chunked, updater):
+            scheduler.schedule(u, 0)
+        self.loop.run_until_complete(scheduler.tick())
+        # the second updater did not wait for the chunked cycle to end
+        self.assertEqual(len(updater.cycles), 1)
+        self.assertLess(chunked.slices_done, 50)
+        self.loop.run_until_complete(asyncio.gather(*scheduler._running))
+        self.assertEqual(chunked.slices_done, 50)
+        self.assertEqual(len(scheduler._queue), 2)
+
+    def test_cpu_budget_charges_update_work_only(self):
+        updaters = [ChunkedUpdater(i, 10, slices=2) for i in range(3)]
+        scheduler = UpdaterScheduler(updaters, self.event, max_updates_per_tick=3, tick_cpu_budget=0.01)
+        for updater in updaters:
+            scheduler.schedule(updater, 0)
+
+        async def tick():
+            # request handling in between the slices
+            for _ in range(3):
+                self.loop.call_soon(burn, 0.02)
+            await scheduler.tick()
+        self.loop.run_until_complete(tick())
+        self.assertTrue(all(updater.slices_done for updater in updaters))
+        self.assertEqual(scheduler.deferred, 0)
+        self.loop.run_until_complete(asyncio.gather(*scheduler._running))
+
+    def test_missed_deadline(self):
+        updater = RecordingUpdater(0, 10)
+        scheduler = UpdaterScheduler([updater], self.event)
+        scheduler.schedule(updater, self.loop.time() - 15)
+        with mock.patch('ax_interface.logger.warning') as warning:
+            self.loop.run_until_complete(scheduler.tick())
+        self.assertEqual(scheduler.missed_deadlines, {updater: 1})
+        self.assertEqual(warning.call_count, 1)
+        # a whole interval behind: rescheduled one interval from now, not back to back
+        deadline, _, _ = scheduler._queue[0]
+        self.assertAlmostEqual(deadline, self.loop.time() + 10, delta=1)
+
+    def test_no_updaters(self):
+        self.run_for(UpdaterScheduler([], self.event), 0)
+
+    def test_stop(self):
+        updater = RecordingUpdater(0, 60)
+        scheduler = UpdaterScheduler([updater], self.event)
+
+        async def run():
+            self.event.set()
+            task = asyncio.ensure_future(scheduler.run())
+            await asyncio.sleep(0.05)
+            # the next deadline is 60s away
+            self.event.clear()
+            scheduler.stop()
+            await asyncio.wait_for(task, 1)
+        self.loop.run_until_complete(run())
+        self.assertEqual(len(updater.cycles), 1)
+
+
+class TestJitteredInterval(TestCase):
+    def test_bounds(self):
+        for interval in (0.5, 1, 5, 60):
+            for _ in range(100):
+                jittered = get_jittered_interval(interval)
+                self.assertGreaterEqual(jittered, interval * 0.75)
+                self.assertLessEqual(jittered, interval * 1.25)
+                self.assertLessEqual(abs(jittered - interval), 2)
+
+
+class TestDemandDrivenRefresh(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.event = asyncio.Event()
+        self.updater = RecordingUpdater(0, 5)
+        self.tracker = AccessTracker(idle_timeout=60)
+        self.tracker.updater_access[self.updater] = time.monotonic()
+        self.scheduler = UpdaterScheduler([self.updater], self.event, access_tracker=self.tracker, idle_frequency=30)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def next_deadline(self):
+        return self.scheduler._peek()[0] - self.loop.time()
+
+    def test_idle_rate(self):
+        self.scheduler.schedule(self.updater, 0)
+        self.loop.run_until_complete(self.scheduler.tick())
+        self.assertAlmostEqual(self.next_deadline(), 5, delta=1)
+
+        self.tracker.updater_access[self.updater] -= 120
+        self.scheduler.schedule(self.updater, 0)
+        self.loop.run_until_complete(self.scheduler.tick())
+        self.assertAlmostEqual(self.next_deadline(), 30, delta=1)
+        self.assertEqual(self.scheduler.idle_cycles, {self.updater: 1})
+
+    def test_wake(self):
+        self.scheduler.schedule(self.updater, self.loop.time() + 30)
+        self.scheduler.wake(self.updater)
+        self.assertLessEqual(self.next_deadline(), 0)
+        self.loop.run_until_complete(self.scheduler.tick())
+        self.assertEqual(len(self.updater.cycles), 1)
+        # rescheduled from the refresh, the former deadline is stale
+        self.assertAlmostEqual(self.next_deadline(), 5, delta=1)
+
+    def test_wake_running(self):
+        async def run():
+            self.event.set()
+            task = asyncio.ensure_future(self.scheduler.run())
+            await asyncio.sleep(0.05)
+            cycles = len(self.updater.cycles)
+            # refreshed right away rather than at the next deadline
+            self.scheduler.wake(self.updater)
+            await asyncio.sleep(0.05)
+            self.event.clear()
+            self.scheduler.wake(self.updater)
+            await asyncio.wait_for(task, 5)
+            return cycles
+
+        cycles = self.loop.run_until_complete(run())
+        self.assertEqual(cycles, 1)
+        self.assertEqual(len(self.updater.cycles), 2)
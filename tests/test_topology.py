@@ -0,0 +1,164 @@
+import copy
+import os
+import pickle
+import sys
+from unittest import TestCase, mock
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from sonic_ax_impl.mibs import Namespace
+from sonic_ax_impl.mibs.topology import FrozenDict, TopologyService
+
+
+class FakeDb:
+    def __init__(self, namespace, port=None):
+        self.namespace = namespace
+        self.port = port
+        self.connects = 0
+        self.fail = False
+
+    def connect(self, db_name):
+        self.connects += 1
+
+
+class FakePubSub:
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.messages = []
+
+    def get_message(self):
+        return self.messages.pop(0) if self.messages else None
+
+
+class TestTopologyService(TestCase):
+    def setUp(self):
+        self.host = FakeDb('')
+        self.asics = [FakeDb('asic0', 'Ethernet0'), FakeDb('asic1', 'Ethernet4')]
+        self.dbs = [self.host] + self.asics
+        # (function, namespace) of each per namespace read
+        self.calls = []
+        self.pubsubs = {}
+
+        def interface_tables(db_conn):
+            self.calls.append(('interfaces', db_conn.namespace))
+            if db_conn.fail:
+                db_conn.fail = False
+                raise RuntimeError('connection lost')
+            sai_id = db_conn.namespace + ':1'
+            return ({db_conn.port: '1'}, {db_conn.port: 'etp' + db_conn.port[-1]}, {sai_id: db_conn.port},
+                    {int(db_conn.port[-1]) + 1: db_conn.port})
+
+        def lag_tables(db_conn):
+            self.calls.append(('lags', db_conn.namespace))
+            return {}, {}, {}, {}, {}
+
+        def get_redis_pubsub(db_conn, db_name, pattern):
+            return self.pubsubs.setdefault(db_conn.namespace, FakePubSub(db_conn.namespace))
+
+        for patcher in (
+                mock.patch('sonic_ax_impl.mibs.init_sync_d_interface_tables', interface_tables),
+                mock.patch('sonic_ax_impl.mibs.init_sync_d_lag_tables', lag_tables),
+                mock.patch('sonic_ax_impl.mibs.init_mgmt_interface_tables', mock.MagicMock(return_value=({}, {}))),
+                mock.patch('sonic_ax_impl.mibs.Namespace.init_namespace_dbs', mock.MagicMock(return_value=self.dbs)),
+                mock.patch('sonic_ax_impl.mibs.get_redis_pubsub', get_redis_pubsub),
+                mock.patch.object(Namespace, 'failed_dbs', set())):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.service = TopologyService()
+
+    def notify(self, namespace):
+        self.pubsubs[namespace].messages.append({'type': 'pmessage', 'channel': '__keyspace@2__:LAG_TABLE:PortChannel1'})
+
+    def test_disabled(self):
+        first = self.service.snapshot(self.dbs)
+        second = self.service.snapshot(self.dbs)
+        self.assertEqual(first.interfaces.oid_name_map, {1: 'Ethernet0', 5: 'Ethernet4'})
+        self.assertEqual(second.interfaces.if_alias_map, {'Ethernet0': 'etp0', 'Ethernet4': 'etp4'})
+        # a snapshot per request, each family read on first use only
+        self.assertGreater(second.version, first.version)
+        self.assertEqual(self.calls, [('interfaces', 'asic0'), ('interfaces', 'asic1')] * 2)
+
+    def test_read_only(self):
+        oid_name_map = self.service.snapshot(self.dbs).interfaces.oid_name_map
+        with self.assertRaises(TypeError):
+            oid_name_map[2] = 'Ethernet1'
+        with self.assertRaises(TypeError):
+            oid_name_map.update({2: 'Ethernet1'})
+        self.assertEqual({**oid_name_map, 2: 'Ethernet1'}, {1: 'Ethernet0', 2: 'Ethernet1', 5: 'Ethernet4'})
+
+    def test_shared(self):
+        self.service.enable()
+        first = self.service.snapshot()
+        first.interfaces
+        first.lags
+        second = self.service.snapshot()
+        second.interfaces
+        self.assertIs(first, second)
+        self.assertEqual(len(self.calls), 4)
+        self.assertEqual(self.service.rebuilds, 1)
+
+    def test_namespace_change(self):
+        self.service.enable()
+        self.service.min_rebuild_interval = 0
+        first = self.service.snapshot()
+        first.interfaces
+        self.notify('asic1')
+        second = self.service.snapshot()
+        self.assertIsNot(first, second)
+        self.assertEqual(second.interfaces, first.interfaces)
+        # only the namespace that changed is read again
+        self.assertEqual(self.calls, [('interfaces', 'asic0'), ('interfaces', 'asic1'), ('interfaces', 'asic1')])
+        self.assertEqual(self.service.notified_rebuilds, 1)
+        self.assertEqual(self.service.namespace_rebuilds, {'': 1, 'asic0': 1, 'asic1': 2})
+        self.assertIs(self.service.snapshot(), second)
+
+    def test_namespace_failure(self):
+        self.service.enable()
+        self.asics[1].fail = True
+        with self.assertRaises(RuntimeError):
+            self.service.snapshot().interfaces
+        self.assertEqual(Namespace.failed_dbs, {self.asics[1]})
+
+        connects = [db_conn.connects for db_conn in self.dbs]
+        interfaces = self.service.snapshot().interfaces
+        self.assertEqual(interfaces.oid_name_map, {1: 'Ethernet0', 5: 'Ethernet4'})
+        # only the failed namespace is connected (to each of its 6 databases) and read again
+        self.assertEqual([db_conn.connects - before for db_conn, before in zip(self.dbs, connects)], [0, 0, 6])
+        self.assertEqual(self.calls.count(('interfaces', 'asic0')), 1)
+        self.assertEqual(self.service.reconnects, {'asic1': 1})
+        self.assertEqual(Namespace.failed_dbs, set())
+
+    def test_min_rebuild_interval(self):
+        self.service.enable()
+        first = self.service.snapshot()
+        self.notify('asic0')
+        self.assertIs(self.service.snapshot(), first)
+
+    def test_refresh_interval(self):
+        self.service.enable()
+        self.service.refresh_interval = self.service.min_rebuild_interval = 0
+        first = self.service.snapshot()
+        self.assertIsNot(self.service.snapshot(), first)
+
+
+class TestNamespaceReconnect(TestCase):
+    def test_failed_only(self):
+        dbs = [FakeDb(''), FakeDb('asic0'), FakeDb('asic1')]
+        with mock.patch.object(Namespace, 'failed_dbs', set()):
+            with self.assertRaises(RuntimeError), Namespace.track_failure(dbs[2]):
+                raise RuntimeError('connection lost')
+            Namespace.connect_namespace_dbs(dbs)
+            self.assertEqual([db_conn.connects for db_conn in dbs], [0, 0, 6])
+            # no failure known: all of them
+            Namespace.connect_namespace_dbs(dbs)
+            self.assertEqual([db_conn.connects for db_conn in dbs], [6, 6, 12])
+
+
+class TestFrozenDict(TestCase):
+    def test_copy(self):
+        frozen = FrozenDict({1: 'Ethernet0'})
+        self.assertIs(copy.copy(frozen), frozen)
+        unpickled = pickle.loads(pickle.dumps(frozen))
+        self.assertIsInstance(unpickled, FrozenDict)
+        self.assertEqual(unpickled, {1: 'Ethernet0'})
@@ -0,0 +1,60 @@
+import json
+import os
+import sys
+import tempfile
+from unittest import TestCase, mock
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from sonic_ax_impl import mibs
+from sonic_ax_impl.updater_config import UpdaterConfigUpdater, load_updater_config_db, load_updater_config_file
+
+
+class TestUpdaterConfig(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'updaters.json')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write_config(self, config):
+        with open(self.path, 'w') as f:
+            json.dump(config, f)
+
+    def test_config_file(self):
+        self.write_config({
+            'FdbUpdater': {'interval': 30, 'reinit_interval': '300'},
+            'QueueStatUpdater': {'interval': -1, 'unknown': 1},
+        })
+        with mock.patch('sonic_ax_impl.logger.warning') as mocked_warning:
+            settings = load_updater_config_file(self.path)
+        self.assertEqual(settings, {'FdbUpdater': {'interval': 30, 'reinit_interval': 300}})
+        self.assertEqual(mocked_warning.call_count, 2)
+
+    def test_config_db(self):
+        db_conn = mock.MagicMock()
+        db_conn.get_all.return_value = {'FdbUpdater.interval': '20', 'PhysicalTableMIBUpdater.reinit_interval': '600'}
+        settings = load_updater_config_db(db_conn)
+        db_conn.get_all.assert_called_once_with(mibs.CONFIG_DB, 'SNMP_AGENT|updaters', blocking=False)
+        self.assertEqual(settings, {'FdbUpdater': {'interval': 20}, 'PhysicalTableMIBUpdater': {'reinit_interval': 600}})
+
+    def test_reload(self):
+        self.write_config({'FdbUpdater': {'interval': 30, 'reinit_interval': 300}})
+        db_conn = mock.MagicMock()
+        db_conn.get_all.return_value = {'FdbUpdater.interval': '20'}
+        mib_table = mock.MagicMock()
+        updater = UpdaterConfigUpdater(mib_table, self.path)
+        with mock.patch('sonic_ax_impl.mibs.init_db', mock.MagicMock(return_value=db_conn)):
+            updater.update_data()
+            # CONFIG_DB takes precedence over the file
+            mib_table.configure_updaters.assert_called_once_with({'FdbUpdater': {'interval': 20, 'reinit_interval': 300}})
+
+            # unchanged: nothing to apply
+            updater.update_data()
+            self.assertEqual(mib_table.configure_updaters.call_count, 1)
+
+            db_conn.get_all.return_value = {}
+            updater.update_data()
+            mib_table.configure_updaters.assert_called_with({'FdbUpdater': {'interval': 30, 'reinit_interval': 300}})
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase, mock
+
+from ax_interface import updater_process
+from ax_interface.mib import MIBUpdater
+from ax_interface.updater_process import UpdaterProcess, dump_state, make_snapshot_dir, read_snapshot, \
+    write_snapshot
+
+
+class CounterUpdater(MIBUpdater):
+    process_update = True
+
+    def __init__(self):
+        super().__init__()
+        self.frequency = 0.05
+        self.db_conn = threading.Lock()
+        self.counters = {}
+        self.connections = 0
+        self.crash_at = None
+        self.hang_at = None
+        self.ignore_sigterm = False
+
+    def reinit_connection(self):
+        self.connections += 1
+
+    def update_data(self):
+        cycle = sum(self.counters.values()) + 1
+        if cycle == self.crash_at:
+            os._exit(3)
+        if cycle == self.hang_at:
+            if self.ignore_sigterm:
+                signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            time.sleep(60)
+        self.counters[(1,)] = cycle
+
+
+class TestSnapshot(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'snapshot')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_roundtrip(self):
+        updater = CounterUpdater()
+        updater.counters = {(1,): 5}
+        unshared = set(updater_process.PROCESS_LOCAL_ATTRIBUTES)
+        write_snapshot(self.path, 7, dump_state(updater, unshared))
+        generation, timestamp, state = read_snapshot(self.path)
+        self.assertEqual(generation, 7)
+        self.assertAlmostEqual(timestamp, time.time(), delta=5)
+        self.assertEqual(state['counters'], {(1,): 5})
+        # neither the agent's own attributes nor connections are shared
+        self.assertNotIn('run_event', state)
+        self.assertNotIn('frequency', state)
+        self.assertNotIn('db_conn', state)
+        self.assertIn('db_conn', unshared)
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+    def test_replace(self):
+        write_snapshot(self.path, 1, dump_state(CounterUpdater(), set()))
+        updater = CounterUpdater()
+        updater.counters = {(1,): 2}
+        write_snapshot(self.path, 2, dump_state(updater, set()))
+        generation, _, state = read_snapshot(self.path)
+        self.assertEqual(generation, 2)
+        self.assertEqual(state['counters'], {(1,): 2})
+
+    def test_private_dir(self):
+        path = make_snapshot_dir(self.dir.name)
+        self.assertEqual(os.path.dirname(path), self.dir.name)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o700)
+
+    def test_symlinks_not_followed(self):
+        target = os.path.join(self.dir.name, 'target')
+        with open(target, 'wb') as f:
+            f.write(b'kept')
+        os.symlink(target, self.path + '.tmp')
+        write_snapshot(self.path, 1, dump_state(CounterUpdater(), set()))
+        with open(target, 'rb') as f:
+            self.assertEqual(f.read(), b'kept')
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+        os.remove(self.path)
+        os.symlink(target, self.path)
+        with self.assertRaises(OSError):
+            read_snapshot(self.path)
+
+
+class TestUpdaterProcess(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.dir = tempfile.TemporaryDirectory()
+        self.updater = CounterUpdater()
+        self.updater.run_event = asyncio.Event()
+        self.process = UpdaterProcess(self.updater, self.dir.name)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+        self.dir.cleanup()
+
+    def run_until(self, condition, timeout=10):
+        async def run():
+            self.updater.run_event.set()
+            task = asyncio.ensure_future(self.process.run())
+            deadline = time.monotonic() + timeout
+            while not condition() and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            self.updater.run_event.clear()
+            await asyncio.wait_for(task, 10)
+        self.loop.run_until_complete(run())
+        self.assertTrue(condition())
+
+    def test_publish(self):
+        self.run_until(lambda: self.process.generation >= 3)
+        # published to the agent's copy, which never updates by itself
+        self.assertGreaterEqual(self.updater.counters[(1,)], 3)
+        self.assertEqual(self.updater.connections, 1)
+        self.assertIsNotNone(self.process.snapshot_time)
+        self.assertEqual(self.process.restarts, 0)
+        self.assertIsNone(self.process.process)
+        self.assertEqual(os.listdir(self.dir.name), [])
+
+    def test_restart_on_exit(self):
+        self.updater.crash_at = 2
+        with mock.patch.object(updater_process, 'RESTART_DELAY', 0.01):
+            self.run_until(lambda: self.process.restarts >= 1 and self.process.generation >= 1)
+        self.assertEqual(self.updater.counters, {(1,): 1})
+
+    def test_restart_when_stale(self):
+        self.updater.hang_at = 2
+        with mock.patch.object(updater_process, 'RESTART_DELAY', 0.01), \
+                mock.patch.object(updater_process, 'MIN_STALE_TIMEOUT', 0.2):
+            self.run_until(lambda: self.process.restarts >= 1)
+        self.assertEqual(self.updater.counters, {(1,): 1})
+
+    def test_stop_without_blocking(self):
+        self.updater.hang_at = 2
+        self.updater.ignore_sigterm = True
+        ticks = []
+
+        async def ticker():
+            while self.updater.run_event.is_set():
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        async def run():
+            self.updater.run_event.set()
+            self.process.start_process()
+            ticking = asyncio.ensure_future(ticker())
+            while not self.process.generation:
+                await asyncio.sleep(0.01)
+            # into the second cycle, which hangs
+            await asyncio.sleep(0.2)
+            process = self.process.process
+            with mock.patch.object(updater_process, 'STOP_TIMEOUT', 0.2):
+                await self.process.stop_process()
+            self.updater.run_event.clear()
+            await ticking
+            return process
+
+        process = self.loop.run_until_complete(run())
+        # terminated in vain, then killed
+        self.assertEqual(process.exitcode, -signal.SIGKILL)
+        # the event loop kept running meanwhile
+        self.assertLess(max(b - a for a, b in zip(ticks, ticks[1:])), 0.15)